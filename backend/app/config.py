@@ -18,8 +18,48 @@ SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 SLACK_CHANNEL = os.getenv("SLACK_CHANNEL")
 SLACK_DESTINATIONS = os.getenv("SLACK_DESTINATIONS")
 
-# Reconstruir token.json desde env vars individuales (evita problemas de JSON en env vars)
-if GOOGLE_REFRESH_TOKEN and GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET:
+DOWNLOAD_DIR = Path(os.getenv("DOWNLOAD_DIR", "/tmp/reports"))
+
+# Variantes comprimidas de los consolidados ("gzip", "zstd"; vacío = ninguna)
+CONSOLIDATED_COMPRESSION = [
+    e.strip() for e in os.getenv("CONSOLIDATED_COMPRESSION", "gzip").split(",") if e.strip()
+]
+
+# Workers de app.executors: procesos para pasos CPU-bound, threads para I/O bloqueante
+EXECUTOR_CPU_WORKERS = int(os.getenv("EXECUTOR_CPU_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1))))
+EXECUTOR_IO_WORKERS = int(os.getenv("EXECUTOR_IO_WORKERS", "8"))
+
+# Intervalos de los probes de app.health_probes (Siete/consolidados/stores y login de Reply.io).
+# El de Reply.io abre Chromium y hace un login real: opt-in (0 = deshabilitado)
+DIAGNOSTICS_PROBE_SECONDS = float(os.getenv("DIAGNOSTICS_PROBE_SECONDS", "60"))
+DIAGNOSTICS_REPLY_PROBE_SECONDS = float(os.getenv("DIAGNOSTICS_REPLY_PROBE_SECONDS", "0"))
+
+# Retención de DOWNLOAD_DIR (app.retention): presupuesto total (0 = sin límite) y días por clase
+RETENTION_DISK_BUDGET_MB = int(os.getenv("RETENTION_DISK_BUDGET_MB", "4096"))
+RETENTION_DAYS = os.getenv("RETENTION_DAYS", "")
+
+TFLX_PATH = os.getenv("TFLX_PATH")
+TABLEAU_SERVER_URL = os.getenv("TABLEAU_SERVER_URL")
+TABLEAU_SITE_ID = os.getenv("TABLEAU_SITE_ID", "")
+TABLEAU_PAT_NAME = os.getenv("TABLEAU_PAT_NAME")
+TABLEAU_PAT_SECRET = os.getenv("TABLEAU_PAT_SECRET")
+
+
+# Efectos de disco: se hacen al arrancar (lifespan, scripts) o al primer uso, no al importar
+
+def ensure_download_dir() -> Path:
+    """Crea DOWNLOAD_DIR si no existe (idempotente)."""
+    DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    return DOWNLOAD_DIR
+
+
+def write_google_token() -> bool:
+    """Reconstruye el token.json de Google desde env vars individuales (evita problemas de JSON en env vars).
+
+    Returns: True si se escribió (están las tres env vars).
+    """
+    if not (GOOGLE_REFRESH_TOKEN and GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET):
+        return False
     token_data = {
         "token": "",
         "refresh_token": GOOGLE_REFRESH_TOKEN,
@@ -37,11 +77,4 @@ if GOOGLE_REFRESH_TOKEN and GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET:
     Path(GOOGLE_TOKEN_PATH).parent.mkdir(parents=True, exist_ok=True)
     Path(GOOGLE_TOKEN_PATH).write_text(json.dumps(token_data))
     print("[config] Token reconstruido desde env vars individuales")
-DOWNLOAD_DIR = Path(os.getenv("DOWNLOAD_DIR", "/tmp/reports"))
-DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-TFLX_PATH = os.getenv("TFLX_PATH")
-TABLEAU_SERVER_URL = os.getenv("TABLEAU_SERVER_URL")
-TABLEAU_SITE_ID = os.getenv("TABLEAU_SITE_ID", "")
-TABLEAU_PAT_NAME = os.getenv("TABLEAU_PAT_NAME")
-TABLEAU_PAT_SECRET = os.getenv("TABLEAU_PAT_SECRET")
+    return True
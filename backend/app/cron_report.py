@@ -1,15 +1,12 @@
-"""Persistencia del último run del cron diario para observabilidad.
+"""Reporte de cada run del cron diario para observabilidad.
 
-Best-effort: si la escritura falla, se logea pero no se propaga.
+Se guarda en el historial (`run_history`, tabla cron_runs). Best-effort: si la
+escritura falla, se logea pero no se propaga.
 """
-import json
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from pathlib import Path
 
-from app.config import DOWNLOAD_DIR
-
-_REPORT_PATH = DOWNLOAD_DIR / "last_cron_run.json"
+from app import run_history
 
 
 @dataclass
@@ -33,19 +30,9 @@ class CronRunReport:
             self.error = error
 
     def save(self) -> None:
-        try:
-            _REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
-            _REPORT_PATH.write_text(json.dumps(asdict(self), indent=2, ensure_ascii=False))
-        except Exception as e:
-            print(f"[cron-report] No se pudo escribir {_REPORT_PATH}: {e}")
+        run_history.save_cron_report(asdict(self))
 
 
 def load_last_cron_run() -> dict | None:
     """Lee el último cron run report. Retorna None si no existe."""
-    if not _REPORT_PATH.exists():
-        return None
-    try:
-        return json.loads(_REPORT_PATH.read_text())
-    except Exception as e:
-        print(f"[cron-report] Error leyendo {_REPORT_PATH}: {e}")
-        return None
+    return run_history.last_cron_run()
@@ -6,8 +6,8 @@ Active sin team_id pero que no quiere procesar (ej. cliente ya inactivo cuyo
 status no fue actualizado en Siete), sin necesidad de cambiar nada en el CRM.
 
 Persistencia: `DOWNLOAD_DIR / "discarded_clients.json"` con
-`{"siete_ids": [int], "updated_at": iso8601}`. Mismo patrón best-effort que
-`last_cron_run.json`.
+`{"siete_ids": [int], "updated_at": iso8601}`. Best-effort: si el archivo
+está corrupto se trata como vacío.
 """
 import json
 from datetime import datetime, timezone
@@ -0,0 +1,120 @@
+"""Pools para sacar trabajo bloqueante del event loop.
+
+  - `run_cpu`: pasos CPU-bound (pandas sobre los consolidados, armado del XLSX)
+    en un `ProcessPoolExecutor` con contexto `spawn`, así no compiten por el GIL
+    con el loop que atiende la API. La función y sus argumentos viajan por
+    pickle: tienen que ser funciones de módulo y datos simples (Paths, dicts).
+  - `run_io`: I/O bloqueante (SQLite, zip del .tflx, upload a Tableau) en un
+    `ThreadPoolExecutor` acotado, en vez del pool default ilimitado de
+    `asyncio.to_thread`.
+
+Los pools se crean al primer uso y se cierran en `shutdown()` (lifespan). Si el
+pool de procesos se rompe (worker muerto por OOM, etc.) la tarea se reintenta
+en el pool de threads y el pool se recrea en la próxima llamada.
+
+`stats()` expone, por pool y por función: llamadas, errores, en vuelo, tiempo
+de espera en cola y de ejecución; lo muestra `/api/diagnostics`.
+"""
+import asyncio
+import functools
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from app.config import EXECUTOR_CPU_WORKERS, EXECUTOR_IO_WORKERS
+
+_pools: dict[str, Executor | None] = {"cpu": None, "io": None}
+_stats: dict[str, dict] = {}
+
+
+async def run_cpu(fn: Callable, *args, **kwargs) -> Any:
+    """Corre `fn(*args, **kwargs)` en el pool de procesos."""
+    try:
+        return await _submit("cpu", fn, args, kwargs)
+    except BrokenProcessPool as e:
+        print(f"[executors] Pool de procesos roto ({e}); reintentando {_label(fn)} en thread")
+        _pools["cpu"] = None
+        return await _submit("io", fn, args, kwargs)
+
+
+async def run_io(fn: Callable, *args, **kwargs) -> Any:
+    """Corre `fn(*args, **kwargs)` en el pool de threads acotado."""
+    return await _submit("io", fn, args, kwargs)
+
+
+def shutdown() -> None:
+    for name, pool in _pools.items():
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pools[name] = None
+
+
+def stats() -> dict:
+    return {
+        "workers": {"cpu": EXECUTOR_CPU_WORKERS, "io": EXECUTOR_IO_WORKERS},
+        "started": {name: pool is not None for name, pool in _pools.items()},
+        "tasks": {
+            key: {
+                **{k: v for k, v in s.items() if not k.endswith("_s")},
+                "avg_wait_ms": round(s["wait_s"] / max(s["calls"], 1) * 1000, 1),
+                "max_wait_ms": round(s["max_wait_s"] * 1000, 1),
+                "avg_run_ms": round(s["run_s"] / max(s["calls"], 1) * 1000, 1),
+                "max_run_ms": round(s["max_run_s"] * 1000, 1),
+            }
+            for key, s in _stats.items()
+        },
+    }
+
+
+async def _submit(pool_name: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+    s = _stats.setdefault(f"{pool_name}:{_label(fn)}", {
+        "calls": 0, "errors": 0, "in_flight": 0,
+        "wait_s": 0.0, "max_wait_s": 0.0, "run_s": 0.0, "max_run_s": 0.0,
+    })
+    s["calls"] += 1
+    s["in_flight"] += 1
+    submitted = time.time()
+    loop = asyncio.get_running_loop()
+    try:
+        started, elapsed, result = await loop.run_in_executor(
+            _pool(pool_name), functools.partial(_timed, fn, args, kwargs),
+        )
+    except Exception:
+        s["errors"] += 1
+        raise
+    finally:
+        s["in_flight"] -= 1
+    wait = max(started - submitted, 0.0)
+    s["wait_s"] += wait
+    s["max_wait_s"] = max(s["max_wait_s"], wait)
+    s["run_s"] += elapsed
+    s["max_run_s"] = max(s["max_run_s"], elapsed)
+    return result
+
+
+def _timed(fn: Callable, args: tuple, kwargs: dict) -> tuple[float, float, Any]:
+    """Corre en el worker: devuelve (inicio, duración, resultado) para medir la cola."""
+    started = time.time()
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return started, time.perf_counter() - t0, result
+
+
+def _pool(name: str) -> Executor:
+    pool = _pools[name]
+    if pool is None:
+        if name == "cpu":
+            pool = ProcessPoolExecutor(
+                max_workers=EXECUTOR_CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=EXECUTOR_IO_WORKERS, thread_name_prefix="io")
+        _pools[name] = pool
+    return pool
+
+
+def _label(fn: Callable) -> str:
+    fn = getattr(fn, "func", fn)  # functools.partial
+    return getattr(fn, "__qualname__", repr(fn))
@@ -7,7 +7,7 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
-from app.config import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_TOKEN_PATH
+from app.config import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_TOKEN_PATH, write_google_token
 
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
@@ -15,6 +15,8 @@ SCOPES = [
     "https://www.googleapis.com/auth/gmail.send",
 ]
 
+_token_written = False
+
 
 def _client_config() -> dict:
     """Build OAuth client config dict from env vars."""
@@ -31,9 +33,14 @@ def _client_config() -> dict:
 
 def get_credentials() -> Credentials:
     """Load and ensure OAuth2 credentials have a fresh access token."""
+    global _token_written
     token_path = Path(GOOGLE_TOKEN_PATH)
     creds = None
 
+    if not _token_written:
+        # Una vez por proceso, como hacía config al importarse; después manda el token refrescado
+        write_google_token()
+        _token_written = True
     if token_path.exists():
         creds = Credentials.from_authorized_user_file(str(token_path), SCOPES)
 
@@ -0,0 +1,243 @@
+"""Probes de salud en background para `/api/diagnostics`.
+
+Antes cada `GET /api/diagnostics` pedía el listado completo de clientes a
+Siete (sin cache), stateaba los consolidados y leía los SQLite en el event
+loop. Ahora un loop lanzado en el lifespan corre cada probe según su
+intervalo y guarda el último resultado; el endpoint sólo arma el snapshot.
+
+Cada sección queda como:
+
+    {"status": "ok" | "error" | "skipped" | "pending", "checked_at": ISO UTC,
+     "age_s": 12.3, "latency_ms": 85.2, "data": {...}, "error": None}
+
+`data` conserva el último resultado OK aunque el probe siguiente falle (el
+error queda en `error`). Probes:
+
+  - siete_api: alcanzabilidad de Siete + agregados de clientes (cada
+    `DIAGNOSTICS_PROBE_SECONDS`). Reusa el cache de `_fetch_all_clientes` si es
+    más nuevo que el intervalo, así no duplica requests del resto de la app.
+  - consolidated_today: existencia, tamaño y filas (del índice) de los CSVs de hoy.
+  - stores: `meetings_store`, `run_history`, uso de disco por clase (`retention`)
+    y último cron run (lecturas SQLite).
+  - reply_io: login en un Chromium aparte para verificar que las credenciales
+    siguen entrando. Opt-in: sólo corre si `DIAGNOSTICS_REPLY_PROBE_SECONDS` > 0
+    (default 0 = "disabled"), nunca al arrancar (la primera corrida es un
+    intervalo después) y `?refresh=all` no lo incluye; hay que pedirlo por
+    nombre. Se saltea sin credenciales y mientras corre un scrape (comparte un
+    lock con el scraper, ver `reply_io.check_session`).
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from app import executors, meetings_store, metrics, retention, run_history
+from app.config import (
+    DIAGNOSTICS_PROBE_SECONDS, DIAGNOSTICS_REPLY_PROBE_SECONDS, DOWNLOAD_DIR,
+    REPLY_IO_EMAIL, REPLY_IO_PASSWORD,
+)
+from app.cron_report import load_last_cron_run
+from app.utils.dates import today_peru_iso
+
+# Cada cuánto se revisa qué probes están vencidos
+_TICK_SECONDS = 5.0
+
+
+class ProbeSkipped(Exception):
+    """El probe no corresponde ahora (ej. faltan credenciales); no cuenta como error."""
+
+
+class _Probe:
+    def __init__(self, name: str, fn: Callable[[], Awaitable[dict]], interval: float, run_at_start: bool = True):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.enabled = interval > 0
+        self.status = "pending" if self.enabled else "disabled"
+        self.checked_at: str | None = None
+        self.checked_mono = 0.0
+        self.latency_ms: float | None = None
+        self.data: dict | None = None
+        self.error: str | None = None
+        self.next_at = 0.0 if run_at_start else time.monotonic() + interval
+        self._lock = asyncio.Lock()
+
+    async def run(self) -> None:
+        """Corre el probe (uno a la vez: si ya está corriendo, espera ese resultado)."""
+        if self._lock.locked():
+            async with self._lock:
+                return
+        async with self._lock:
+            t0 = time.perf_counter()
+            try:
+                data = await self.fn()
+            except ProbeSkipped as e:
+                self.status, self.error = "skipped", str(e)
+                self.next_at = time.monotonic() + min(self.interval, 60)
+                return
+            except Exception as e:
+                self.status, self.error = "error", f"{type(e).__name__}: {e}"
+                print(f"[health] Probe {self.name} falló: {self.error}")
+            else:
+                self.status, self.data, self.error = "ok", data, None
+            seconds = time.perf_counter() - t0
+            self.latency_ms = round(seconds * 1000, 1)
+            self.checked_at = datetime.now(timezone.utc).isoformat()
+            self.checked_mono = time.monotonic()
+            self.next_at = self.checked_mono + self.interval
+            metrics.HEALTH_PROBE_SECONDS.observe(seconds, probe=self.name, outcome=self.status)
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "checked_at": self.checked_at,
+            "age_s": round(time.monotonic() - self.checked_mono, 1) if self.checked_at else None,
+            "latency_ms": self.latency_ms,
+            "interval_s": self.interval,
+            "data": self.data,
+            "error": self.error,
+        }
+
+
+# ── Probes ────────────────────────────────────────────────────────────────────
+
+async def _probe_siete() -> dict:
+    from app.siete_api import _fetch_all_clientes
+
+    data = await _fetch_all_clientes(max_age=DIAGNOSTICS_PROBE_SECONDS, allow_stale=False)
+    by_status: dict[str, int] = {}
+    active_with_team = 0
+    active_missing: list[dict] = []
+    for c in data:
+        st = c.get("status") or "None"
+        by_status[st] = by_status.get(st, 0) + 1
+        if c.get("status") == "Active":
+            if c.get("team_id"):
+                active_with_team += 1
+            else:
+                active_missing.append({"siete_id": c["id"], "siete_name": c["cliente"]})
+    return {
+        "reachable": True,
+        "total": len(data),
+        "by_status": by_status,
+        "active_with_team_id": active_with_team,
+        "active_missing_team_id": active_missing,
+    }
+
+
+def _consolidated_today() -> dict:
+    from app.processing.client_index import load_index
+
+    today = today_peru_iso()
+    consolidated_dir = DOWNLOAD_DIR / "consolidated"
+    out: dict = {"date": today}
+    for kind, prefix in [("people", "people_consolidated"),
+                         ("email_activity", "email_activity_consolidated")]:
+        path = consolidated_dir / f"{prefix}_{today}.csv"
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            out[kind] = {"exists": False, "size_mb": None, "name": None, "rows": None}
+            continue
+        index = load_index(path)
+        out[kind] = {
+            "exists": True,
+            "size_mb": round(st.st_size / 1024 / 1024, 2),
+            "name": path.name,
+            "rows": index["rows"] if index else None,
+            "modified_at": datetime.fromtimestamp(st.st_mtime, timezone.utc).isoformat(),
+        }
+    return out
+
+
+async def _probe_consolidated() -> dict:
+    return await executors.run_io(_consolidated_today)
+
+
+def _stores() -> dict:
+    return {
+        "meetings_store": meetings_store.stats(),
+        "run_history": run_history.stats(),
+        "retention": retention.stats(),
+        "last_cron_run": load_last_cron_run(),
+    }
+
+
+async def _probe_stores() -> dict:
+    return await executors.run_io(_stores)
+
+
+async def _probe_reply_io() -> dict:
+    if not (REPLY_IO_EMAIL and REPLY_IO_PASSWORD):
+        raise ProbeSkipped("REPLY_IO_EMAIL / REPLY_IO_PASSWORD no configurados")
+    from app.scraper.reply_io import SessionBusy, check_session
+
+    headless = os.getenv("HEADLESS", "true").lower() != "false"
+    try:
+        result = await check_session(REPLY_IO_EMAIL, REPLY_IO_PASSWORD, headless=headless)
+    except SessionBusy as e:
+        raise ProbeSkipped(f"{e}; se reintenta más tarde") from None
+    if not result["logged_in"]:
+        raise RuntimeError(f"login no pasó de {result['url']}")
+    return result
+
+
+PROBES: dict[str, _Probe] = {
+    p.name: p for p in (
+        _Probe("siete_api", _probe_siete, DIAGNOSTICS_PROBE_SECONDS),
+        _Probe("consolidated_today", _probe_consolidated, DIAGNOSTICS_PROBE_SECONDS),
+        _Probe("stores", _probe_stores, DIAGNOSTICS_PROBE_SECONDS),
+        _Probe("reply_io", _probe_reply_io, DIAGNOSTICS_REPLY_PROBE_SECONDS, run_at_start=False),
+    )
+}
+# Probes caros (abren Chromium): `refresh(None)` / `?refresh=all` no los corre, sólo pedidos por nombre
+_EXPLICIT_ONLY = ("reply_io",)
+# Probes baratos: si nunca corrieron (ej. app sin lifespan), el snapshot los corre en el momento
+_ON_DEMAND = ("siete_api", "consolidated_today", "stores")
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+async def run_loop() -> None:
+    """Loop del lifespan: corre los probes vencidos, cada uno en su propia task."""
+    reply = f"cada {DIAGNOSTICS_REPLY_PROBE_SECONDS:.0f}s" if PROBES["reply_io"].enabled else "deshabilitado"
+    print(f"[health] Probes cada {DIAGNOSTICS_PROBE_SECONDS:.0f}s (Reply.io {reply})")
+    running: dict[str, asyncio.Task] = {}
+    try:
+        while True:
+            now = time.monotonic()
+            for name, probe in PROBES.items():
+                task = running.get(name)
+                if probe.enabled and (task is None or task.done()) and now >= probe.next_at:
+                    running[name] = asyncio.create_task(probe.run())
+            await asyncio.sleep(_TICK_SECONDS)
+    finally:
+        for task in running.values():
+            task.cancel()
+
+
+async def refresh(names: list[str] | None = None) -> None:
+    """Corre ya los probes pedidos y espera sus resultados.
+
+    Con `names` None corre todos menos `_EXPLICIT_ONLY`; los deshabilitados nunca corren.
+    """
+    if names is None:
+        names = [n for n in PROBES if n not in _EXPLICIT_ONLY]
+    selected = [PROBES[n] for n in names if n in PROBES and PROBES[n].enabled]
+    await asyncio.gather(*(p.run() for p in selected))
+
+
+async def snapshot() -> dict[str, dict]:
+    """Último resultado de cada probe."""
+    never_run = [n for n in _ON_DEMAND if PROBES[n].checked_at is None]
+    if never_run:
+        await refresh(never_run)
+    return {name: probe.snapshot() for name, probe in PROBES.items()}
+
+
+def _probe_ok() -> dict:
+    return {(name,): 1 if p.status == "ok" else 0 for name, p in PROBES.items() if p.checked_at}
+
+
+metrics.Gauge("health_probe_ok", "1 si el último resultado del probe fue OK", ("probe",), callback=_probe_ok)
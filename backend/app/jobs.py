@@ -0,0 +1,479 @@
+"""Jobs en background con seguimiento de estado.
+
+Un job envuelve una corrutina lanzada con `asyncio.create_task`: el endpoint
+devuelve el `job_id` al instante y el cliente sigue el progreso por
+`GET .../{job_id}` (snapshot) o por SSE (eventos a medida que llegan).
+
+Los jobs vivos (con sus eventos) están en memoria del proceso; se guardan los
+últimos `MAX_JOBS`. Además cada job queda registrado en una tabla SQLite
+(`DOWNLOAD_DIR / "jobs.sqlite"`) con su estado, resultado y error, para poder
+consultar el historial después de un restart. Los jobs que quedaron `running`
+de un proceso anterior se marcan `interrupted` en `init()`.
+
+`start_single_flight` garantiza un solo job vivo por `kind` (ej. "bulk"):
+si ya hay uno corriendo devuelve ese en vez de lanzar otro.
+
+Eventos: cada evento recibe un id monótono dentro del job. En memoria se
+guardan los últimos `JOB_EVENTS_BUFFER` (ring buffer) y todos se agregan a
+`DOWNLOAD_DIR / "job_events" / "{job_id}.jsonl"` (un handle abierto por job
+mientras corre, con buffer de línea: sin mkdir/open/close por evento en el
+event loop), así un cliente SSE que se
+reconecta con `Last-Event-ID` retoma donde quedó aunque el evento ya haya
+salido del buffer o el job ya no esté en memoria (ver `events_since`). Los logs
+se borran según la clase `job_events` de `app.retention`.
+
+Entrega a los streams SSE: cada conexión es un `Subscriber` con una cola
+acotada (`SUBSCRIBER_BUFFER`) a la que el job empuja cada evento al emitirlo;
+no hay polling por conexión. Un único timer (`_keepalive_loop`) empuja el
+keepalive a todas las conexiones. Si un cliente lento llena su cola, se vacía
+y queda marcado como atrasado: al leer de nuevo se pone al día desde el ring
+buffer / log en disco, así la memoria por conexión no crece y no se pierden
+eventos.
+"""
+import asyncio
+import json
+import sqlite3
+import traceback
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Iterator, TextIO
+
+from app import metrics
+from app.config import DOWNLOAD_DIR
+
+MAX_JOBS = 50
+JOB_EVENTS_BUFFER = 1000
+SUBSCRIBER_BUFFER = 256
+SSE_KEEPALIVE_SECONDS = 15.0
+
+_TERMINAL_EVENTS = ("done", "error")
+
+_DB_PATH = DOWNLOAD_DIR / "jobs.sqlite"
+_EVENTS_DIR = DOWNLOAD_DIR / "job_events"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "running"                  # running | done | error | cancelled | interrupted
+    created_at: str = field(default_factory=_now)
+    finished_at: str | None = None
+    params: dict = field(default_factory=dict)
+    result: dict = field(default_factory=dict)
+    error: str | None = None
+    events: deque = field(default_factory=lambda: deque(maxlen=JOB_EVENTS_BUFFER), repr=False)  # (id, msg)
+    last_event_id: int = 0
+    task: asyncio.Task | None = field(default=None, repr=False)
+    _subscribers: set = field(default_factory=set, repr=False)
+    _log: TextIO | None = field(default=None, repr=False)  # JSONL de eventos, abierto mientras corre
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def emit(self, msg: dict) -> None:
+        """Agrega un evento ({"type", "message", ...}) y despierta a los suscriptores.
+
+        Debe llamarse desde el event loop (no desde un worker thread).
+        """
+        self._append(msg)
+
+    def subscribe(self, since: int = 0) -> "Subscriber":
+        """Nueva suscripción a los eventos con id > `since` (usar con `async with`)."""
+        return Subscriber(self, since)
+
+    def events_since(self, since: int) -> list[tuple[int, dict]]:
+        """Eventos con id > `since`, del buffer o (si ya salieron de él) del log en disco."""
+        if since >= self.last_event_id:
+            return []
+        if self.events and self.events[0][0] <= since + 1:
+            return [(i, m) for i, m in self.events if i > since]
+        return read_event_log(self.id, since)
+
+    @property
+    def last_event(self) -> dict | None:
+        return self.events[-1][1] if self.events else None
+
+    def _append(self, msg: dict) -> None:
+        self.last_event_id += 1
+        self.events.append((self.last_event_id, msg))
+        _log_event(self, self.last_event_id, msg)
+        for sub in self._subscribers:
+            sub._offer((self.last_event_id, msg))
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "params": self.params,
+            "result": self.result,
+            "error": self.error,
+            "last_event_id": self.last_event_id,
+            "events": [{"id": i, **m} for i, m in self.events],
+        }
+
+    def _close_subscribers(self) -> None:
+        for sub in self._subscribers:
+            sub._offer(_CLOSED)
+
+
+KEEPALIVE = object()
+_CLOSED = object()
+
+_SUBSCRIBERS: set["Subscriber"] = set()
+_keepalive_task: asyncio.Task | None = None
+_dropped_events = 0
+
+
+class Subscriber:
+    """Una conexión SSE a un job. Iterar devuelve (id, msg) o `KEEPALIVE`.
+
+    La iteración termina cuando el job terminó y ya se entregaron todos sus eventos.
+    """
+
+    def __init__(self, job: Job, since: int):
+        self.job = job
+        self.last_id = since
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self._lagged = False
+
+    async def __aenter__(self) -> "Subscriber":
+        self.job._subscribers.add(self)
+        _SUBSCRIBERS.add(self)
+        _ensure_keepalive()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.job._subscribers.discard(self)
+        _SUBSCRIBERS.discard(self)
+
+    async def __aiter__(self):
+        # Lo emitido antes de suscribirse (o mientras la conexión estuvo caída)
+        for event in self._catch_up():
+            yield event
+        while not (self.job.finished and self.last_id >= self.job.last_event_id):
+            item = await self._queue.get()
+            if self._lagged:
+                self._lagged = False
+                for event in self._catch_up():
+                    yield event
+            if item is KEEPALIVE:
+                yield KEEPALIVE
+            elif item is _CLOSED:
+                for event in self._catch_up():
+                    yield event
+            elif item[0] > self.last_id:
+                self.last_id = item[0]
+                yield item
+
+    def _catch_up(self) -> list[tuple[int, dict]]:
+        events = self.job.events_since(self.last_id)
+        if events:
+            self.last_id = events[-1][0]
+        return events
+
+    def _offer(self, item) -> None:
+        """Encola sin bloquear; si la cola está llena la descarta y marca la suscripción atrasada."""
+        global _dropped_events
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            _dropped_events += self._queue.qsize()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._lagged = True
+            self._queue.put_nowait(item)
+
+
+def _ensure_keepalive() -> None:
+    global _keepalive_task
+    if _keepalive_task is None or _keepalive_task.done():
+        _keepalive_task = asyncio.create_task(_keepalive_loop())
+
+
+async def _keepalive_loop() -> None:
+    """Un solo timer para todas las conexiones; termina cuando no queda ninguna."""
+    while _SUBSCRIBERS:
+        await asyncio.sleep(SSE_KEEPALIVE_SECONDS)
+        for sub in list(_SUBSCRIBERS):
+            if sub._queue.empty():  # si hay eventos pendientes, no hace falta keepalive
+                sub._offer(KEEPALIVE)
+
+
+def subscriber_stats() -> dict:
+    return {
+        "subscribers": len(_SUBSCRIBERS),
+        "lagged": sum(1 for s in _SUBSCRIBERS if s._lagged),
+        "dropped_events": _dropped_events,
+    }
+
+
+def _running_by_kind() -> dict:
+    counts: dict[tuple, int] = {}
+    for job in _JOBS.values():
+        if not job.finished:
+            key = (job.kind.split(":", 1)[0],)  # "generate:{client}" → "generate"
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+metrics.Gauge("sse_subscribers", "Conexiones SSE abiertas a jobs", callback=lambda: len(_SUBSCRIBERS))
+metrics.Gauge("sse_dropped_events", "Eventos descartados de colas SSE llenas (acumulado)",
+              callback=lambda: _dropped_events)
+metrics.Gauge("jobs_running", "Jobs en curso por tipo", ("kind",), callback=_running_by_kind)
+
+_JOBS: dict[str, Job] = {}
+
+
+def init() -> None:
+    """Marca como `interrupted` los jobs que un proceso anterior dejó `running`."""
+    try:
+        with _db() as conn:
+            n = conn.execute(
+                "UPDATE jobs SET status = 'interrupted', finished_at = ? WHERE status = 'running'",
+                (_now(),),
+            ).rowcount
+        if n:
+            print(f"[jobs] {n} job(s) de un proceso anterior marcados como interrupted")
+    except sqlite3.Error as e:
+        print(f"[jobs] No se pudo inicializar {_DB_PATH}: {e}")
+
+
+def start(kind: str, fn: Callable[[Job], Awaitable[dict | None]], params: dict | None = None) -> Job:
+    """Lanza `fn(job)` en background y devuelve el job.
+
+    El dict que devuelve `fn` queda en `job.result`. Al terminar se emite un
+    evento "done" o "error" (salvo que `fn` ya haya emitido uno).
+    """
+    job = Job(id=uuid.uuid4().hex[:12], kind=kind, params=params or {})
+    _JOBS[job.id] = job
+    _prune()
+    _persist(job)
+    job.task = asyncio.create_task(_run(job, fn))
+    return job
+
+
+def start_single_flight(
+    kind: str,
+    fn: Callable[[Job], Awaitable[dict | None]],
+    params: dict | None = None,
+) -> tuple[Job, bool]:
+    """Como `start`, pero si ya hay un job `kind` corriendo devuelve ese.
+
+    Returns: (job, created) — `created=False` si se reutilizó el job en curso.
+    """
+    current = running(kind)
+    if current is not None:
+        return current, False
+    return start(kind, fn, params), True
+
+
+def running(kind: str) -> Job | None:
+    """Job vivo de ese tipo, si hay uno."""
+    return next((j for j in _JOBS.values() if j.kind == kind and not j.finished), None)
+
+
+def cancel(job_id: str) -> bool:
+    """Pide la cancelación de un job en curso. False si no existe o ya terminó."""
+    job = _JOBS.get(job_id)
+    if job is None or job.finished or job.task is None:
+        return False
+    job.task.cancel()
+    return True
+
+
+def get(job_id: str) -> Job | None:
+    return _JOBS.get(job_id)
+
+
+def load(job_id: str) -> Job | None:
+    """Como `get`, pero si el job ya no está en memoria lo reconstruye (terminado)
+    desde la tabla y su log de eventos, para poder reproducir su stream."""
+    job = _JOBS.get(job_id)
+    if job is not None:
+        return job
+    try:
+        with _db() as conn:
+            row = conn.execute(
+                "SELECT kind, status, created_at, finished_at, params, result, error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"[jobs] No se pudo leer el job {job_id}: {e}")
+        return None
+    if row is None:
+        return None
+    job = Job(
+        id=job_id, kind=row[0], status="interrupted" if row[1] == "running" else row[1],
+        created_at=row[2], finished_at=row[3], params=json.loads(row[4] or "{}"),
+        result=json.loads(row[5] or "{}"), error=row[6],
+    )
+    for event_id, msg in read_event_log(job_id):
+        job.events.append((event_id, msg))
+        job.last_event_id = event_id
+    return job
+
+
+def list_jobs(kind: str | None = None) -> list[Job]:
+    """Jobs conocidos, del más reciente al más viejo."""
+    jobs = [j for j in _JOBS.values() if kind is None or j.kind == kind]
+    return list(reversed(jobs))
+
+
+def history(kind: str | None = None, limit: int = 50) -> list[dict]:
+    """Historial persistido (incluye jobs de procesos anteriores), del más reciente al más viejo."""
+    query = "SELECT id, kind, status, created_at, finished_at, params, result, error, events FROM jobs"
+    args: tuple = ()
+    if kind:
+        query += " WHERE kind = ?"
+        args = (kind,)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    with _db() as conn:
+        rows = conn.execute(query, args + (limit,)).fetchall()
+    return [_history_entry(r) for r in rows]
+
+
+def get_persisted(job_id: str) -> dict | None:
+    """Un job del historial persistido por id (lookup por primary key), con el formato de `history`."""
+    with _db() as conn:
+        row = conn.execute(
+            "SELECT id, kind, status, created_at, finished_at, params, result, error, events FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+    return _history_entry(row) if row else None
+
+
+def _history_entry(r: tuple) -> dict:
+    return {
+        "job_id": r[0], "kind": r[1], "status": r[2], "created_at": r[3], "finished_at": r[4],
+        "params": json.loads(r[5] or "{}"), "result": json.loads(r[6] or "{}"),
+        "error": r[7], "events_count": r[8],
+    }
+
+
+async def _run(job: Job, fn: Callable[[Job], Awaitable[dict | None]]) -> None:
+    try:
+        job.result = await fn(job) or {}
+        job.status = "done"
+        if not _ended_with_terminal_event(job):
+            job._append({"type": "done", "message": f"{job.kind} terminado"})
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+        job.error = "cancelado"
+        job._append({"type": "error", "message": f"{job.kind} cancelado"})
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        job.status = "error"
+        job.error = f"{type(e).__name__}: {e}"
+        if not _ended_with_terminal_event(job):
+            job._append({"type": "error", "message": job.error})
+    finally:
+        job.finished_at = _now()
+        job._close_subscribers()
+        _close_event_log(job)
+        _persist(job)
+
+
+def _ended_with_terminal_event(job: Job) -> bool:
+    return bool(job.last_event) and job.last_event.get("type") in _TERMINAL_EVENTS
+
+
+def _prune() -> None:
+    """Descarta de memoria los jobs terminados más viejos por encima de MAX_JOBS."""
+    excess = len(_JOBS) - MAX_JOBS
+    for job_id in [j.id for j in _JOBS.values() if j.finished][:max(excess, 0)]:
+        del _JOBS[job_id]
+
+
+# ── Tabla persistente ─────────────────────────────────────────────────────────
+
+@contextmanager
+def _db() -> Iterator[sqlite3.Connection]:
+    conn = sqlite3.connect(_DB_PATH)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,"
+            " created_at TEXT NOT NULL, finished_at TEXT, params TEXT, result TEXT,"
+            " error TEXT, events INTEGER)"
+        )
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _persist(job: Job) -> None:
+    """Upsert del job en la tabla. Best-effort: un error de disco no rompe el job."""
+    try:
+        with _db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id, job.kind, job.status, job.created_at, job.finished_at,
+                    json.dumps(job.params, default=str), json.dumps(job.result, default=str),
+                    job.error, job.last_event_id,
+                ),
+            )
+    except sqlite3.Error as e:
+        print(f"[jobs] No se pudo persistir el job {job.id}: {e}")
+
+
+# ── Log de eventos en disco ───────────────────────────────────────────────────
+
+def _log_event(job: Job, event_id: int, msg: dict) -> None:
+    """Agrega el evento al JSONL del job. Best-effort: el SSE en vivo no depende de esto.
+
+    El archivo se abre en el primer evento y queda abierto hasta que termina el
+    job (`_close_event_log`); con buffer de línea cada evento llega al disco al
+    escribirse, así `read_event_log` lo ve enseguida.
+    """
+    try:
+        if job._log is None:
+            _EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+            job._log = open(_EVENTS_DIR / f"{job.id}.jsonl", "a", encoding="utf-8", buffering=1)
+        job._log.write(json.dumps({"id": event_id, "msg": msg}, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        print(f"[jobs] No se pudo escribir el evento {event_id} del job {job.id}: {e}")
+    if job.finished and job.task is not None and job.task.done():
+        _close_event_log(job)  # evento emitido después de `_run` (raro): no dejar el handle abierto
+
+
+def _close_event_log(job: Job) -> None:
+    if job._log is not None:
+        try:
+            job._log.close()
+        except OSError as e:
+            print(f"[jobs] No se pudo cerrar el log de eventos del job {job.id}: {e}")
+        job._log = None
+
+
+def read_event_log(job_id: str, since: int = 0) -> list[tuple[int, dict]]:
+    """Eventos con id > `since` del log en disco de un job (vacío si no hay log)."""
+    if not job_id.isalnum():
+        return []
+    path = _EVENTS_DIR / f"{job_id}.jsonl"
+    if not path.exists():
+        return []
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # línea a medio escribir
+            if entry["id"] > since:
+                out.append((entry["id"], entry["msg"]))
+    return out
@@ -9,29 +9,37 @@ import asyncio
 import io
 import json
 import os
+import re
+import time
 import traceback
+import uuid
 import zipfile
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sse_starlette.sse import EventSourceResponse
 
-from app.config import REPLY_IO_EMAIL, REPLY_IO_PASSWORD, DOWNLOAD_DIR, PUBLIC_BASE_URL, TFLX_PATH
-from app import discarded_clients
-from app.cron_report import CronRunReport, load_last_cron_run
-from app.processing.consolidator import consolidate
-from app.processing.tableau_exporter import run_tableau_export
+from app.config import (
+    CONSOLIDATED_COMPRESSION, DOWNLOAD_DIR, PUBLIC_BASE_URL, REPLY_IO_EMAIL, REPLY_IO_PASSWORD, TFLX_PATH,
+    ensure_download_dir,
+)
+from app import (
+    discarded_clients, executors, jobs, meetings_store, metrics, run_history, siete_api,
+)
+from app.cron_report import CronRunReport
+from app.processing import compression
+from app.processing.tableau_exporter import run_tableau_export, watch_flow_run
+from app.processing import send_slack
 from app.processing.send_slack import (
+    flush_alerts,
     send_consolidated_slack,
     send_reconciliation_alert,
     send_siete_down_alert,
 )
-from app.scraper.reply_io import download_all_reports, download_reports
 from app.reconciliation import (
     build_mapping_payload,
     build_pending_payload,
@@ -41,57 +49,47 @@ from app.siete_api import (
     _fetch_all_clientes,
     fetch_active_clients,
     fetch_active_missing_team_id,
-    fetch_all_meetings,
     patch_team_id,
+    patch_team_ids,
 )
 from app.utils.slug import slug as _slug
-from app.utils.dates import PERU_UTC_OFFSET, today_peru_iso
+from app.utils.dates import PERU_UTC_OFFSET, today_peru, today_peru_iso
 
-MAX_FILE_AGE_HOURS = 48
+CLEANUP_INTERVAL_SECONDS = 3600
 
 
 # ── Cleanup ──────────────────────────────────────────────────────────────────
 
-def _cleanup_old_files(root: Path, max_age_hours: int = MAX_FILE_AGE_HOURS) -> int:
-    """Delete files under `root` older than `max_age_hours`. Returns count deleted."""
-    if not root.exists():
-        return 0
-    cutoff = datetime.now().timestamp() - max_age_hours * 3600
-    deleted = 0
-    for path in root.rglob("*"):
-        if path.suffix == ".tflx":
-            continue
-        if path.is_file() and path.stat().st_mtime < cutoff:
-            try:
-                path.unlink()
-                deleted += 1
-            except OSError as e:
-                print(f"[cleanup] No se pudo borrar {path}: {e}")
-    return deleted
-
-
 async def _cleanup_cron():
-    """Delete files older than MAX_FILE_AGE_HOURS, checked every hour."""
+    """Aplica la retención de DOWNLOAD_DIR (`app.retention.sweep`) cada hora."""
+    from app import retention
+
     while True:
         try:
-            deleted = _cleanup_old_files(DOWNLOAD_DIR)
-            if deleted:
-                print(f"[cleanup] Borrados {deleted} archivos > {MAX_FILE_AGE_HOURS}h")
+            result = await executors.run_io(retention.sweep)
+            if result["expired"] or result["evicted"]:
+                print(f"[cleanup] Borrados {result['expired']} vencidos + {result['evicted']} por presupuesto"
+                      f" ({result['freed_bytes'] / 1024 / 1024:.1f} MB liberados)")
         except Exception as e:
             print(f"[cleanup] Error: {e}")
-        await asyncio.sleep(3600)
+        await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
 
 
 # ── Bulk pipeline ─────────────────────────────────────────────────────────────
 
-async def _run_bulk_pipeline(emit, clients: list[dict], pending_count: int = 0):
+async def _run_bulk_pipeline(emit, clients: list[dict], pending_count: int = 0, trigger: str = "manual"):
     """
     Download + consolidate reports for the given clients.
     `clients` is a list of {"client_id", "client_name", "team_id"}.
     Uses a single browser session (one login) for all clients.
     `pending_count` se pasa al mensaje de Slack para mostrar el aviso de
     reconciliación pendiente cuando hay clientes a resolver.
+    La corrida (y el resultado por cliente) queda en `run_history`, con `trigger`
+    ("manual", "cron") para distinguir el origen.
     """
+    from app.scraper.reply_io import download_all_reports
+
+    started_at = datetime.now(timezone.utc)
     headless = os.getenv("HEADLESS", "true").lower() != "false"
     per_client_files: list[dict] = []
     failures: list[str] = []
@@ -110,42 +108,85 @@ async def _run_bulk_pipeline(emit, clients: list[dict], pending_count: int = 0):
     def on_progress(msg):
         emit({"type": "progress", "message": msg})
 
-    results = await download_all_reports(
-        email=REPLY_IO_EMAIL,
-        password=REPLY_IO_PASSWORD,
-        clients=scraper_clients,
-        on_progress=on_progress,
-        headless=headless,
-    )
-
-    run_summary_clients = []
-    for c in clients:
-        cid = c["client_id"]
-        display_name = c["client_name"]
-        result = results.get(cid, {"error": "sin resultado"})
-        if "error" in result:
-            failures.append(f"{display_name}: {result['error']}")
-            run_summary_clients.append({"name": display_name, "status": "failed", "error": result["error"]})
-        else:
-            per_client_files.append({
-                "client_id": cid,
-                "client_name": display_name,
-                "people_csv": result.get("personas"),
-                "email_csv": result.get("correos"),
-            })
-            run_summary_clients.append({"name": display_name, "status": "ok", "error": None})
-
-    # Persist run summary so /api/last-run can show all clients with their status
-    summary_path = DOWNLOAD_DIR / "last_run_summary.json"
-    import json as _json
-    summary_path.write_text(_json.dumps({
+    # Fila `running` antes del scrape: una corrida que muere scrapeando también queda en el historial
+    run_summary = {
+        "run_id": uuid.uuid4().hex[:12],
+        "trigger": trigger,
         "date": datetime.now(PERU_UTC_OFFSET).strftime("%Y-%m-%d"),
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "started_at": started_at.isoformat(),
+        "timestamp": started_at.isoformat(),
+        "status": "running",
         "total": len(clients),
-        "ok_count": len(per_client_files),
-        "failed_count": len(failures),
-        "clients": run_summary_clients,
-    }))
+        "ok_count": 0,
+        "failed_count": 0,
+        "clients": [],
+    }
+    await executors.run_io(run_history.save_run, run_summary)
+    try:
+        try:
+            results = await download_all_reports(
+                email=REPLY_IO_EMAIL,
+                password=REPLY_IO_PASSWORD,
+                clients=scraper_clients,
+                on_progress=on_progress,
+                headless=headless,
+            )
+        finally:
+            # Alertas de workspaces inaccesibles encoladas durante el scrape → un digest
+            await flush_alerts()
+
+        run_summary_clients = []
+        for c in clients:
+            cid = c["client_id"]
+            display_name = c["client_name"]
+            result = results.get(cid, {"error": "sin resultado"})
+            if "error" in result:
+                failures.append(f"{display_name}: {result['error']}")
+                run_summary_clients.append({"client_id": cid, "name": display_name, "status": "failed",
+                                            "error": result["error"], "scrape_seconds": result.get("seconds"),
+                                            "attempts": result.get("attempts")})
+            else:
+                per_client_files.append({
+                    "client_id": cid,
+                    "client_name": display_name,
+                    "people_csv": result.get("personas"),
+                    "email_csv": result.get("correos"),
+                })
+                run_summary_clients.append({"client_id": cid, "name": display_name, "status": "ok", "error": None,
+                                            "scrape_seconds": result.get("seconds"),
+                                            "attempts": result.get("attempts")})
+
+        # Persist run summary so /api/last-run can show all clients with their status
+        run_summary.update({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "ok_count": len(per_client_files),
+            "failed_count": len(failures),
+            "clients": run_summary_clients,
+        })
+        await executors.run_io(run_history.save_run, run_summary)
+        consolidated = await _consolidate_and_deliver(
+            emit, clients, per_client_files, failures, run_summary, pending_count,
+        )
+    except asyncio.CancelledError:
+        run_summary["status"] = "cancelled"
+        run_summary["error"] = "cancelado"
+        raise
+    except Exception as e:
+        run_summary["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        await _finish_run_summary(run_summary, started_at)
+    return per_client_files, failures, consolidated
+
+
+async def _consolidate_and_deliver(
+    emit, clients: list[dict], per_client_files: list[dict], failures: list[str],
+    run_summary: dict, pending_count: int,
+) -> dict:
+    """Resto de `_run_bulk_pipeline` tras el scrape: consolidado, delta, xlsx y Slack."""
+    from app.processing.consolidator import consolidate, record_metrics as record_consolidation_metrics
+    from app.processing.delta import compute_daily_deltas
+    from app import retention
 
     # Emit full per-client outcome summary so operators can see all clients at a glance
     ok_names = [f["client_name"] for f in per_client_files]
@@ -161,37 +202,115 @@ async def _run_bulk_pipeline(emit, clients: list[dict], pending_count: int = 0):
     consolidated = {}
     if per_client_files:
         emit({"type": "progress", "message": "Consolidando CSVs..."})
-        consolidated = consolidate(
+        t0 = time.perf_counter()
+        consolidated = await executors.run_cpu(
+            consolidate,
             per_client_files=per_client_files,
             output_dir=DOWNLOAD_DIR / "consolidated",
+            compression=CONSOLIDATED_COMPRESSION,
         )
+        record_consolidation_metrics(consolidated, time.perf_counter() - t0)
         for path in consolidated.values():
             emit({"type": "file", "name": path.name, "size": path.stat().st_size,
                   "path": f"/api/consolidated/{path.name}"})
 
+        # Delta contra el consolidado de ayer (best-effort, no aborta el pipeline)
+        emit({"type": "progress", "message": "Calculando delta contra ayer..."})
         try:
-            from app.processing.tableau_exporter import generate_reuniones_xlsx
-            meetings = await fetch_all_meetings()
-            xlsx_bytes = generate_reuniones_xlsx(meetings)
-            date_str = datetime.now(PERU_UTC_OFFSET).strftime("%Y-%m-%d")
-            xlsx_path = DOWNLOAD_DIR / "consolidated" / f"reuniones_{date_str}.xlsx"
-            xlsx_path.write_bytes(xlsx_bytes)
+            deltas = await executors.run_cpu(compute_daily_deltas, consolidated, today_peru())
+        except Exception as e:
+            traceback.print_exc()
+            deltas = {"error": str(e)}
+        run_summary["delta"] = _delta_summary(deltas)
+        _attach_client_sizes(run_summary, consolidated)
+        await executors.run_io(run_history.save_run, run_summary)
+        for kind, d in deltas.items():
+            if isinstance(d, dict) and "path" in d:
+                emit({"type": "file", "name": d["path"].name, "size": d["path"].stat().st_size,
+                      "path": f"/api/consolidated/{d['path'].name}"})
+                emit({"type": "progress",
+                      "message": f"Delta {kind}: +{d['added']} / -{d['removed']} / ~{d['changed']}"})
+            else:
+                emit({"type": "progress", "message": f"Delta {kind}: {d}"})
+
+        try:
+            xlsx_path = await _save_reuniones_xlsx(datetime.now(PERU_UTC_OFFSET).strftime("%Y-%m-%d"))
             consolidated["reuniones"] = xlsx_path
-            emit({"type": "progress", "message": f"Xlsx de reuniones guardado ({len(xlsx_bytes):,} bytes)"})
+            emit({"type": "progress", "message": f"Xlsx de reuniones guardado ({xlsx_path.stat().st_size:,} bytes)"})
         except Exception as e:
             traceback.print_exc()
             emit({"type": "progress", "message": f"[warn] No se pudo generar xlsx de reuniones: {e}"})
 
+        # Al manifest de retención: CSVs por cliente y todo lo del día en consolidated/
+        produced = [f[k] for f in per_client_files for k in ("people_csv", "email_csv")]
+        produced += (DOWNLOAD_DIR / "consolidated").glob(f"*_{today_peru().isoformat()}*")
+        await executors.run_io(retention.register, produced)
+
         emit({"type": "progress", "message": "Enviando a Slack..."})
         try:
-            send_consolidated_slack(consolidated, pending_count=pending_count)
+            await send_consolidated_slack(consolidated, pending_count=pending_count)
             emit({"type": "progress", "message": "Slack enviado"})
         except Exception as e:
             traceback.print_exc()
             emit({"type": "progress", "message": f"ERROR Slack: {e}"})
             raise
 
-    return per_client_files, failures, consolidated
+    return consolidated
+
+
+def _attach_client_sizes(summary: dict, consolidated: dict[str, Path]) -> None:
+    """Agrega filas y bytes por cliente al summary, desde los índices de los consolidados."""
+    from app.processing.client_index import load_index
+
+    by_id = {c["client_id"]: c for c in summary["clients"]}
+    for kind, prefix in (("people", "people"), ("email_activity", "email")):
+        index = load_index(consolidated[kind]) if kind in consolidated else None
+        for entry in (index or {}).get("clients", []):
+            if entry["client_id"] in by_id:
+                by_id[entry["client_id"]][f"{prefix}_rows"] = entry["rows"]
+                by_id[entry["client_id"]][f"{prefix}_bytes"] = entry["length"]
+
+
+async def _finish_run_summary(summary: dict, started_at: datetime) -> None:
+    finished_at = datetime.now(timezone.utc)
+    summary["finished_at"] = finished_at.isoformat()
+    summary["duration_s"] = round((finished_at - started_at).total_seconds(), 1)
+    if summary["status"] == "cancelled":  # ya marcada por `_run_bulk_pipeline`
+        pass
+    elif summary.get("error"):
+        summary["status"] = "error"
+    elif not summary["failed_count"]:
+        summary["status"] = "ok"
+    else:
+        summary["status"] = "failed" if not summary["ok_count"] else "partial"
+    await executors.run_io(run_history.save_run, summary)
+
+
+def _delta_summary(deltas: dict) -> dict:
+    """Versión serializable de `compute_daily_deltas` para el run summary."""
+    out = {}
+    for kind, d in deltas.items():
+        if isinstance(d, dict) and "path" in d:
+            out[kind] = {**d, "path": d["path"].name}
+        else:
+            out[kind] = d
+    return out
+
+
+async def _save_reuniones_xlsx(date_str: str) -> Path:
+    """Sincroniza las reuniones de Siete (store local) y guarda `consolidated/reuniones_{date}.xlsx`.
+
+    `generate_reuniones_xlsx` cachea por fingerprint del payload, así que si las
+    reuniones no cambiaron en la corrida (bulk → Tableau → send-today) el XLSX
+    se arma una sola vez.
+    """
+    from app.processing.tableau_exporter import generate_reuniones_xlsx_async
+    meetings = await meetings_store.get_meetings()
+    xlsx_bytes = await generate_reuniones_xlsx_async(meetings)
+    xlsx_path = DOWNLOAD_DIR / "consolidated" / f"reuniones_{date_str}.xlsx"
+    xlsx_path.parent.mkdir(parents=True, exist_ok=True)
+    await executors.run_io(xlsx_path.write_bytes, xlsx_bytes)
+    return xlsx_path
 
 
 async def _daily_bulk_cron():
@@ -208,8 +327,38 @@ async def _daily_bulk_cron():
         await _run_daily_cron_once()
 
 
-async def _run_daily_cron_once() -> CronRunReport:
-    """Ejecuta una vez el bulk-cron y guarda el reporte. Reusable para tests/diagnóstico."""
+async def _run_daily_cron_once() -> CronRunReport | None:
+    """Ejecuta una vez el bulk-cron y guarda el reporte. Reusable para tests/diagnóstico.
+
+    Corre como job "bulk" (instancia única, ver `jobs.start_single_flight`): un
+    /api/generate-bulk abierto durante el cron se engancha a este job. Si al
+    dispararse ya había un bulk manual en curso, el cron no lanza otro y
+    devuelve None.
+    """
+    reports: list[CronRunReport] = []
+
+    async def run(job: jobs.Job) -> dict:
+        report = await _daily_cron_body(job)
+        reports.append(report)
+        if report.error:
+            raise RuntimeError(report.error)
+        return {"clients_total": report.clients_total, "clients_ok": report.clients_processed,
+                "failures": report.failures}
+
+    job, created = jobs.start_single_flight("bulk", run, params={"trigger": "cron"})
+    if not created:
+        print(f"[bulk-cron] Ya hay un bulk en curso (job {job.id}, {job.params}); el cron no lanza otro")
+        return None
+    try:
+        await job.task
+    except asyncio.CancelledError:
+        if not job.finished:
+            raise
+        print(f"[bulk-cron] Job {job.id} cancelado")
+    return reports[0] if reports else None
+
+
+async def _daily_cron_body(job: jobs.Job) -> CronRunReport:
     report = CronRunReport.start()
 
     # Paso 1: obtener clientes activos. Si Siete API está caída, alertar y abortar.
@@ -219,7 +368,7 @@ async def _run_daily_cron_once() -> CronRunReport:
         traceback.print_exc()
         err = f"{type(e).__name__}: {e}"
         print(f"[bulk-cron] Error fatal al consultar Siete API: {err}")
-        send_siete_down_alert(err, endpoint="/core/clientes/")
+        await send_siete_down_alert(err, endpoint="/core/clientes/")
         report.finish(error="siete_api_down")
         report.error = err
         report.save()
@@ -250,10 +399,11 @@ async def _run_daily_cron_once() -> CronRunReport:
     def emit(msg):
         if msg.get("type") == "progress":
             print(f"[bulk-cron] {msg['message']}")
+        job.emit(msg)
 
     try:
         per_client_files, failures, consolidated = await _run_bulk_pipeline(
-            emit, clients, pending_count=len(pending),
+            emit, clients, pending_count=len(pending), trigger="cron",
         )
     except Exception as e:
         traceback.print_exc()
@@ -275,18 +425,16 @@ async def _run_daily_cron_once() -> CronRunReport:
 
     # Paso 3: alerta de reconciliación si hay pendientes
     if pending:
-        send_reconciliation_alert(pending_count=len(pending), base_url=PUBLIC_BASE_URL)
+        await send_reconciliation_alert(pending_count=len(pending), base_url=PUBLIC_BASE_URL)
 
-    # Paso 4: export a Tableau Cloud (no aborta el pipeline si falla)
+    # Paso 4: export a Tableau Cloud en background (no aborta ni demora el cron)
     if consolidated:
-        try:
-            print("[bulk-cron] Iniciando export a Tableau...")
-            meetings = await fetch_all_meetings()
-            tableau_result = await run_tableau_export(consolidated, meetings)
-            for step, status in tableau_result.items():
-                print(f"[tableau] {step}: {status}")
-        except Exception as e:
-            print(f"[tableau] ERROR en export: {e}")
+        print("[bulk-cron] Iniciando export a Tableau...")
+        tableau_job, created = _start_tableau_export_job(consolidated)
+        if created:
+            print(f"[bulk-cron] Export a Tableau corriendo como job {tableau_job.id}")
+        else:
+            print(f"[bulk-cron] Ya había un export a Tableau en curso (job {tableau_job.id}); no se lanza otro")
 
     report.finish()
     report.save()
@@ -295,15 +443,38 @@ async def _run_daily_cron_once() -> CronRunReport:
 
 # ── Lifespan ──────────────────────────────────────────────────────────────────
 
+async def _open_http_clients():
+    """Abre los clientes HTTP compartidos apenas arranca la app, sin demorar el arranque:
+    cada uno arma su contexto SSL (~150 ms) en el pool de threads. Un request que
+    llegue antes espera ese mismo armado (`_get_client`)."""
+    await asyncio.gather(siete_api.open_client(), send_slack.open_client())
+
+
+async def _health_probe_loop():
+    """Importa `app.health_probes` recién acá (no en el import de la app) y corre su loop."""
+    from app import health_probes
+
+    await health_probes.run_loop()
+
+
 @asynccontextmanager
 async def lifespan(app):
+    ensure_download_dir()
+    jobs.init()
+    await executors.run_io(run_history.init)
     tasks = [
+        asyncio.create_task(_open_http_clients()),
         asyncio.create_task(_cleanup_cron()),
         asyncio.create_task(_daily_bulk_cron()),
+        asyncio.create_task(_health_probe_loop()),
     ]
     yield
     for t in tasks:
         t.cancel()
+    await send_slack.flush_alerts()
+    await siete_api.close_client()
+    await send_slack.close_client()
+    executors.shutdown()
 
 
 # ── App ───────────────────────────────────────────────────────────────────────
@@ -330,62 +501,57 @@ async def list_clients():
 
 
 @app.get("/api/generate/{client_id}")
-async def generate_report(client_id: str):
-    """SSE: download reports for a single client (by slug)."""
-    queue: asyncio.Queue = asyncio.Queue()
+async def generate_report(client_id: str, request: Request):
+    """SSE: download reports for a single client (by slug).
 
-    async def run_pipeline():
-        try:
-            clients = await fetch_active_clients()
-            client = next((c for c in clients if c["client_id"] == client_id), None)
-            if not client:
-                await queue.put({"type": "error",
-                                 "message": f"Cliente '{client_id}' no encontrado o sin team_id en Siete"})
-                return
-
-            team_id = client["team_id"]
-            display_name = client["client_name"]
-
-            def on_progress(msg):
-                queue.put_nowait({"type": "progress", "message": msg})
-
-            on_progress("Conectando a Reply.io...")
-            download_dir = DOWNLOAD_DIR / client_id
-            headless = os.getenv("HEADLESS", "true").lower() != "false"
-            reports = await download_reports(
-                email=REPLY_IO_EMAIL, password=REPLY_IO_PASSWORD, team_id=team_id,
-                download_dir=download_dir, on_progress=on_progress, headless=headless,
-            )
+    Corre como job "generate:{client_id}" de instancia única, igual que el bulk:
+    varias pestañas sobre el mismo cliente comparten el scrape, y un cliente que
+    se reconecta con `Last-Event-ID` retoma el stream donde lo dejó.
+    """
+    resumed = _resume_from(request, kind=f"generate:{client_id}")
+    if resumed:
+        return _event_source(_job_event_stream(*resumed))
+    job, _ = jobs.start_single_flight(
+        f"generate:{client_id}", lambda job: _generate_report_job(job, client_id),
+        params={"client_id": client_id},
+    )
+    return _event_source(_job_event_stream(job))
 
-            people_size = reports["personas"].stat().st_size
-            on_progress(f"people.csv descargado ({people_size:,} bytes)")
-            queue.put_nowait({"type": "file", "name": "people.csv", "size": people_size,
-                              "path": f"/api/files/{client_id}/people.csv"})
 
-            email_size = reports["correos"].stat().st_size
-            on_progress(f"email_activity.csv descargado ({email_size:,} bytes)")
-            queue.put_nowait({"type": "file", "name": "email_activity.csv", "size": email_size,
-                              "path": f"/api/files/{client_id}/email_activity.csv"})
+async def _generate_report_job(job: jobs.Job, client_id: str) -> dict:
+    from app.scraper.reply_io import download_reports
 
-            await queue.put({"type": "done", "message": f"Listo! Reportes descargados para {display_name}"})
+    clients = await fetch_active_clients()
+    client = next((c for c in clients if c["client_id"] == client_id), None)
+    if not client:
+        raise RuntimeError(f"Cliente '{client_id}' no encontrado o sin team_id en Siete")
 
-        except Exception as e:
-            traceback.print_exc()
-            await queue.put({"type": "error", "message": str(e)})
+    team_id = client["team_id"]
+    display_name = client["client_name"]
 
-    async def event_generator():
-        task = asyncio.create_task(run_pipeline())
-        while True:
-            try:
-                msg = await asyncio.wait_for(queue.get(), timeout=1.0)
-                yield {"event": "message", "data": json.dumps(msg)}
-                if msg["type"] in ("done", "error"):
-                    break
-            except asyncio.TimeoutError:
-                yield {"comment": "keepalive"}
-        await task
+    def on_progress(msg):
+        job.emit({"type": "progress", "message": msg})
+
+    on_progress("Conectando a Reply.io...")
+    download_dir = DOWNLOAD_DIR / client_id
+    headless = os.getenv("HEADLESS", "true").lower() != "false"
+    reports = await download_reports(
+        email=REPLY_IO_EMAIL, password=REPLY_IO_PASSWORD, team_id=team_id,
+        download_dir=download_dir, on_progress=on_progress, headless=headless,
+    )
+
+    people_size = reports["personas"].stat().st_size
+    on_progress(f"people.csv descargado ({people_size:,} bytes)")
+    job.emit({"type": "file", "name": "people.csv", "size": people_size,
+              "path": f"/api/files/{client_id}/people.csv"})
 
-    return EventSourceResponse(event_generator())
+    email_size = reports["correos"].stat().st_size
+    on_progress(f"email_activity.csv descargado ({email_size:,} bytes)")
+    job.emit({"type": "file", "name": "email_activity.csv", "size": email_size,
+              "path": f"/api/files/{client_id}/email_activity.csv"})
+
+    job.emit({"type": "done", "message": f"Listo! Reportes descargados para {display_name}"})
+    return {"client_id": client_id, "people_bytes": people_size, "email_activity_bytes": email_size}
 
 
 @app.get("/api/files/{client_id}/{filename}")
@@ -399,88 +565,235 @@ def download_file(client_id: str, filename: str):
     return FileResponse(path, filename=filename, media_type="text/csv")
 
 
+@app.get("/api/consolidated/bundle/{date_str}")
+def download_consolidated_bundle(date_str: str):
+    """ZIP con todos los consolidados de una fecha (CSVs, deltas y xlsx), armado en streaming."""
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    consolidated_dir = DOWNLOAD_DIR / "consolidated"
+    paths = sorted(
+        p for p in consolidated_dir.glob(f"*_{date_str}.*")
+        if p.suffix in (".csv", ".xlsx") and p.is_file()
+    )
+    if not paths:
+        raise HTTPException(status_code=404, detail="File not found")
+    filename = f"consolidados_{date_str}.zip"
+    return StreamingResponse(
+        _stream_zip(paths),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+
 @app.get("/api/consolidated/{filename}")
-def download_consolidated(filename: str):
+def download_consolidated(filename: str, request: Request):
+    """Descarga un consolidado. Soporta `Range` (FileResponse) y, si el cliente
+    acepta gzip/zstd, sirve la copia precomprimida con `Content-Encoding`.
+
+    Con `Range` siempre se sirve el CSV sin comprimir: los offsets del índice
+    por cliente (`client_index`) son sobre esos bytes, no sobre el .gz/.zst."""
     if "/" in filename or ".." in filename or not (filename.endswith(".csv") or filename.endswith(".xlsx")):
         raise HTTPException(status_code=400, detail="Invalid filename")
     path = DOWNLOAD_DIR / "consolidated" / filename
     if not path.exists():
         raise HTTPException(status_code=404, detail="File not found")
     media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" if filename.endswith(".xlsx") else "text/csv"
+    headers = {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}
+    served = path
+    encoding = None
+    if "range" not in request.headers:
+        encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""), path)
+    if encoding:
+        served = compression.variant_for(path, encoding)
+        headers["Content-Encoding"] = encoding
     return FileResponse(
-        path,
+        served,
         filename=filename,
         media_type=media_type,
-        headers={"Cache-Control": "no-store"},
+        headers=headers,
     )
 
 
+def _negotiate_encoding(accept_encoding: str, path: Path) -> str | None:
+    """Mejor encoding aceptado por el cliente con variante precomprimida disponible.
+
+    Respeta q-values (`gzip;q=0` rechaza gzip). Preferencia a igual q: zstd > gzip.
+    Los xlsx ya son ZIP: no se recomprimen.
+    """
+    if path.suffix != ".csv" or not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ("zstd", "gzip"):
+        q = accepted.get(encoding, wildcard)
+        if q > best_q and compression.variant_for(path, encoding):
+            best, best_q = encoding, q
+    return best
+
+
+class _ZipStream(io.RawIOBase):
+    """Sumidero no-seekable para `zipfile`: acumula lo escrito hasta que se drena."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _stream_zip(paths: list[Path], chunk_size: int = 1024 * 1024):
+    """Genera el ZIP de `paths` de a pedazos, sin armarlo entero en memoria ni en disco."""
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for path in paths:
+            # xlsx ya viene comprimido: se guarda tal cual
+            method = zipfile.ZIP_STORED if path.suffix == ".xlsx" else zipfile.ZIP_DEFLATED
+            zinfo = zipfile.ZipInfo.from_file(path, arcname=path.name)
+            zinfo.compress_type = method
+            with open(path, "rb") as src, zf.open(zinfo, "w", force_zip64=True) as dest:
+                while block := src.read(chunk_size):
+                    dest.write(block)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    if data := sink.drain():
+        yield data
+
+
 @app.get("/api/generate-bulk")
-async def generate_bulk(limit: int = 0):
-    """SSE: download active clients (all if limit=0, else first N) and consolidate."""
-    queue: asyncio.Queue = asyncio.Queue()
+async def generate_bulk(request: Request, limit: int = 0):
+    """SSE: download active clients (all if limit=0, else first N) and consolidate.
 
-    async def run_pipeline():
-        try:
-            clients = await fetch_active_clients()
-            if limit > 0:
-                clients = clients[:limit]
-            if not clients:
-                await queue.put({"type": "error", "message": "No hay clientes activos en Siete API"})
-                return
+    Corre como job "bulk" de instancia única: si ya hay un bulk en curso (otro
+    operador, una recarga de la página o el cron diario) la conexión se engancha
+    a ese job y recibe sus eventos desde el principio, en vez de lanzar otro scrape.
+    Con `Last-Event-ID` (reconexión) retoma el job original aunque ya haya terminado.
+    """
+    resumed = _resume_from(request, kind="bulk")
+    if resumed:
+        return _event_source(_job_event_stream(*resumed))
+    job, created = jobs.start_single_flight(
+        "bulk", lambda job: _generate_bulk_job(job, limit), params={"trigger": "manual", "limit": limit},
+    )
+    preface = []
+    if not created:
+        preface.append({"type": "progress", "job_id": job.id,
+                        "message": f"Ya hay un bulk en curso (job {job.id}, iniciado {job.created_at}); "
+                                   f"mostrando su progreso"})
+    return _event_source(_job_event_stream(job, preface=preface))
 
-            await queue.put({"type": "progress",
-                             "message": f"Procesando {len(clients)} clientes activos (Siete API)"})
 
-            # Pendientes para el aviso en el mensaje de Slack (filtrando descartados localmente)
-            try:
-                pending = await fetch_active_missing_team_id()
-                discarded = discarded_clients.load()
-                pending_count = sum(1 for p in pending if p["siete_id"] not in discarded)
-            except Exception as e:
-                print(f"[generate-bulk] Warning pendientes: {e}")
-                pending_count = 0
+async def _generate_bulk_job(job: jobs.Job, limit: int) -> dict:
+    clients = await fetch_active_clients()
+    if limit > 0:
+        clients = clients[:limit]
+    if not clients:
+        raise RuntimeError("No hay clientes activos en Siete API")
 
-            def emit(msg):
-                queue.put_nowait(msg)
+    job.emit({"type": "progress", "message": f"Procesando {len(clients)} clientes activos (Siete API)"})
 
-            per_client_files, failures, consolidated = await _run_bulk_pipeline(
-                emit, clients, pending_count=pending_count,
-            )
+    # Pendientes para el aviso en el mensaje de Slack (filtrando descartados localmente)
+    try:
+        pending = await fetch_active_missing_team_id()
+        discarded = discarded_clients.load()
+        pending_count = sum(1 for p in pending if p["siete_id"] not in discarded)
+    except Exception as e:
+        print(f"[generate-bulk] Warning pendientes: {e}")
+        pending_count = 0
 
-            if not per_client_files:
-                await queue.put({"type": "error",
-                                 "message": f"Ningún cliente OK. Errores: {failures}"})
-                return
+    per_client_files, failures, consolidated = await _run_bulk_pipeline(
+        job.emit, clients, pending_count=pending_count,
+    )
 
-            done_msg = f"Listo. {len(per_client_files)}/{len(clients)} clientes consolidados."
-            await queue.put({"type": "done", "message": done_msg})
+    if not per_client_files:
+        raise RuntimeError(f"Ningún cliente OK. Errores: {failures}")
 
-        except Exception as e:
-            traceback.print_exc()
-            await queue.put({"type": "error", "message": str(e)})
+    job.emit({"type": "done", "message": f"Listo. {len(per_client_files)}/{len(clients)} clientes consolidados."})
+    return {
+        "clients_total": len(clients),
+        "clients_ok": len(per_client_files),
+        "failures": failures,
+        "consolidated": {k: p.name for k, p in consolidated.items()},
+    }
 
-    async def event_generator():
-        task = asyncio.create_task(run_pipeline())
-        while True:
-            try:
-                msg = await asyncio.wait_for(queue.get(), timeout=1.0)
-                yield {"event": "message", "data": json.dumps(msg)}
-                if msg["type"] in ("done", "error"):
-                    break
-            except asyncio.TimeoutError:
+
+def _event_source(events):
+    """`EventSourceResponse` sobre `events`; sse_starlette se importa al primer stream, no al arrancar."""
+    from sse_starlette.sse import EventSourceResponse
+
+    return EventSourceResponse(events)
+
+
+async def _job_event_stream(job: jobs.Job, since: int = 0, preface: list[dict] | None = None):
+    """Generador SSE con los eventos de `job` con id > `since` hasta que termina.
+
+    Cada evento lleva `id: {job_id}:{n}`; el navegador lo reenvía como
+    `Last-Event-ID` al reconectarse (ver `_resume_from`). Los eventos llegan
+    empujados por el job (`jobs.Subscriber`), sin polling. Si el cliente se
+    desconecta sólo se corta el stream: el job sigue corriendo.
+    """
+    for msg in preface or []:
+        yield {"event": "message", "data": json.dumps(msg)}
+    async with job.subscribe(since) as sub:
+        async for item in sub:
+            if item is jobs.KEEPALIVE:
                 yield {"comment": "keepalive"}
-        await task
+                continue
+            event_id, msg = item
+            yield {"id": f"{job.id}:{event_id}", "event": "message", "data": json.dumps(msg)}
+            if msg["type"] in ("done", "error"):
+                break
+
 
-    return EventSourceResponse(event_generator())
+def _resume_from(request: Request, kind: str | None = None) -> tuple[jobs.Job, int] | None:
+    """(job, último id recibido) si la request trae `Last-Event-ID` de un job conocido.
+
+    Acepta también `?last_event_id=` para reconexiones manuales (un EventSource
+    nuevo no manda el header). Con `kind`, ignora ids de jobs de otro tipo.
+    """
+    raw = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    if not raw or ":" not in raw:
+        return None
+    job_id, _, seq = raw.rpartition(":")
+    if not seq.isdigit():
+        return None
+    job = jobs.load(job_id)
+    if job is None or (kind and job.kind != kind):
+        return None
+    return job, int(seq)
 
 
 @app.get("/api/test-slack")
-def test_slack():
+async def test_slack():
     """Diagnóstico: reporta qué env vars de Slack están seteadas y manda un mensaje de prueba."""
     from app.config import SLACK_BOT_TOKEN, SLACK_CHANNEL, SLACK_DESTINATIONS
-    from app.processing.send_slack import _parse_destinations, _resolve_destination, _post_with_retry
-    import httpx
+    from app.processing import slack_user_cache
+    from app.processing.send_slack import (
+        _get_client, _headers, _parse_destinations, _post_with_retry, _resolve_destination,
+    )
 
     report: dict = {
         "SLACK_BOT_TOKEN_set": bool(SLACK_BOT_TOKEN),
@@ -488,15 +801,16 @@ def test_slack():
         "SLACK_CHANNEL_set": bool(SLACK_CHANNEL),
         "SLACK_DESTINATIONS_set": bool(SLACK_DESTINATIONS),
         "parsed_destinations": _parse_destinations(),
+        "user_cache": slack_user_cache.stats(),
     }
     if not SLACK_BOT_TOKEN:
         report["auth_test"] = "skipped: no SLACK_BOT_TOKEN"
         return report
 
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-               "Content-Type": "application/json; charset=utf-8"}
+    headers = _headers()
     try:
-        r = httpx.post("https://slack.com/api/auth.test", headers=headers, timeout=15)
+        client = await _get_client()
+        r = await client.post("https://slack.com/api/auth.test", headers=headers, timeout=15)
         data = r.json()
         report["auth_test"] = {"ok": data.get("ok"), "team": data.get("team"),
                                 "user": data.get("user"), "error": data.get("error")}
@@ -507,18 +821,17 @@ def test_slack():
         report["test_send"] = "skipped: no destinations"
         return report
 
-    send_results = []
-    for raw in report["parsed_destinations"]:
-        ch = _resolve_destination(raw, headers)
+    async def ping(raw: str) -> dict:
+        ch = await _resolve_destination(raw, headers)
         if not ch:
-            send_results.append({"dest": raw, "status": "could_not_resolve"})
-            continue
+            return {"dest": raw, "status": "could_not_resolve"}
         try:
-            _post_with_retry(ch, "[test-slack] ping desde data-check", headers, label=raw)
-            send_results.append({"dest": raw, "channel": ch, "status": "sent"})
+            await _post_with_retry(ch, "[test-slack] ping desde data-check", headers, label=raw)
+            return {"dest": raw, "channel": ch, "status": "sent"}
         except Exception as e:
-            send_results.append({"dest": raw, "channel": ch, "status": "failed", "error": str(e)})
-    report["test_send"] = send_results
+            return {"dest": raw, "channel": ch, "status": "failed", "error": str(e)}
+
+    report["test_send"] = await asyncio.gather(*(ping(raw) for raw in report["parsed_destinations"]))
     return report
 
 
@@ -545,16 +858,13 @@ async def send_today():
         print(f"[send-today] Warning pendientes: {e}")
         pending_count = 0
 
-    xlsx_bytes: bytes | None = None
     try:
-        from app.processing.tableau_exporter import generate_reuniones_xlsx
-        meetings = await fetch_all_meetings()
-        xlsx_bytes = generate_reuniones_xlsx(meetings)
+        found["reuniones"] = await _save_reuniones_xlsx(today)
     except Exception as e:
         print(f"[send-today] Warning: no se pudo generar xlsx de reuniones: {e}")
 
     try:
-        send_consolidated_slack(found, pending_count=pending_count, xlsx_bytes=xlsx_bytes)
+        await send_consolidated_slack(found, pending_count=pending_count)
     except Exception as e:
         traceback.print_exc()
         return {
@@ -592,12 +902,14 @@ async def upload_tflx(file: UploadFile = File(...)):
     return {"saved_to": str(dest), "size_mb": round(len(data) / 1024 / 1024, 1)}
 
 
-@app.post("/api/export-tableau")
+@app.post("/api/export-tableau", status_code=202)
 async def export_tableau():
-    """Genera los 3 archivos Tableau, actualiza el .tflx y publica a Tableau Cloud.
+    """Lanza en background el export a Tableau (3 archivos, update del .tflx, publish).
 
     Usa los CSVs consolidados del día (hora Perú) que ya existan en disco.
     No re-descarga Reply.io — requiere haber corrido /api/generate-bulk primero.
+    Responde al instante con el `job_id`; el progreso se sigue en
+    `/api/export-tableau/{job_id}` (snapshot) o `/api/export-tableau/{job_id}/events` (SSE).
     """
     today = today_peru_iso()
     consolidated_dir = DOWNLOAD_DIR / "consolidated"
@@ -614,41 +926,156 @@ async def export_tableau():
             detail=f"No hay CSVs consolidados para hoy ({today}). Correr /api/generate-bulk primero.",
         )
 
-    try:
-        meetings = await fetch_all_meetings()
-    except Exception as e:
-        traceback.print_exc()
-        # Generamos los CSVs igual aunque REUNIONES falle
-        meetings = []
-        reuniones_error = str(e)
-    else:
-        reuniones_error = None
+    job, created = _start_tableau_export_job(found)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "already_running": not created,
+        "date": today,
+        "csvs_found": list(found.keys()),
+        "status_url": f"/api/export-tableau/{job.id}",
+        "events_url": f"/api/export-tableau/{job.id}/events",
+    }
 
-    try:
-        result = await run_tableau_export(found, meetings)
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
 
-    if reuniones_error:
-        result["reuniones_fetch"] = f"error: {reuniones_error}"
+def _start_tableau_export_job(
+    consolidated: dict[str, Path], meetings: list[dict] | None = None,
+) -> tuple[jobs.Job, bool]:
+    """Lanza el export a Tableau como job en background (instancia única).
+
+    Si ya hay un export corriendo (doble click, export manual durante el del
+    cron) se devuelve ese: dos exports a la vez pisarían el mismo .tflx.
+    Si `meetings` es None se traen de Siete dentro del job. Tras publicar, el
+    job sigue el run del flujo en Tableau hasta que termina.
+
+    Returns: (job, created) como `jobs.start_single_flight`.
+    """
+    async def run(job: jobs.Job) -> dict:
+        nonlocal meetings
+        summary: dict = {"csvs_found": list(consolidated.keys())}
 
+        def emit(msg: dict):
+            print(f"[tableau] {msg['message']}")
+            job.emit(msg)
+
+        if meetings is None:
+            emit({"type": "progress", "message": "Sincronizando reuniones de Siete..."})
+            try:
+                meetings = await meetings_store.get_meetings()
+            except Exception as e:
+                traceback.print_exc()
+                # Generamos los CSVs igual aunque REUNIONES falle
+                meetings = []
+                summary["reuniones_fetch"] = f"error: {e}"
+        summary["meetings_fetched"] = len(meetings)
+
+        emit({"type": "progress", "message": "Generando archivos y actualizando .tflx..."})
+        steps = await run_tableau_export(consolidated, meetings)
+        summary["steps"] = steps
+        for step, status in steps.items():
+            if step in ("tableau_job_id", "upload"):
+                continue
+            emit({"type": "progress", "message": f"{step}: {status}"})
+        if steps.get("upload"):
+            summary["upload"] = steps["upload"]
+            emit({"type": "progress", "message": f"Upload: {steps['upload']}"})
+
+        tableau_job_id = steps.get("tableau_job_id")
+        if tableau_job_id:
+            def on_status(status: dict):
+                summary["flow_run"] = status
+                emit({"type": "flow_run", "message": f"Flujo Tableau: {status['state']}", "status": status})
+
+            emit({"type": "progress", "message": f"Siguiendo run del flujo (job_id={tableau_job_id})..."})
+            await watch_flow_run(tableau_job_id, on_status=on_status)
+        return summary
+
+    return jobs.start_single_flight("tableau_export", run)
+
+
+@app.get("/api/export-tableau/{job_id}")
+async def export_tableau_status(job_id: str):
+    """Snapshot del job de export a Tableau: estado, pasos, upload y run del flujo."""
+    job = jobs.get(job_id)
+    if not job or job.kind != "tableau_export":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/api/export-tableau/{job_id}/events")
+async def export_tableau_events(job_id: str, request: Request):
+    """SSE: eventos del job de export a Tableau hasta que termina."""
+    job = jobs.load(job_id)
+    if not job or job.kind != "tableau_export":
+        raise HTTPException(status_code=404, detail="Job not found")
+    resumed = _resume_from(request, kind="tableau_export")
+    since = resumed[1] if resumed and resumed[0].id == job.id else 0
+    return _event_source(_job_event_stream(job, since=since))
+
+
+# ── Jobs (bulk, export a Tableau) ─────────────────────────────────────────────
+
+@app.get("/api/jobs")
+async def list_jobs(kind: str | None = None, limit: int = 50):
+    """Historial de jobs (persistido; incluye los de procesos anteriores) y los que están corriendo."""
     return {
-        "date": today,
-        "csvs_found": list(found.keys()),
-        "meetings_fetched": len(meetings),
-        "steps": result,
+        "running": [j.to_dict() | {"events": j.last_event_id} for j in jobs.list_jobs(kind) if not j.finished],
+        "history": jobs.history(kind=kind, limit=limit),
     }
 
 
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job:
+        return job.to_dict()
+    past = jobs.get_persisted(job_id)
+    if not past:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return past
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """SSE: eventos de un job hasta que termina (de un job viejo, se reproduce su log)."""
+    job = jobs.load(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    resumed = _resume_from(request)
+    since = resumed[1] if resumed and resumed[0].id == job.id else 0
+    return _event_source(_job_event_stream(job, since=since))
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancela un job en curso (ej. un bulk lanzado por error)."""
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail="El job no existe o ya terminó")
+    return {"job_id": job_id, "status": "cancelling"}
+
+
 @app.get("/api/diagnostics")
-async def diagnostics():
-    """Diagnóstico del pipeline: env vars, Siete API, CSVs de hoy, último cron run."""
+async def diagnostics(refresh: str | None = None):
+    """Diagnóstico del pipeline: env vars, Siete API, CSVs de hoy, stores, sesión de Reply.io.
+
+    Las secciones pesadas salen de los probes en background (`app.health_probes`),
+    cada una con `checked_at` y `latency_ms`. `?refresh=siete_api,reply_io` (o
+    `?refresh=all`, que no incluye `reply_io`) corre esos probes antes de responder.
+    """
+    from app import health_probes
     from app.config import (
-        SLACK_BOT_TOKEN, SLACK_CHANNEL, SLACK_DESTINATIONS,
-        SIETE_API_KEY, REPLY_IO_EMAIL, REPLY_IO_PASSWORD,
+        SLACK_BOT_TOKEN, SLACK_CHANNEL, SLACK_DESTINATIONS, SIETE_API_KEY,
     )
-    from app.siete_api import _fetch_all_clientes
+
+    if refresh:
+        names = None if refresh == "all" else [n.strip() for n in refresh.split(",")]
+        unknown = [n for n in names or [] if n not in health_probes.PROBES]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Probes desconocidos: {unknown}; opciones: {sorted(health_probes.PROBES)} o 'all'",
+            )
+        await health_probes.refresh(names)
 
     env_state = {
         "SLACK_BOT_TOKEN": bool(SLACK_BOT_TOKEN),
@@ -659,52 +1086,19 @@ async def diagnostics():
         "REPLY_IO_PASSWORD": bool(REPLY_IO_PASSWORD),
         "PUBLIC_BASE_URL": PUBLIC_BASE_URL,
     }
-
-    # Siete API health
-    siete_state: dict = {"reachable": False}
-    try:
-        data = await _fetch_all_clientes()
-        siete_state["reachable"] = True
-        siete_state["total"] = len(data)
-        by_status: dict[str, int] = {}
-        active_with_team = 0
-        active_missing: list[dict] = []
-        for c in data:
-            st = c.get("status") or "None"
-            by_status[st] = by_status.get(st, 0) + 1
-            if c.get("status") == "Active":
-                if c.get("team_id"):
-                    active_with_team += 1
-                else:
-                    active_missing.append({"siete_id": c["id"], "siete_name": c["cliente"]})
-        siete_state["by_status"] = by_status
-        siete_state["active_with_team_id"] = active_with_team
-        siete_state["active_missing_team_id"] = active_missing
-    except Exception as e:
-        siete_state["error"] = f"{type(e).__name__}: {e}"
-
-    # Consolidated CSVs of today (Peru)
-    today = today_peru_iso()
-    consolidated_dir = DOWNLOAD_DIR / "consolidated"
-    consolidated_today: dict[str, dict] = {}
-    for kind, prefix in [("people", "people_consolidated"),
-                         ("email_activity", "email_activity_consolidated")]:
-        path = consolidated_dir / f"{prefix}_{today}.csv"
-        if path.exists():
-            consolidated_today[kind] = {
-                "exists": True,
-                "size_mb": round(path.stat().st_size / 1024 / 1024, 2),
-                "name": path.name,
-            }
-        else:
-            consolidated_today[kind] = {"exists": False, "size_mb": None, "name": None}
+    probes = await health_probes.snapshot()
 
     return {
-        "today_peru": today,
+        "today_peru": today_peru_iso(),
         "env": env_state,
-        "siete_api": siete_state,
-        "consolidated_today": consolidated_today,
-        "last_cron_run": load_last_cron_run(),
+        "siete_api": probes["siete_api"],
+        "siete_http": siete_api.client_stats(),
+        "siete_clientes_cache": siete_api.clientes_cache_stats(),
+        "reply_io": probes["reply_io"],
+        "consolidated_today": probes["consolidated_today"],
+        "stores": probes["stores"],
+        "sse": jobs.subscriber_stats(),
+        "executors": executors.stats(),
     }
 
 
@@ -813,6 +1207,7 @@ async def reconciliation_save(items: list[dict]):
     """
     saved = []
     errors = []
+    valid: list[tuple[int, int]] = []
     for item in items:
         siete_id = item.get("siete_id")
         team_id = item.get("team_id")
@@ -822,11 +1217,15 @@ async def reconciliation_save(items: list[dict]):
                 "reason": f"invalid input: siete_id={siete_id!r}, team_id={team_id!r}",
             })
             continue
-        try:
-            updated = await patch_team_id(siete_id=siete_id, team_id=team_id)
-            saved.append({"siete_id": siete_id, "team_id": team_id, "client_name": updated.get("cliente")})
-        except Exception as e:
-            errors.append({"siete_id": siete_id, "reason": f"{type(e).__name__}: {e}"})
+        valid.append((siete_id, team_id))
+
+    # PATCH concurrente sobre el cliente compartido; el cache se invalida una vez al final
+    for r in await patch_team_ids(valid):
+        if r["ok"]:
+            saved.append({"siete_id": r["siete_id"], "team_id": r["team_id"],
+                          "client_name": r["client"].get("cliente")})
+        else:
+            errors.append({"siete_id": r["siete_id"], "reason": r["error"]})
     return {"saved": saved, "errors": errors}
 
 
@@ -842,56 +1241,94 @@ async def sync_clients_gone():
 @app.get("/api/last-run")
 def last_run():
     """Estado del último pipeline: todos los clientes con su resultado (OK/FAILED)."""
-    import json as _json
-    summary_path = DOWNLOAD_DIR / "last_run_summary.json"
-    if not summary_path.exists():
+    summary = run_history.last_run()
+    if summary is None:
         return JSONResponse(status_code=404, content={"error": "No hay resumen de corrida anterior"})
-    return _json.loads(summary_path.read_text())
+    return summary
 
 
-@app.get("/api/client-stats")
-def client_stats():
-    """Conteo de filas por cliente en los CSVs consolidados más recientes."""
-    import pandas as pd
+@app.get("/api/runs")
+def list_runs(days: int = 30):
+    """Corridas del pipeline de los últimos `days` días (sin detalle por cliente)."""
+    return {"runs": run_history.list_runs(days=days)}
 
-    consolidated_dir = DOWNLOAD_DIR / "consolidated"
-    result: dict = {"date": None, "clients": []}
 
-    def _latest(prefix: str):
-        files = sorted(consolidated_dir.glob(f"{prefix}_*.csv"), reverse=True)
-        return files[0] if files else None
+@app.get("/api/runs/trends")
+def run_trends(days: int = 30, client_id: str | None = None):
+    """Tendencias de los últimos `days` días: por día (duración, OK/fallidos, filas) y por
+    cliente (tasa de éxito, p50/p95 del tiempo de scrape, filas, último error)."""
+    return {
+        "days": days,
+        "daily": run_history.daily_trends(days=days),
+        "clients": run_history.client_trends(days=days, client_id=client_id),
+    }
 
-    people_path = _latest("people_consolidated")
-    email_path  = _latest("email_activity_consolidated")
 
-    if not people_path and not email_path:
-        return JSONResponse(status_code=404, content={"error": "No hay CSVs consolidados"})
+@app.get("/api/runs/{run_id}")
+def get_run(run_id: str):
+    run = run_history.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
 
-    if people_path:
-        stem = people_path.stem
-        result["date"] = stem.split("_")[-1]
 
-    people_counts: dict = {}
-    email_counts:  dict = {}
+@app.get("/api/client-stats")
+async def client_stats(date: str | None = None):
+    """Conteo de filas por cliente de los consolidados más recientes (o de `date`, YYYY-MM-DD).
 
-    if people_path:
-        df = pd.read_csv(people_path, usecols=["client_name"], low_memory=False)
-        people_counts = df["client_name"].value_counts().to_dict()
+    Se sirve del índice que escribe el consolidador (`client_index`), sin leer
+    los CSVs. Si un consolidado no tiene índice se arma una vez en el pool de
+    procesos y queda guardado.
+    """
+    from app.processing.client_index import build_index, load_index
+    from app.processing.schemas import EMAIL_SCHEMA, PEOPLE_SCHEMA
 
-    if email_path:
-        df = pd.read_csv(email_path, usecols=["client_name"], low_memory=False)
-        email_counts = df["client_name"].value_counts().to_dict()
+    consolidated_dir = DOWNLOAD_DIR / "consolidated"
+    available = sorted({
+        m.group(1)
+        for p in consolidated_dir.glob("*_consolidated_*")
+        if (m := _CONSOLIDATED_DATE_RE.fullmatch(p.name))
+    }, reverse=True)
+    if date is None:
+        if not available:
+            return JSONResponse(status_code=404, content={"error": "No hay CSVs consolidados"})
+        date = available[0]
+    elif date not in available:
+        return JSONResponse(status_code=404, content={"error": f"No hay consolidados del {date}"})
+
+    async def _counts(prefix: str, schema) -> dict:
+        csv_path = consolidated_dir / f"{prefix}_{date}.csv"
+        index = load_index(csv_path)
+        if index is None and csv_path.exists():
+            index = await executors.run_cpu(build_index, csv_path, schema)
+        counts: dict = {}
+        for c in (index or {}).get("clients", []):
+            if c["rows"]:
+                counts[c["client_name"]] = counts.get(c["client_name"], 0) + c["rows"]
+        return counts
+
+    people_counts, email_counts = await asyncio.gather(
+        _counts("people_consolidated", PEOPLE_SCHEMA), _counts("email_activity_consolidated", EMAIL_SCHEMA),
+    )
 
     all_clients = sorted(set(people_counts) | set(email_counts))
-    result["clients"] = [
-        {
-            "name": c,
-            "people": people_counts.get(c, 0),
-            "email_activity": email_counts.get(c, 0),
-        }
-        for c in all_clients
-    ]
-    return result
+    return {
+        "date": date,
+        "available_dates": available,
+        "clients": [
+            {
+                "name": c,
+                "people": people_counts.get(c, 0),
+                "email_activity": email_counts.get(c, 0),
+            }
+            for c in all_clients
+        ],
+    }
+
+
+_CONSOLIDATED_DATE_RE = re.compile(
+    r"(?:people|email_activity)_consolidated_(\d{4}-\d{2}-\d{2})\.csv(?:\.index\.json)?"
+)
 
 
 @app.get("/api/health")
@@ -899,6 +1336,12 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def prometheus_metrics():
+    """Métricas del pipeline en formato de texto de Prometheus (ver `app.metrics`)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # ── Serve frontend static files ───────────────────────────────────────────────
 STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
 if STATIC_DIR.exists():
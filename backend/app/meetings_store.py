@@ -0,0 +1,188 @@
+"""Store local persistente de reuniones de Siete (SQLite).
+
+`fetch_all_meetings` baja el historial completo en cada llamada aunque cada día
+cambian sólo unas pocas filas. Este store guarda las reuniones en
+`DOWNLOAD_DIR / "meetings.sqlite"` y las sincroniza incrementalmente:
+
+  - Incremental: pide a Siete las reuniones con `updated_at` >= al high-water
+    mark guardado (listado ordenado por `-updated_at`) y las upsertea por `id`.
+  - Full reconcile: si el store está vacío, si pasaron más de
+    `MEETINGS_FULL_SYNC_HOURS` desde el último, o si Siete no respeta el orden,
+    se baja todo y se reemplaza el contenido (así también desaparecen las
+    reuniones borradas en Siete, que el incremental no ve).
+
+Si el sync falla y el store tiene datos, se sirven esos (best-effort, con log).
+`get_meetings()` es el punto de entrada para el XLSX de REUNIONES y el export
+a Tableau.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from app import executors
+from app.config import DOWNLOAD_DIR
+from app.siete_api import fetch_all_meetings, fetch_meetings_updated_since
+from app.utils.dates import format_utc, parse_iso_utc
+
+MEETINGS_FULL_SYNC_HOURS = 24 * 7
+
+_PATH = DOWNLOAD_DIR / "meetings.sqlite"
+
+_sync_lock = asyncio.Lock()
+
+
+def path() -> Path:
+    return _PATH
+
+
+async def get_meetings() -> list[dict]:
+    """Sincroniza el store con Siete y devuelve todas las reuniones, ordenadas por id."""
+    try:
+        await sync_meetings()
+    except Exception as e:
+        if not await executors.run_io(_count):
+            raise
+        print(f"[meetings] Sync con Siete falló ({type(e).__name__}: {e}); usando el store local")
+    return await executors.run_io(load_meetings)
+
+
+async def sync_meetings(full: bool = False) -> dict:
+    """Trae de Siete lo que cambió desde el último sync (o todo, si corresponde).
+
+    Returns: {"mode": "full" | "incremental", "fetched": int, "total": int, "seconds": float}
+    """
+    async with _sync_lock:
+        t0 = time.monotonic()
+        meta = await executors.run_io(_load_meta)
+        high_water = meta.get("high_water_updated_at")
+        # Un high-water ausente o ilegible (ej. guardado como texto crudo por una versión vieja) fuerza full
+        mode = "full" if full or _full_sync_due(meta) or not parse_iso_utc(high_water) else "incremental"
+
+        changed = None
+        if mode == "incremental":
+            changed = await fetch_meetings_updated_since(high_water)
+            if changed is None:
+                print("[meetings] Siete no respetó ordering=-updated_at; haciendo full reconcile")
+                mode = "full"
+
+        if mode == "full":
+            changed = await fetch_all_meetings()
+            total = await executors.run_io(_replace_all, changed)
+        else:
+            total = await executors.run_io(_upsert, changed)
+
+        stats = {
+            "mode": mode,
+            "fetched": len(changed),
+            "total": total,
+            "seconds": round(time.monotonic() - t0, 2),
+        }
+        print(f"[meetings] Sync {mode}: {stats['fetched']} traídas, {total} en el store ({stats['seconds']}s)")
+        return stats
+
+
+def load_meetings() -> list[dict]:
+    with _connect() as conn:
+        return [json.loads(row[0]) for row in conn.execute("SELECT payload FROM meetings ORDER BY id")]
+
+
+def stats() -> dict:
+    """Estado del store para diagnóstico."""
+    meta = _load_meta()
+    return {
+        "path": str(_PATH),
+        "total": _count(),
+        "high_water_updated_at": meta.get("high_water_updated_at"),
+        "high_water_id": meta.get("high_water_id"),
+        "last_full_sync": meta.get("last_full_sync"),
+        "last_sync": meta.get("last_sync"),
+    }
+
+
+# ── SQLite ────────────────────────────────────────────────────────────────────
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    """Conexión con el schema creado; commitea al salir sin error y siempre cierra."""
+    conn = sqlite3.connect(_PATH)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS meetings ("
+            " id INTEGER PRIMARY KEY, updated_at TEXT, payload TEXT NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _count() -> int:
+    with _connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+
+def _load_meta() -> dict:
+    with _connect() as conn:
+        return dict(conn.execute("SELECT key, value FROM meta"))
+
+
+def _full_sync_due(meta: dict) -> bool:
+    last = meta.get("last_full_sync")
+    if not last:
+        return True
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(last)
+    return age.total_seconds() > MEETINGS_FULL_SYNC_HOURS * 3600
+
+
+def _rows(meetings: list[dict]) -> list[tuple]:
+    """Filas para la tabla; `updated_at` se guarda normalizado a UTC (ancho fijo)."""
+    rows = []
+    for m in meetings:
+        if m.get("id") is None:
+            continue
+        updated_at = parse_iso_utc(m.get("updated_at"))
+        rows.append((m["id"], format_utc(updated_at) if updated_at else None,
+                     json.dumps(m, ensure_ascii=False)))
+    return rows
+
+
+def _replace_all(meetings: list[dict]) -> int:
+    now = datetime.now(timezone.utc).isoformat()
+    with _connect() as conn:
+        conn.execute("DELETE FROM meetings")
+        conn.executemany("INSERT OR REPLACE INTO meetings VALUES (?, ?, ?)", _rows(meetings))
+        _save_high_water(conn, meetings, None, {"last_full_sync": now, "last_sync": now})
+        return conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+
+def _upsert(meetings: list[dict]) -> int:
+    with _connect() as conn:
+        conn.executemany("INSERT OR REPLACE INTO meetings VALUES (?, ?, ?)", _rows(meetings))
+        previous = conn.execute("SELECT value FROM meta WHERE key = 'high_water_updated_at'").fetchone()
+        _save_high_water(conn, meetings, previous and previous[0],
+                         {"last_sync": datetime.now(timezone.utc).isoformat()})
+        return conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+
+def _save_high_water(conn: sqlite3.Connection, meetings: list[dict], previous: str | None, extra: dict) -> None:
+    """Guarda los high-water marks junto a `extra`.
+
+    El de `updated_at` es el máximo (parseado a UTC, no comparado como texto)
+    entre `previous` y las reuniones recién escritas; se guarda normalizado.
+    """
+    stamps = [parse_iso_utc(m.get("updated_at")) for m in meetings]
+    stamps = [s for s in stamps + [parse_iso_utc(previous)] if s is not None]
+    max_id = conn.execute("SELECT MAX(id) FROM meetings").fetchone()[0]
+    values = {**extra, "high_water_updated_at": format_utc(max(stamps)) if stamps else None,
+              "high_water_id": max_id}
+    conn.executemany(
+        "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+        [(k, None if v is None else str(v)) for k, v in values.items()],
+    )
@@ -0,0 +1,304 @@
+"""Métricas en formato de texto de Prometheus, servidas en `/metrics`.
+
+Implementación mínima sin dependencias (contadores, gauges e histogramas con
+labels), pensada para instrumentar hot paths con costo bajo: registrar una
+observación es un lookup en un dict y un par de sumas, sin locks (todo corre
+en el event loop o en threads donde una carrera sólo puede perder una
+observación).
+
+Los valores viven en memoria del proceso: se reinician con cada deploy, y lo
+que corre en el pool de procesos (`app.executors.run_cpu`) no se ve acá; esos
+pasos se registran desde el proceso principal (ej. `consolidator.record_metrics`).
+
+Uso:
+    CLIENT_EXPORT_SECONDS.observe(93.1, client_id="acme", outcome="ok")
+    with SCRAPE_STEP_SECONDS.time(step="login"):   # outcome=ok/error automático
+        ...
+    SCRAPE_RETRIES.inc(label="trigger People export")
+
+`InstrumentedTransport` envuelve el transport de un `httpx.AsyncClient` y mide
+latencia y código (status HTTP o tipo de excepción) de cada request.
+"""
+import math
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import httpx
+
+# Buckets por defecto (segundos): de requests HTTP a pasos de scrape de minutos
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_REGISTRY: list["_Metric"] = []
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        _REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _fmt_labels(self, key: tuple, extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in list(self._values.items()):
+            yield f"{self.name}{self._fmt_labels(key)} {_num(value)}"
+
+
+class Gauge(_Metric):
+    """Gauge con `set`, o calculado al leer `/metrics` si se pasa `callback`.
+
+    `callback` devuelve un número (sin labels) o un dict {tupla de labels: valor}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 callback: Callable[[], float | dict] | None = None):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def samples(self) -> Iterator[str]:
+        values = self._values
+        if self.callback is not None:
+            try:
+                result = self.callback()
+            except Exception as e:
+                print(f"[metrics] Callback de {self.name} falló: {e}")
+                return
+            values = result if isinstance(result, dict) else {(): result}
+        for key, value in list(values.items()):
+            if value is not None:
+                yield f"{self.name}{self._fmt_labels(key)} {_num(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}  # key → [counts por bucket..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Mide el bloque; si el histograma tiene label `outcome` lo completa con ok/error."""
+        t0 = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            if "outcome" in self.labelnames:
+                labels.setdefault("outcome", outcome)
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def samples(self) -> Iterator[str]:
+        for key, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="' + _num(bound) + '"'
+                yield f"{self.name}_bucket{self._fmt_labels(key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{self._fmt_labels(key, le)} {series[-1]}"
+            yield f"{self.name}_sum{self._fmt_labels(key)} {_num(series[-2])}"
+            yield f"{self.name}_count{self._fmt_labels(key)} {series[-1]}"
+
+
+def render() -> str:
+    """Todas las métricas registradas en formato de exposición de texto (0.0.4)."""
+    lines = []
+    for metric in _REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# ── HTTP clients ──────────────────────────────────────────────────────────────
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Transport que registra latencia (hasta headers) y código de cada request."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, service: str):
+        self.inner = inner
+        self.service = service
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        t0 = time.perf_counter()
+        path = _path_template(request.url.path)
+        try:
+            response = await self.inner.handle_async_request(request)
+        except Exception as e:
+            code = type(e).__name__
+            HTTP_CLIENT_ERRORS.inc(service=self.service, path=path, code=code)
+            HTTP_CLIENT_SECONDS.observe(time.perf_counter() - t0, service=self.service,
+                                        method=request.method, path=path, code=code)
+            raise
+        code = str(response.status_code)
+        HTTP_CLIENT_SECONDS.observe(time.perf_counter() - t0, service=self.service,
+                                    method=request.method, path=path, code=code)
+        if response.status_code >= 400:
+            HTTP_CLIENT_ERRORS.inc(service=self.service, path=path, code=code)
+        return response
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def _path_template(path: str) -> str:
+    """/core/clientes/123/ → /core/clientes/:id/ (cardinalidad acotada)."""
+    return _ID_SEGMENT.sub("/:id", path)
+
+
+# ── Proceso / Chromium ────────────────────────────────────────────────────────
+
+_CHROMIUM_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+def chromium_rss_bytes() -> float | None:
+    """Suma del RSS de los procesos de Chromium hijos de este proceso (Linux, vía /proc)."""
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+    me = os.getpid()
+    parents: dict[int, int] = {}
+    chromium: dict[int, int] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            status = (entry / "status").read_text()
+        except OSError:
+            continue
+        fields = dict(line.split(":\t", 1) for line in status.splitlines() if ":\t" in line)
+        pid = int(entry.name)
+        parents[pid] = int(fields.get("PPid", "0").strip() or 0)
+        if any(n in fields.get("Name", "") for n in _CHROMIUM_NAMES) and "VmRSS" in fields:
+            chromium[pid] = int(fields["VmRSS"].split()[0]) * 1024
+    total = 0
+    for pid, rss in chromium.items():
+        ancestor = parents.get(pid)
+        while ancestor and ancestor != me:
+            ancestor = parents.get(ancestor)
+        if ancestor == me:
+            total += rss
+    return total
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value) if not value.is_integer() else str(int(value))
+    return str(value)
+
+
+# ── Métricas del pipeline ─────────────────────────────────────────────────────
+
+# Reply.io (app.scraper.reply_io)
+SCRAPE_STEP_SECONDS = Histogram(
+    "reply_scrape_step_seconds", "Duración de cada paso del scrape de Reply.io", ("step", "outcome"),
+)
+CLIENT_EXPORT_SECONDS = Histogram(
+    "reply_client_export_seconds", "Tiempo total por cliente (switch + exports + descargas)",
+    ("client_id", "outcome"),
+)
+SCRAPE_RETRIES = Counter("reply_retries_total", "Reintentos de pasos del scrape", ("label",))
+PAGE_RECYCLES = Counter("reply_page_recycles_total", "Reciclados de páginas de Chromium", ("reason",))
+CHROMIUM_RSS = Gauge(
+    "reply_chromium_rss_bytes", "RSS de los procesos de Chromium lanzados por la app",
+    callback=chromium_rss_bytes,
+)
+
+# Consolidado (app.processing.consolidator)
+CONSOLIDATION_SECONDS = Histogram("consolidation_seconds", "Duración de consolidate()")
+CONSOLIDATION_ROWS = Counter("consolidation_rows_total", "Filas escritas en consolidados", ("kind",))
+CONSOLIDATION_BYTES = Counter("consolidation_bytes_total", "Bytes escritos en consolidados", ("kind",))
+CONSOLIDATION_ROWS_PER_SECOND = Gauge(
+    "consolidation_rows_per_second", "Throughput de la última consolidación", ("kind",),
+)
+
+# Clientes HTTP (Siete, Slack)
+HTTP_CLIENT_SECONDS = Histogram(
+    "http_client_request_seconds", "Latencia (hasta headers) de requests salientes",
+    ("service", "method", "path", "code"),
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+HTTP_CLIENT_ERRORS = Counter(
+    "http_client_errors_total", "Requests salientes con status >= 400 o excepción", ("service", "path", "code"),
+)
+SLACK_API_ERRORS = Counter("slack_api_errors_total", "Respuestas de Slack con ok=false", ("method", "error"))
+
+# Tableau (tableauserverclient es sync; se mide por operación)
+TABLEAU_SECONDS = Histogram(
+    "tableau_operation_seconds", "Duración de operaciones contra Tableau Cloud", ("operation", "outcome"),
+)
+
+# Probes de /api/diagnostics (app.health_probes)
+HEALTH_PROBE_SECONDS = Histogram(
+    "health_probe_seconds", "Duración de cada probe de salud", ("probe", "outcome"),
+)
+
+# Retención de DOWNLOAD_DIR (app.retention)
+RETENTION_DELETED = Counter(
+    "retention_deleted_files_total", "Archivos borrados por retención (expired = edad, budget = presupuesto)",
+    ("artifact_class", "reason"),
+)
+RETENTION_FREED_BYTES = Counter(
+    "retention_freed_bytes_total", "Bytes liberados por retención", ("artifact_class", "reason"),
+)
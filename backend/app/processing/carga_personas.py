@@ -7,9 +7,10 @@ Output: Agrega a un spreadsheet existente:
   - Hoja "Base Personas" con datos + columnas derivadas
   - 8 pivots: Personas/Empresas × Día/Semana/Mes/Quarter
 """
-import pandas as pd
 from openpyxl.utils import get_column_letter
 
+from app.processing.schemas import PEOPLE_SCHEMA, parse_date_column, read_reply_csv
+
 
 def procesar_carga(csv_path, spreadsheet, service):
     """
@@ -23,16 +24,15 @@ def procesar_carga(csv_path, spreadsheet, service):
     SPREADSHEET_ID = spreadsheet.id
 
     # ── Leer CSV ──
-    df = pd.read_csv(csv_path)
+    df = read_reply_csv(csv_path, PEOPLE_SCHEMA)
 
     # ── Columna derivada: Added On Date ──
-    df["Added On Date"] = pd.to_datetime(
-        df["Added On"],
-        format="%m/%d/%Y %I:%M %p",
-        errors="coerce",
+    df["Added On Date"] = parse_date_column(
+        df["Added On"], PEOPLE_SCHEMA, "Added On",
     ).dt.strftime("%d/%m/%Y")
 
-    df = df.replace([float("inf"), float("-inf")], "")
+    # object antes de fillna(""): los dtypes nullable del schema no aceptan ""
+    df = df.astype(object).replace([float("inf"), float("-inf")], "")
     df = df.fillna("")
     df = df.astype(str)
 
@@ -0,0 +1,102 @@
+"""Índice por cliente de los CSVs consolidados.
+
+Al consolidar, cada cliente queda en un bloque contiguo de filas. Junto a cada
+consolidado se escribe `{nombre}.csv.index.json` con, por cliente, cuántas
+filas tiene y en qué rango de bytes del CSV está su bloque:
+
+    {"file": "people_consolidated_2026-10-19.csv", "rows": 120345, "bytes": ...,
+     "header_bytes": 512,
+     "clients": [{"client_id": "acme", "client_name": "ACME", "rows": 4120,
+                  "offset": 512, "length": 881234}, ...]}
+
+`/api/client-stats` sirve los conteos desde este sidecar sin abrir el CSV, y
+con `offset`/`length` se puede pedir el bloque de un cliente por `Range` a
+`/api/consolidated/{filename}` (más el header, `bytes=0-{header_bytes - 1}`);
+los pedidos con `Range` reciben siempre el CSV sin comprimir.
+
+Los sidecars son chicos y la retención los guarda mucho más que a los CSVs
+(clase `index` de `app.retention`), así los conteos de días anteriores siguen
+disponibles aunque el CSV ya no exista.
+"""
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+INDEX_SUFFIX = ".index.json"
+
+
+def index_path(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.name + INDEX_SUFFIX)
+
+
+def write_csv_with_index(frames: list[tuple[str, str, "pd.DataFrame"]], out: Path) -> dict:
+    """Concatena los frames (client_id, client_name, df) en `out` y escribe su índice.
+
+    El CSV queda igual que con un único `to_csv` del concat: mismo header con la
+    unión de columnas y los clientes en el orden recibido.
+
+    Returns: el índice escrito.
+    """
+    import pandas as pd  # lazy: `load_index` se usa desde la app web, que no necesita pandas
+
+    full = pd.concat([df for _, _, df in frames], ignore_index=True, sort=False)
+    clients = []
+    start = 0
+    with open(out, "wb") as f:
+        full.iloc[:0].to_csv(f, index=False)
+        header_bytes = f.tell()
+        for client_id, client_name, df in frames:
+            offset = f.tell()
+            full.iloc[start:start + len(df)].to_csv(f, index=False, header=False)
+            clients.append({
+                "client_id": client_id, "client_name": client_name, "rows": len(df),
+                "offset": offset, "length": f.tell() - offset,
+            })
+            start += len(df)
+        size = f.tell()
+    index = {"file": out.name, "rows": len(full), "bytes": size, "header_bytes": header_bytes,
+             "clients": clients}
+    _save(out, index)
+    return index
+
+
+def build_index(csv_path: Path, schema) -> dict:
+    """Índice de un consolidado que no lo tiene (ej. generado antes de existir el sidecar).
+
+    Sólo cuenta filas por cliente (lee la columna `client_name`); sin offsets.
+    """
+    from app.processing.schemas import count_by_client
+
+    counts = count_by_client(csv_path, schema)
+    index = {
+        "file": csv_path.name, "rows": sum(counts.values()), "bytes": csv_path.stat().st_size,
+        "header_bytes": None,
+        "clients": [
+            {"client_id": None, "client_name": name, "rows": rows, "offset": None, "length": None}
+            for name, rows in counts.items()
+        ],
+    }
+    _save(csv_path, index)
+    return index
+
+
+def load_index(csv_path: Path) -> dict | None:
+    """Índice de `csv_path` (exista o no el CSV). None si no hay sidecar o está corrupto."""
+    path = index_path(csv_path)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"[client-index] WARN: índice corrupto en {path.name} ({e}); ignorando")
+        return None
+
+
+def _save(csv_path: Path, index: dict) -> None:
+    path = index_path(csv_path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(index, ensure_ascii=False))
+    tmp.replace(path)
@@ -0,0 +1,133 @@
+"""Copias comprimidas de los artefactos consolidados.
+
+`compress_file` escribe al lado del original una copia `.gz` (siempre
+disponible) o `.zst` (si está instalado `zstandard`), que
+`/api/consolidated/{filename}` sirve cuando el cliente la acepta en
+`Accept-Encoding`.
+
+gzip en paralelo, estilo pigz: el archivo se parte en bloques de
+`GZIP_BLOCK_SIZE` que se comprimen en threads (zlib libera el GIL) como
+deflate crudo terminado en sync flush, usando los últimos 32 KiB del bloque
+anterior como diccionario. Los bloques concatenados forman un único stream
+deflate, así que el resultado es un `.gz` estándar de un solo miembro; el CRC32
+se calcula en orden en el thread principal.
+"""
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+GZIP_LEVEL = 6
+GZIP_BLOCK_SIZE = 8 * 1024 * 1024
+# Por debajo de este tamaño se comprime en un solo thread (no vale la pena repartir)
+PARALLEL_MIN_BYTES = 2 * GZIP_BLOCK_SIZE
+ZSTD_LEVEL = 10
+
+_DICT_SIZE = 32 * 1024
+
+# encoding HTTP → extensión del archivo precomprimido
+ENCODING_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def compress_file(path: Path, encodings: list[str], workers: int | None = None) -> dict[str, Path]:
+    """Escribe las variantes comprimidas de `path` pedidas en `encodings`.
+
+    Encodings desconocidos o sin librería instalada se saltean con un log.
+    Cada variante se escribe a un `.tmp` y se renombra al final, así el
+    endpoint de descarga nunca sirve una copia a medio escribir.
+
+    Returns: {encoding: Path} de las variantes escritas.
+    """
+    out: dict[str, Path] = {}
+    for encoding in encodings:
+        suffix = ENCODING_SUFFIXES.get(encoding)
+        if suffix is None:
+            print(f"[compress] Encoding desconocido: {encoding!r}")
+            continue
+        if encoding == "zstd" and not zstd_available():
+            print("[compress] zstandard no instalado; omitiendo variante .zst")
+            continue
+        dest = path.with_name(path.name + suffix)
+        tmp = dest.with_name(dest.name + ".tmp")
+        try:
+            if encoding == "gzip":
+                gzip_file(path, tmp, workers=workers)
+            else:
+                zstd_file(path, tmp, workers=workers)
+            tmp.replace(dest)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            raise
+        out[encoding] = dest
+    return out
+
+
+def variant_for(path: Path, encoding: str) -> Path | None:
+    """Variante precomprimida de `path` para `encoding`, si existe y no es más vieja que el original."""
+    suffix = ENCODING_SUFFIXES.get(encoding)
+    if suffix is None:
+        return None
+    variant = path.with_name(path.name + suffix)
+    try:
+        if variant.stat().st_mtime >= path.stat().st_mtime:
+            return variant
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def gzip_file(src: Path, dest: Path, level: int = GZIP_LEVEL, workers: int | None = None) -> None:
+    """Comprime `src` en `dest` (gzip de un miembro), repartiendo los bloques entre threads."""
+    size = src.stat().st_size
+    workers = workers or min(8, os.cpu_count() or 1)
+    if size < PARALLEL_MIN_BYTES or workers == 1:
+        workers = 1
+
+    crc = 0
+    with open(src, "rb") as fin, open(dest, "wb") as fout:
+        # Header gzip mínimo: sin nombre ni mtime (salida determinística)
+        fout.write(b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            previous_tail = b""
+            block = fin.read(GZIP_BLOCK_SIZE)
+            while block:
+                next_block = fin.read(GZIP_BLOCK_SIZE)
+                last = not next_block
+                pending.append((block, pool.submit(_deflate_block, block, previous_tail, level, last)))
+                previous_tail = block[-_DICT_SIZE:]
+                # Ventana acotada: como mucho 2 bloques por worker en memoria
+                while len(pending) >= 2 * workers or (last and pending):
+                    done_block, future = pending.pop(0)
+                    crc = zlib.crc32(done_block, crc)
+                    fout.write(future.result())
+                block = next_block
+            if size == 0:
+                fout.write(_deflate_block(b"", b"", level, True))
+        fout.write(struct.pack("<II", crc & 0xFFFFFFFF, size & 0xFFFFFFFF))
+
+
+def _deflate_block(data: bytes, zdict: bytes, level: int, last: bool) -> bytes:
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def zstd_file(src: Path, dest: Path, level: int = ZSTD_LEVEL, workers: int | None = None) -> None:
+    """Comprime `src` en `dest` con zstd multi-thread (requiere `zstandard`)."""
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(level=level, threads=workers or -1)
+    with open(src, "rb") as fin, open(dest, "wb") as fout:
+        compressor.copy_stream(fin, fout, size=src.stat().st_size)
@@ -2,8 +2,10 @@
 from datetime import date
 from pathlib import Path
 
-import pandas as pd
-
+from app import metrics
+from app.processing.client_index import load_index, write_csv_with_index
+from app.processing.compression import compress_file
+from app.processing.schemas import EMAIL_SCHEMA, PEOPLE_SCHEMA, read_reply_csv
 from app.utils.dates import today_peru
 
 
@@ -11,6 +13,7 @@ def consolidate(
     per_client_files: list[dict],
     output_dir: Path,
     run_date: date | None = None,
+    compression: list[str] | None = None,
 ) -> dict[str, Path]:
     """
     Args:
@@ -21,8 +24,13 @@ def consolidate(
             - email_csv (Path | None)
         output_dir: carpeta donde escribir los consolidados.
         run_date: fecha para el sufijo del archivo. Default = hoy en Perú (UTC-5).
+        compression: encodings ("gzip", "zstd") de las copias comprimidas a
+            escribir junto a cada CSV (`.csv.gz` / `.csv.zst`). None = ninguna.
 
     Returns: {"people": Path, "email_activity": Path} (sólo claves con datos).
+        Las copias comprimidas no se incluyen: se ubican con
+        `compression.variant_for`. Cada CSV lleva su índice por cliente
+        (`client_index.load_index`).
     """
     output_dir.mkdir(parents=True, exist_ok=True)
     run_date = run_date or today_peru()
@@ -37,28 +45,48 @@ def consolidate(
 
         people_csv = entry.get("people_csv")
         if people_csv and Path(people_csv).exists():
-            df = pd.read_csv(people_csv, low_memory=False)
+            df = read_reply_csv(people_csv, PEOPLE_SCHEMA)
             df.insert(0, "client_id", cid)
             df.insert(1, "client_name", cname)
-            people_frames.append(df)
+            people_frames.append((cid, cname, df))
 
         email_csv = entry.get("email_csv")
         if email_csv and Path(email_csv).exists():
-            df = pd.read_csv(email_csv, low_memory=False)
+            df = read_reply_csv(email_csv, EMAIL_SCHEMA)
             df.insert(0, "client_id", cid)
             df.insert(1, "client_name", cname)
-            email_frames.append(df)
+            email_frames.append((cid, cname, df))
 
     result: dict[str, Path] = {}
 
     if people_frames:
         people_out = output_dir / f"people_consolidated_{suffix}.csv"
-        pd.concat(people_frames, ignore_index=True, sort=False).to_csv(people_out, index=False)
+        write_csv_with_index(people_frames, people_out)
         result["people"] = people_out
 
     if email_frames:
         email_out = output_dir / f"email_activity_consolidated_{suffix}.csv"
-        pd.concat(email_frames, ignore_index=True, sort=False).to_csv(email_out, index=False)
+        write_csv_with_index(email_frames, email_out)
         result["email_activity"] = email_out
 
+    if compression:
+        for path in result.values():
+            compress_file(path, compression)
+
     return result
+
+
+def record_metrics(result: dict[str, Path], seconds: float) -> None:
+    """Registra duración, filas, bytes y filas/s de una consolidación en `app.metrics`.
+
+    Se llama desde el proceso de la API con el resultado de `consolidate`, que
+    corre en el pool de procesos (ahí las métricas no llegarían a `/metrics`).
+    """
+    metrics.CONSOLIDATION_SECONDS.observe(seconds)
+    for kind, path in result.items():
+        index = load_index(path)
+        rows = index["rows"] if index else 0
+        metrics.CONSOLIDATION_ROWS.inc(rows, kind=kind)
+        metrics.CONSOLIDATION_BYTES.inc(path.stat().st_size, kind=kind)
+        if seconds > 0:
+            metrics.CONSOLIDATION_ROWS_PER_SECOND.set(round(rows / seconds, 1), kind=kind)
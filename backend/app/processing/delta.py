@@ -0,0 +1,162 @@
+"""Deltas diarios entre consolidaciones consecutivas.
+
+Compara el consolidado de hoy contra el de ayer (mismo tipo) y escribe sólo
+las filas que cambiaron en `{prefix}_delta_{YYYY-MM-DD}.csv`, con una columna
+`_change` = added | removed | changed.
+
+Cada fila se identifica por (client_id, columna clave del schema, n° de
+ocurrencia) — Email en people, Contact Id en email_activity; la ocurrencia
+desambigua claves repetidas dentro de un cliente. La comparación es por hash
+de la fila completa (como texto) y los archivos se leen en chunks: en memoria
+sólo queda un par de hashes uint64 por fila de ayer, nunca los DataFrames.
+"""
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.processing.schemas import EMAIL_SCHEMA, PEOPLE_SCHEMA, CsvSchema, iter_reply_csv
+
+DELTA_CHUNK_ROWS = 200_000
+
+# kind del consolidado → (prefijo del archivo, schema)
+_KINDS = {
+    "people": ("people", PEOPLE_SCHEMA),
+    "email_activity": ("email_activity", EMAIL_SCHEMA),
+}
+
+CHANGE_COLUMN = "_change"
+
+
+def compute_daily_deltas(consolidated: dict[str, Path], run_date: date) -> dict[str, dict]:
+    """Calcula el delta de cada consolidado de `run_date` contra el del día anterior.
+
+    Args:
+        consolidated: salida de `consolidate` ({"people": Path, "email_activity": Path}).
+        run_date: fecha del consolidado de hoy.
+
+    Returns: {kind: {"path", "added", "removed", "changed", "clients"}} o
+        {kind: {"skipped": motivo}} si no hay consolidado de ayer.
+    """
+    yesterday = (run_date - timedelta(days=1)).isoformat()
+    out: dict[str, dict] = {}
+    for kind, (prefix, schema) in _KINDS.items():
+        today_csv = consolidated.get(kind)
+        if not today_csv:
+            continue
+        today_csv = Path(today_csv)
+        yesterday_csv = today_csv.parent / f"{prefix}_consolidated_{yesterday}.csv"
+        if not yesterday_csv.exists():
+            out[kind] = {"skipped": f"sin consolidado de {yesterday}"}
+            continue
+        output = today_csv.parent / f"{prefix}_delta_{run_date.isoformat()}.csv"
+        try:
+            out[kind] = compute_delta(today_csv, yesterday_csv, schema, output)
+        except Exception as e:
+            output.unlink(missing_ok=True)
+            out[kind] = {"skipped": f"error: {type(e).__name__}: {e}"}
+    return out
+
+
+def compute_delta(today_csv: Path, yesterday_csv: Path, schema: CsvSchema, output: Path) -> dict:
+    """Escribe en `output` las filas agregadas, quitadas y cambiadas entre dos consolidados.
+
+    Se comparan sólo las columnas presentes en ambos archivos (una columna
+    nueva de Reply.io no marca todas las filas como cambiadas).
+
+    Returns: {"path", "added", "removed", "changed", "clients": {client_name: {added, removed, changed}}}
+    """
+    today_cols = _header(today_csv)
+    yesterday_cols = set(_header(yesterday_csv))
+    for col in ("client_id", "client_name", schema.key):
+        if col not in today_cols or col not in yesterday_cols:
+            raise ValueError(f"falta la columna {col!r} para comparar")
+    compared = [c for c in today_cols if c in yesterday_cols]
+
+    # Pase 1: hashes de ayer (clave → hash de fila)
+    key_parts, row_parts = [], []
+    counts = pd.Series(dtype="uint64")
+    for chunk in _chunks(yesterday_csv, schema, compared):
+        keys, counts = _key_hashes(chunk, schema.key, counts)
+        key_parts.append(keys)
+        row_parts.append(_row_hashes(chunk, compared))
+    previous = pd.Series(_concat(row_parts), index=_concat(key_parts))
+    previous = previous[~previous.index.duplicated()]
+    previous_rows = previous.to_numpy()
+
+    clients: dict[str, dict[str, int]] = {}
+    totals = {"added": 0, "removed": 0, "changed": 0}
+    seen_parts = []
+
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        header = True
+
+        def write(rows: pd.DataFrame, change: str):
+            nonlocal header
+            if rows.empty:
+                return
+            rows = rows.reindex(columns=today_cols)
+            rows.insert(0, CHANGE_COLUMN, change)
+            rows.to_csv(f, index=False, header=header)
+            header = False
+            totals[change] += len(rows)
+            for name, n in rows["client_name"].value_counts().items():
+                clients.setdefault(name, {"added": 0, "removed": 0, "changed": 0})[change] += int(n)
+
+        # Pase 2: filas de hoy contra los hashes de ayer
+        counts = pd.Series(dtype="uint64")
+        for chunk in _chunks(today_csv, schema, today_cols):
+            keys, counts = _key_hashes(chunk, schema.key, counts)
+            rows = _row_hashes(chunk, compared)
+            pos = previous.index.get_indexer(keys)
+            added = pos == -1
+            changed = np.zeros(len(pos), dtype=bool)
+            if len(previous_rows):  # ayer sin filas: todo es "added" (indexar un array vacío falla)
+                changed = ~added & (previous_rows[pos] != rows)
+            write(chunk[added], "added")
+            write(chunk[changed], "changed")
+            seen_parts.append(keys)
+
+        # Pase 3: filas de ayer cuya clave no apareció hoy
+        removed_keys = previous.index.difference(pd.Index(_concat(seen_parts)))
+        if len(removed_keys):
+            counts = pd.Series(dtype="uint64")
+            for chunk in _chunks(yesterday_csv, schema, None):
+                keys, counts = _key_hashes(chunk, schema.key, counts)
+                write(chunk[np.isin(keys, removed_keys)], "removed")
+
+    return {"path": output, **totals, "clients": clients}
+
+
+def _header(path: Path) -> list[str]:
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _chunks(path: Path, schema: CsvSchema, usecols: list[str] | None):
+    return iter_reply_csv(path, schema, chunksize=DELTA_CHUNK_ROWS, usecols=usecols, as_text=True)
+
+
+def _key_hashes(chunk: pd.DataFrame, key: str, counts: pd.Series) -> tuple[np.ndarray, pd.Series]:
+    """Hash de (client_id, clave, n° de ocurrencia) por fila.
+
+    `counts` lleva cuántas veces apareció cada (client_id, clave) en chunks
+    anteriores, para que la ocurrencia sea global al archivo.
+    """
+    base = pd.util.hash_pandas_object(chunk[["client_id", key]], index=False).to_numpy()
+    base_s = pd.Series(base)
+    offset = counts.reindex(base).fillna(0).to_numpy(dtype="uint64")
+    occurrence = offset + base_s.groupby(base).cumcount().to_numpy(dtype="uint64")
+    keys = pd.util.hash_pandas_object(
+        pd.DataFrame({"k": base, "n": occurrence}), index=False,
+    ).to_numpy()
+    counts = counts.add(base_s.value_counts(), fill_value=0).astype("uint64")
+    return keys, counts
+
+
+def _row_hashes(chunk: pd.DataFrame, columns: list[str]) -> np.ndarray:
+    return pd.util.hash_pandas_object(chunk[columns], index=False).to_numpy()
+
+
+def _concat(parts: list[np.ndarray]) -> np.ndarray:
+    return np.concatenate(parts) if parts else np.array([], dtype="uint64")
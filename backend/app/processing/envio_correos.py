@@ -11,6 +11,8 @@ Output: Agrega a un spreadsheet existente:
 import pandas as pd
 from openpyxl.utils import get_column_letter
 
+from app.processing.schemas import EMAIL_SCHEMA, parse_date_column, read_reply_csv
+
 
 def procesar_correos(csv_path, spreadsheet, service):
     """
@@ -24,14 +26,10 @@ def procesar_correos(csv_path, spreadsheet, service):
     SPREADSHEET_ID = spreadsheet.id
 
     # ── Leer CSV ──
-    df = pd.read_csv(csv_path)
+    df = read_reply_csv(csv_path, EMAIL_SCHEMA)
 
     # ── Columna derivada: Delivery Date Text ──
-    parsed_dates = pd.to_datetime(
-        df["Delivery date"],
-        format="%a, %d %b %Y %H:%M:%S",
-        errors="coerce",
-    )
+    parsed_dates = parse_date_column(df["Delivery date"], EMAIL_SCHEMA, "Delivery date")
 
     df["Delivery Date Text"] = parsed_dates.where(
         df["Contacted"].astype(str) == "1"
@@ -40,7 +38,8 @@ def procesar_correos(csv_path, spreadsheet, service):
     # Keep original df for reply rate calculations
     df_original = df.copy()
 
-    df = df.replace([float("inf"), float("-inf")], "")
+    # object antes de fillna(""): los dtypes nullable del schema no aceptan ""
+    df = df.astype(object).replace([float("inf"), float("-inf")], "")
     df = df.fillna("")
     df = df.astype(str)
 
@@ -143,18 +142,17 @@ def _process_reply_rates(df_original, spreadsheet):
     """Calculate reply rates and upload as separate sheets"""
     df_reply = df_original.copy()
 
-    df_reply["delivery_date"] = pd.to_datetime(
-        df_original["Delivery date"],
-        format="%a, %d %b %Y %H:%M:%S",
-        errors="coerce",
+    df_reply["delivery_date"] = parse_date_column(
+        df_original["Delivery date"], EMAIL_SCHEMA, "Delivery date",
     ).dt.date
 
     df_reply["Replied"] = pd.to_numeric(df_reply["Replied"], errors="coerce")
     df_reply["Delivered"] = pd.to_numeric(df_reply["Delivered"], errors="coerce")
     df_reply["Contacted"] = pd.to_numeric(df_reply["Contacted"], errors="coerce")
 
-    df_reply["valid_base"] = (df_reply["Delivered"] == 1) & (df_reply["Contacted"] == 1)
-    df_reply["valid_reply"] = (df_reply["Replied"] == 1) & (df_reply["Contacted"] == 1)
+    # fillna: con flags nullable (Int8) una comparación contra NA da NA, no False
+    df_reply["valid_base"] = ((df_reply["Delivered"] == 1) & (df_reply["Contacted"] == 1)).fillna(False)
+    df_reply["valid_reply"] = ((df_reply["Replied"] == 1) & (df_reply["Contacted"] == 1)).fillna(False)
 
     df_reply["day"] = df_reply["delivery_date"].astype(str)
     df_reply["week"] = df_reply["delivery_date"].apply(
@@ -0,0 +1,190 @@
+"""Registro de schemas de los CSVs que exporta Reply.io.
+
+Todos los lectores de CSVs de Reply.io (crudos por cliente o consolidados)
+pasan por `read_reply_csv` / `iter_reply_csv` con el schema correspondiente,
+en vez de `pd.read_csv(..., low_memory=False)` con tipos inferidos. Así:
+
+  - el parser no tiene que inferir tipos (más rápido, menos memoria);
+  - los tipos no derivan entre clientes ni entre días: `Contact Id` siempre es
+    texto y los flags 0/1 siempre son enteros nullable (nunca `1.0` por NaNs);
+  - las columnas que Reply.io agregue y no estén declaradas se leen como texto.
+
+Las fechas se mantienen como texto al leer (el CSV consolidado debe preservar
+el formato original de Reply.io); `date_formats` declara el formato para los
+que necesitan parsearlas (ver `parse_date_column`).
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas se importa al leer (no al importar el registro): la app web usa los
+# schemas/columnas sin leer CSVs, y así no carga pandas al arrancar.
+
+# Columnas que agrega el consolidador delante de las de Reply.io
+CLIENT_COLUMNS = ["client_id", "client_name"]
+
+TEXT = "str"
+FLAG = "Int8"      # 0/1 nullable
+COUNT = "Int64"    # contadores nullable
+
+
+@dataclass(frozen=True)
+class CsvSchema:
+    """Descripción de un export de Reply.io."""
+    name: str
+    columns: list[str]                          # orden exacto para Tableau Prep (incluye client_*)
+    key: str                                    # columna que identifica una fila dentro de un cliente
+    dtypes: dict[str, str] = field(default_factory=dict)
+    categoricals: frozenset[str] = frozenset()  # columnas de baja cardinalidad
+    date_formats: dict[str, str] = field(default_factory=dict)
+
+    def read_dtypes(self, categorical: bool = False) -> defaultdict:
+        """Mapa de dtypes para `pd.read_csv`. Columnas no declaradas → texto."""
+        mapping = {col: TEXT for col in self.columns}
+        mapping.update(self.dtypes)
+        if categorical:
+            mapping.update({col: "category" for col in self.categoricals})
+        return defaultdict(lambda: TEXT, mapping)
+
+
+PEOPLE_COLUMNS = CLIENT_COLUMNS + [
+    "First Name", "Last Name", "Email", "Title", "Phone", "City", "State",
+    "Country", "Account Name", "TimeZone", "Added On", "Last Touch",
+    "Sequence", "Status", "Opted Out", "InboxCategory", "LinkedIn",
+    "Company size", "Industry", "SalesNavigator", "Opens", "Views",
+    "Deliveries", "Replies", "Bounces", "CurrentStepStatus", "MeetingBooked",
+    "CurrentStep", "CallResolution", "MeetingIntent", "Owner", "Provider",
+    "Replies_by_sms", "Replies_by_LinkedIn", "Domain", "ValidationStatus",
+    "Will Start At", "Subject 1", "Cuerpo 1", "Subject 2", "Cuerpo 2",
+    "Subject 3", "Cuerpo 3", "Subject 4", "Cuerpo 4", "Account Name Subject",
+]
+
+EMAIL_COLUMNS = CLIENT_COLUMNS + [
+    "Contact Id", "Contact First name", "Contact Last name", "Contact email",
+    "Contact country", "Contact company", "Contact industry",
+    "Contact company size", "Email account", "Sequence", "Sequence step",
+    "Subject", "Template", "Contacted", "Do not contact", "Delivered",
+    "Delivery date", "Opened", "Opens", "Replied", "Interested",
+    "Not interested", "Not now", "OptedOut", "Bounced", "AutoReplied",
+    "Forwarded", "OutOfOffice", "Active", "Paused", "Clicked", "Unsorted",
+    "Subject 1", "Cuerpo 1", "Subject 2", "Cuerpo 2", "Subject 3", "Cuerpo 3",
+    "Subject 4", "Cuerpo 4", "Account Name Subject",
+]
+
+PEOPLE_SCHEMA = CsvSchema(
+    name="people",
+    columns=PEOPLE_COLUMNS,
+    key="Email",
+    dtypes={
+        "Opens": COUNT, "Views": COUNT, "Deliveries": COUNT, "Replies": COUNT,
+        "Bounces": COUNT, "Replies_by_sms": COUNT, "Replies_by_LinkedIn": COUNT,
+    },
+    categoricals=frozenset({
+        "client_id", "client_name", "Country", "TimeZone", "Sequence", "Status",
+        "InboxCategory", "Company size", "Industry", "CurrentStepStatus",
+        "CallResolution", "MeetingIntent", "Owner", "Provider", "ValidationStatus",
+    }),
+    date_formats={
+        "Added On": "%m/%d/%Y %I:%M %p",
+        "Last Touch": "%m/%d/%Y %I:%M %p",
+        "Will Start At": "%m/%d/%Y %I:%M %p",
+    },
+)
+
+EMAIL_SCHEMA = CsvSchema(
+    name="email_activity",
+    columns=EMAIL_COLUMNS,
+    key="Contact Id",
+    dtypes={
+        "Contacted": FLAG, "Do not contact": FLAG, "Delivered": FLAG,
+        "Opened": FLAG, "Replied": FLAG, "Interested": FLAG,
+        "Not interested": FLAG, "Not now": FLAG, "OptedOut": FLAG,
+        "Bounced": FLAG, "AutoReplied": FLAG, "Forwarded": FLAG,
+        "OutOfOffice": FLAG, "Active": FLAG, "Paused": FLAG, "Clicked": FLAG,
+        "Unsorted": FLAG, "Opens": COUNT,
+    },
+    categoricals=frozenset({
+        "client_id", "client_name", "Contact country", "Contact industry",
+        "Contact company size", "Email account", "Sequence", "Sequence step",
+    }),
+    date_formats={
+        "Delivery date": "%a, %d %b %Y %H:%M:%S",
+    },
+)
+
+SCHEMAS: dict[str, CsvSchema] = {
+    PEOPLE_SCHEMA.name: PEOPLE_SCHEMA,
+    EMAIL_SCHEMA.name: EMAIL_SCHEMA,
+}
+
+
+def read_reply_csv(
+    path: Path,
+    schema: CsvSchema,
+    usecols: list[str] | None = None,
+    categorical: bool = False,
+) -> "pd.DataFrame":
+    """Lee un CSV de Reply.io (crudo o consolidado) con los tipos del schema.
+
+    `usecols` puede incluir columnas que no estén en el archivo (se ignoran).
+    `categorical=True` lee las columnas de baja cardinalidad como `category`;
+    conviene para agregaciones, no para concatenar clientes.
+
+    Si el archivo trae valores que no encajan con el dtype declarado (ej. texto
+    en un flag), se relee todo como texto y se avisa por log.
+    """
+    import pandas as pd
+
+    kwargs = _read_kwargs(schema, usecols, categorical)
+    try:
+        return pd.read_csv(path, **kwargs)
+    except (ValueError, TypeError) as e:
+        print(f"[schemas] {Path(path).name} no respeta el schema {schema.name} ({e}); leyendo como texto")
+        kwargs["dtype"] = TEXT
+        return pd.read_csv(path, **kwargs)
+
+
+def count_by_client(path: Path, schema: CsvSchema) -> dict[str, int]:
+    """Filas por `client_name` de un CSV consolidado (lee sólo esa columna)."""
+    df = read_reply_csv(path, schema, usecols=["client_name"], categorical=True)
+    return {str(k): int(v) for k, v in df["client_name"].value_counts().items()}
+
+
+def iter_reply_csv(
+    path: Path,
+    schema: CsvSchema,
+    chunksize: int,
+    usecols: list[str] | None = None,
+    as_text: bool = False,
+) -> Iterator["pd.DataFrame"]:
+    """Como `read_reply_csv` pero en chunks de `chunksize` filas.
+
+    `as_text=True` lee todo como texto sin convertir vacíos a NaN: útil para
+    comparar filas textualmente (ej. deltas entre días).
+    """
+    import pandas as pd
+
+    kwargs = _read_kwargs(schema, usecols, categorical=False)
+    if as_text:
+        kwargs["dtype"] = TEXT
+        kwargs["keep_default_na"] = False
+    return pd.read_csv(path, chunksize=chunksize, **kwargs)
+
+
+def parse_date_column(series: "pd.Series", schema: CsvSchema, column: str) -> "pd.Series":
+    """Parsea una columna de fecha con el formato declarado en el schema."""
+    import pandas as pd
+
+    return pd.to_datetime(series, format=schema.date_formats[column], errors="coerce")
+
+
+def _read_kwargs(schema: CsvSchema, usecols: list[str] | None, categorical: bool) -> dict:
+    kwargs: dict = {"dtype": schema.read_dtypes(categorical=categorical)}
+    if usecols is not None:
+        wanted = set(usecols)
+        kwargs["usecols"] = lambda c: c in wanted
+    return kwargs
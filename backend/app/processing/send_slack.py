@@ -7,26 +7,84 @@ Cada destino puede ser:
   - ID de canal/DM/usuario (C.../D.../U...)  → tal cual
 
 Fallback: si SLACK_DESTINATIONS está vacío, usa SLACK_CHANNEL.
+
+Async: los destinos se envían en paralelo sobre un `httpx.AsyncClient`
+compartido (abierto en el lifespan) y los reintentos por rate limit esperan con
+`asyncio.sleep` respetando `Retry-After`, sin congelar el event loop.
 """
-import time
+import asyncio
+from collections import deque
 from pathlib import Path
 
 import httpx
 
+from app import executors, metrics
 from app.config import (
     PUBLIC_BASE_URL,
     SLACK_BOT_TOKEN,
     SLACK_CHANNEL,
     SLACK_DESTINATIONS,
 )
+from app.processing import slack_user_cache
 
 SLACK_API = "https://slack.com/api/chat.postMessage"
 SLACK_LOOKUP = "https://slack.com/api/users.lookupByEmail"
 
-def send_consolidated_slack(
+SLACK_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+SLACK_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60)
+SLACK_POST_ATTEMPTS = 3
+# Espera ante rate limit / error si Slack no manda Retry-After: 30s, 60s
+SLACK_RETRY_BASE_SECONDS = 30
+SLACK_RETRY_AFTER_MAX_SECONDS = 300
+
+_client: httpx.AsyncClient | None = None
+_client_lock = asyncio.Lock()
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Abre el cliente HTTP compartido para Slack (idempotente). Llamar desde el lifespan.
+
+    Se arma en el pool de threads, como el de `siete_api.open_client`.
+    """
+    global _client
+    async with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = await executors.run_io(_build_client)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=SLACK_TIMEOUT,
+        transport=metrics.InstrumentedTransport(httpx.AsyncHTTPTransport(limits=SLACK_LIMITS), service="slack"),
+    )
+
+
+async def _get_client() -> httpx.AsyncClient:
+    if _client is None or _client.is_closed:
+        return await open_client()
+    return _client
+
+
+def _headers() -> dict:
+    return {
+        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
+        "Content-Type": "application/json; charset=utf-8",
+    }
+
+
+async def send_consolidated_slack(
     consolidated: dict[str, Path],
     pending_count: int = 0,
 ) -> None:
+    """Envía el mensaje a todos los destinos en paralelo. Levanta si falló alguno."""
     if not consolidated:
         return
     if not SLACK_BOT_TOKEN:
@@ -38,24 +96,22 @@ def send_consolidated_slack(
         print("[slack] No hay destinos (SLACK_DESTINATIONS/SLACK_CHANNEL vacíos), omitiendo envío")
         return
 
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json; charset=utf-8",
-    }
+    headers = _headers()
     text = _build_message(consolidated, pending_count=pending_count)
 
-    failures = []
-    for raw in destinations:
-        channel = _resolve_destination(raw, headers)
+    async def send_one(raw: str) -> bool:
+        channel = await _resolve_destination(raw, headers)
         if not channel:
-            failures.append(raw)
-            continue
+            return False
         try:
-            _post_with_retry(channel, text, headers, label=raw)
+            await _post_with_retry(channel, text, headers, label=raw)
+            return True
         except Exception as e:
             print(f"[slack] Falló envío a {raw}: {e}")
-            failures.append(raw)
+            return False
 
+    sent = await asyncio.gather(*(send_one(raw) for raw in destinations))
+    failures = [raw for raw, ok in zip(destinations, sent) if not ok]
     if failures:
         raise RuntimeError(f"Slack: falló envío a {failures}")
 
@@ -65,24 +121,46 @@ def _parse_destinations() -> list[str]:
     return [d.strip() for d in raw.replace(";", ",").split(",") if d.strip()]
 
 
-def _resolve_destination(dest: str, headers: dict) -> str | None:
-    """Convierte email → user_id; deja IDs y #canales tal cual."""
+async def _resolve_destination(dest: str, headers: dict) -> str | None:
+    """Convierte email → user_id (con cache persistente); deja IDs y #canales tal cual."""
     if "@" in dest:
+        async def lookup(email: str) -> tuple[str | None, str | None]:
+            return await _lookup_user_id(email, headers)
+
         try:
-            r = httpx.get(SLACK_LOOKUP, params={"email": dest}, headers=headers, timeout=15)
-            data = r.json()
-            if data.get("ok"):
-                return data["user"]["id"]
-            print(f"[slack] lookupByEmail falló para {dest}: {data.get('error')}")
-            return None
-        except httpx.HTTPError as e:
+            return await slack_user_cache.resolve(dest, lookup)
+        except (httpx.HTTPError, ValueError) as e:
             print(f"[slack] lookupByEmail HTTP error para {dest}: {e}")
             return None
     return dest
 
 
-def _post_with_retry(channel: str, text: str, headers: dict, label: str) -> str:
-    """Returns the actual channel ID from the Slack API response (needed for file uploads to DMs)."""
+async def _lookup_user_id(email: str, headers: dict) -> tuple[str | None, str | None]:
+    """`users.lookupByEmail`. Devuelve (user_id, None) o (None, error de Slack).
+
+    Levanta ante errores HTTP o rate limit (transitorios: no deben cachearse).
+    """
+    client = await _get_client()
+    r = await client.get(SLACK_LOOKUP, params={"email": email}, headers=headers, timeout=15)
+    if r.status_code == 429:
+        raise httpx.HTTPStatusError("ratelimited", request=r.request, response=r)
+    data = r.json()
+    if data.get("ok"):
+        return data["user"]["id"], None
+    err = data.get("error", "unknown")
+    metrics.SLACK_API_ERRORS.inc(method="users.lookupByEmail", error=err)
+    print(f"[slack] lookupByEmail falló para {email}: {err}")
+    if err == "ratelimited":
+        raise httpx.HTTPStatusError("ratelimited", request=r.request, response=r)
+    return None, err
+
+
+async def _post_with_retry(channel: str, text: str, headers: dict, label: str) -> str:
+    """Returns the actual channel ID from the Slack API response (needed for file uploads to DMs).
+
+    Reintenta rate limits, service_unavailable y errores HTTP sin bloquear el
+    event loop; si Slack manda `Retry-After` se respeta ese tiempo.
+    """
     payload = {
         "channel": channel,
         "text": text,
@@ -90,28 +168,41 @@ def _post_with_retry(channel: str, text: str, headers: dict, label: str) -> str:
         "unfurl_media": False,
     }
     print(f"[slack] Enviando a {label} (channel={channel})")
-    for attempt in range(3):
+    for attempt in range(SLACK_POST_ATTEMPTS):
+        last = attempt == SLACK_POST_ATTEMPTS - 1
         try:
-            r = httpx.post(SLACK_API, json=payload, headers=headers, timeout=30)
-            data = r.json()
-            if data.get("ok"):
-                actual_channel = data.get("channel", channel)
-                print(f"[slack] Enviado a {label} (actual_channel={actual_channel})")
-                return actual_channel
-            err = data.get("error", "unknown")
-            print(f"[slack] {label} intento {attempt+1}/3 falló: {err}")
-            if err in ("ratelimited", "service_unavailable") and attempt < 2:
-                time.sleep(30 * (attempt + 1))
-                continue
-            raise RuntimeError(f"Slack API error: {err}")
-        except httpx.HTTPError as e:
-            print(f"[slack] {label} intento {attempt+1}/3 error HTTP: {e}")
-            if attempt < 2:
-                time.sleep(30 * (attempt + 1))
-                continue
-            raise
+            client = await _get_client()
+            r = await client.post(SLACK_API, json=payload, headers=headers)
+            data = r.json() if r.status_code != 429 else {"ok": False, "error": "ratelimited"}
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"[slack] {label} intento {attempt+1}/{SLACK_POST_ATTEMPTS} error HTTP: {e}")
+            if last:
+                raise
+            await asyncio.sleep(SLACK_RETRY_BASE_SECONDS * (attempt + 1))
+            continue
+        if data.get("ok"):
+            actual_channel = data.get("channel", channel)
+            print(f"[slack] Enviado a {label} (actual_channel={actual_channel})")
+            return actual_channel
+        err = data.get("error", "unknown")
+        metrics.SLACK_API_ERRORS.inc(method="chat.postMessage", error=err)
+        print(f"[slack] {label} intento {attempt+1}/{SLACK_POST_ATTEMPTS} falló: {err}")
+        if err in ("ratelimited", "service_unavailable") and not last:
+            await asyncio.sleep(_retry_delay(r, attempt))
+            continue
+        raise RuntimeError(f"Slack API error: {err}")
 
 
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Segundos a esperar antes del próximo intento: `Retry-After` si viene, si no backoff lineal."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0), SLACK_RETRY_AFTER_MAX_SECONDS)
+        except ValueError:
+            pass
+    return SLACK_RETRY_BASE_SECONDS * (attempt + 1)
+
 
 def _build_message(consolidated: dict[str, Path], pending_count: int = 0) -> str:
     date_str = _date_from_consolidated(consolidated)
@@ -155,23 +246,92 @@ import os
 _ALERTS_CHANNEL = os.getenv("SLACK_ALERTS_CHANNEL", "C093XM2UV9C")
 
 
-def _post_to_alerts(text: str) -> None:
+# Cola de alertas coalescidas (ver `enqueue_alert`)
+ALERT_COALESCE_SECONDS = 60
+ALERT_QUEUE_MAX = 200
+# Largo máximo de cada mensaje digest (Slack trunca `text` pasado ~40k; 3500 se lee bien)
+ALERT_DIGEST_MAX_CHARS = 3500
+
+_alert_queue: deque[str] = deque(maxlen=ALERT_QUEUE_MAX)
+_alert_state = {"dropped": 0, "flusher": None}
+
+
+def enqueue_alert(text: str) -> None:
+    """Encola una alerta para el canal de alertas sin bloquear al llamador.
+
+    Las alertas que llegan dentro de `ALERT_COALESCE_SECONDS` desde la primera
+    se mandan juntas en un digest. La cola guarda como máximo `ALERT_QUEUE_MAX`
+    alertas (descarta las más viejas y lo avisa en el digest). Llamar
+    `flush_alerts()` al terminar una corrida para no esperar la ventana.
+    """
+    if len(_alert_queue) == _alert_queue.maxlen:
+        _alert_state["dropped"] += 1
+    _alert_queue.append(text)
+    flusher = _alert_state["flusher"]
+    if flusher is None or flusher.done():
+        try:
+            _alert_state["flusher"] = asyncio.get_running_loop().create_task(_flush_after_window())
+        except RuntimeError:
+            # Sin event loop (ej. script sync): queda en cola hasta el próximo flush
+            _alert_state["flusher"] = None
+
+
+async def flush_alerts() -> None:
+    """Manda ya todas las alertas encoladas (uno o varios mensajes digest)."""
+    flusher = _alert_state["flusher"]
+    if flusher is not None and flusher is not asyncio.current_task() and not flusher.done():
+        flusher.cancel()
+    _alert_state["flusher"] = None
+    if not _alert_queue:
+        return
+    alerts = list(_alert_queue)
+    _alert_queue.clear()
+    dropped, _alert_state["dropped"] = _alert_state["dropped"], 0
+    for text in _build_digests(alerts, dropped):
+        await _post_to_alerts(text)
+
+
+async def _flush_after_window() -> None:
+    await asyncio.sleep(ALERT_COALESCE_SECONDS)
+    await flush_alerts()
+
+
+def _build_digests(alerts: list[str], dropped: int) -> list[str]:
+    """Agrupa alertas idénticas (xN) y las parte en mensajes de hasta ALERT_DIGEST_MAX_CHARS."""
+    counts: dict[str, int] = {}
+    for text in alerts:
+        counts[text] = counts.get(text, 0) + 1
+    if len(counts) == 1 and not dropped:
+        text, n = next(iter(counts.items()))
+        return [text if n == 1 else f"{text}\n_(x{n})_"]
+
+    header = f"*🔔 {len(alerts)} alertas*"
+    if dropped:
+        header += f" _(+{dropped} descartadas por límite de cola)_"
+    blocks = [text if n == 1 else f"{text}\n_(x{n})_" for text, n in counts.items()]
+    messages, current = [], header
+    for block in blocks:
+        if len(current) + len(block) + 2 > ALERT_DIGEST_MAX_CHARS and current != header:
+            messages.append(current)
+            current = f"{header} _(cont.)_"
+        current += "\n\n" + block
+    messages.append(current)
+    return messages
+
+
+async def _post_to_alerts(text: str) -> None:
     """Manda un mensaje al canal de alertas. Best-effort, no levanta si falla."""
     if not SLACK_BOT_TOKEN:
         print(f"[slack-alert] SLACK_BOT_TOKEN no configurado, skip: {text[:80]}")
         return
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json; charset=utf-8",
-    }
     try:
-        _post_with_retry(_ALERTS_CHANNEL, text, headers, label=f"alerts/{_ALERTS_CHANNEL}")
+        await _post_with_retry(_ALERTS_CHANNEL, text, _headers(), label=f"alerts/{_ALERTS_CHANNEL}")
     except Exception as e:
         # No relanzar: la alerta es best-effort y el caller no debería abortar por esto.
         print(f"[slack-alert] No se pudo enviar alerta: {e}")
 
 
-def send_reconciliation_alert(pending_count: int, base_url: str) -> None:
+async def send_reconciliation_alert(pending_count: int, base_url: str) -> None:
     """Avisa al canal de alertas que hay clientes pendientes de reconciliación.
 
     No envía nada si pending_count == 0.
@@ -184,10 +344,10 @@ def send_reconciliation_alert(pending_count: int, base_url: str) -> None:
         f"{pending_count} cliente{'s' if pending_count != 1 else ''} Active en Siete sin `team_id`.\n"
         f"Resolvé en {url}"
     )
-    _post_to_alerts(text)
+    await _post_to_alerts(text)
 
 
-def send_siete_down_alert(error: str, endpoint: str) -> None:
+async def send_siete_down_alert(error: str, endpoint: str) -> None:
     """Avisa al canal de alertas que el cron diario abortó por fallo de Siete API."""
     from datetime import datetime, timezone
     ts = datetime.now(timezone.utc).isoformat()
@@ -197,7 +357,7 @@ def send_siete_down_alert(error: str, endpoint: str) -> None:
         f"`error:` {error}\n"
         f"`timestamp:` {ts}"
     )
-    _post_to_alerts(text)
+    await _post_to_alerts(text)
 
 
 def send_workspace_unavailable_alert(
@@ -212,6 +372,8 @@ def send_workspace_unavailable_alert(
     detecta que el workspace activo no coincide con el esperado. El cron sigue
     procesando los demás clientes; este aviso es para que el operador resuelva
     el acceso (churn del cliente o re-invitación del bot al workspace).
+
+    No bloquea: se encola y sale en el digest de alertas (ver `enqueue_alert`).
     """
     text = (
         f"*⚠️ Workspace de Reply.io inaccesible*\n"
@@ -221,4 +383,4 @@ def send_workspace_unavailable_alert(
         f"`motivo:` {reason}\n"
         f"_Revisar si el cliente fue dado de baja o si hay que re-invitar al bot al workspace en Reply.io._"
     )
-    _post_to_alerts(text)
+    enqueue_alert(text)
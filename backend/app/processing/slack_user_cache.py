@@ -0,0 +1,117 @@
+"""Cache persistente de resolución email → user ID de Slack.
+
+`users.lookupByEmail` es una llamada por destino por envío (reporte diario,
+/api/test-slack, alertas) y consume tokens de rate limit de Tier 4. Los IDs
+casi nunca cambian, así que se guardan en `DOWNLOAD_DIR / "slack_user_cache.json"`:
+
+  - Hit positivo: válido `USER_TTL_HOURS`; pasadas `REFRESH_AFTER_HOURS` se
+    sigue usando el ID cacheado y se refresca en background.
+  - Hit negativo (`users_not_found` y otros errores definitivos de Slack):
+    válido `NEGATIVE_TTL_HOURS`, para no repetir el lookup en cada alerta.
+  - Errores transitorios (HTTP, ratelimited) no se cachean.
+
+Mismo patrón best-effort que `discarded_clients.json`: si el archivo está
+corrupto se trata como vacío.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from app.config import DOWNLOAD_DIR
+
+USER_TTL_HOURS = 24 * 30
+REFRESH_AFTER_HOURS = 24
+NEGATIVE_TTL_HOURS = 6
+
+# Errores de Slack que no se arreglan reintentando: se cachean como negativos
+_DEFINITIVE_ERRORS = {"users_not_found", "user_not_found", "invalid_email", "account_inactive"}
+
+_PATH = DOWNLOAD_DIR / "slack_user_cache.json"
+
+# Lookup inyectado por send_slack: email → (user_id | None, error de Slack | None).
+# Levanta en errores transitorios (HTTP, ratelimited).
+Lookup = Callable[[str], Awaitable[tuple[str | None, str | None]]]
+
+_refreshing: dict[str, asyncio.Task] = {}
+
+
+async def resolve(email: str, lookup: Lookup) -> str | None:
+    """User ID de Slack para `email`, usando el cache si está vigente."""
+    key = email.strip().lower()
+    entry = _load().get(key)
+    now = datetime.now(timezone.utc)
+    if entry:
+        age = now - datetime.fromisoformat(entry["resolved_at"])
+        if entry.get("user_id"):
+            if age < timedelta(hours=USER_TTL_HOURS):
+                if age > timedelta(hours=REFRESH_AFTER_HOURS):
+                    _refresh_in_background(key, lookup)
+                return entry["user_id"]
+        elif age < timedelta(hours=NEGATIVE_TTL_HOURS):
+            print(f"[slack-cache] {email}: {entry.get('error')} (cacheado)")
+            return None
+    return await _lookup_and_store(key, lookup)
+
+
+def invalidate(email: str | None = None) -> None:
+    """Borra una entrada (o todo el cache si `email` es None)."""
+    if email is None:
+        _save({})
+        return
+    data = _load()
+    if data.pop(email.strip().lower(), None) is not None:
+        _save(data)
+
+
+def stats() -> dict:
+    data = _load()
+    return {
+        "entries": len(data),
+        "negative": sum(1 for e in data.values() if not e.get("user_id")),
+        "refreshing": len(_refreshing),
+    }
+
+
+async def _lookup_and_store(key: str, lookup: Lookup) -> str | None:
+    user_id, error = await lookup(key)
+    if user_id or error in _DEFINITIVE_ERRORS:
+        data = _load()
+        data[key] = {
+            "user_id": user_id,
+            "error": error,
+            "resolved_at": datetime.now(timezone.utc).isoformat(),
+        }
+        _save(data)
+    return user_id
+
+
+def _refresh_in_background(key: str, lookup: Lookup) -> None:
+    if key in _refreshing:
+        return
+
+    async def refresh():
+        try:
+            await _lookup_and_store(key, lookup)
+        except Exception as e:
+            print(f"[slack-cache] Refresh de {key} falló (se mantiene el ID cacheado): {e}")
+        finally:
+            _refreshing.pop(key, None)
+
+    _refreshing[key] = asyncio.create_task(refresh())
+
+
+def _load() -> dict:
+    if not _PATH.exists():
+        return {}
+    try:
+        return json.loads(_PATH.read_text())
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"[slack-cache] WARN: archivo corrupto en {_PATH} ({e}); tratando como vacío")
+        return {}
+
+
+def _save(data: dict) -> None:
+    tmp = _PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True))
+    tmp.replace(_PATH)
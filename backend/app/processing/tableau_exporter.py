@@ -1,11 +1,17 @@
 """Genera los 3 archivos para Tableau Prep, actualiza el .tflx y publica a Tableau Cloud."""
-import io
+import asyncio
+import copy
+import hashlib
+import json
 import os
+import shutil
+import tempfile
+import time
 import zipfile
+from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
-
+from app import executors, metrics
 from app.config import (
     TFLX_PATH,
     TABLEAU_SERVER_URL,
@@ -13,34 +19,18 @@ from app.config import (
     TABLEAU_PAT_NAME,
     TABLEAU_PAT_SECRET,
 )
+from app.processing.schemas import (
+    EMAIL_COLUMNS,  # noqa: F401  (re-export)
+    EMAIL_SCHEMA,
+    PEOPLE_COLUMNS,  # noqa: F401  (re-export)
+    PEOPLE_SCHEMA,
+    CsvSchema,
+    iter_reply_csv,
+)
+from app.processing.xlsx_writer import xlsx_bytes
 
 # ── Schemas exactos para Tableau Prep ────────────────────────────────────────
-
-PEOPLE_COLUMNS = [
-    "client_id", "client_name",
-    "First Name", "Last Name", "Email", "Title", "Phone", "City", "State",
-    "Country", "Account Name", "TimeZone", "Added On", "Last Touch",
-    "Sequence", "Status", "Opted Out", "InboxCategory", "LinkedIn",
-    "Company size", "Industry", "SalesNavigator", "Opens", "Views",
-    "Deliveries", "Replies", "Bounces", "CurrentStepStatus", "MeetingBooked",
-    "CurrentStep", "CallResolution", "MeetingIntent", "Owner", "Provider",
-    "Replies_by_sms", "Replies_by_LinkedIn", "Domain", "ValidationStatus",
-    "Will Start At", "Subject 1", "Cuerpo 1", "Subject 2", "Cuerpo 2",
-    "Subject 3", "Cuerpo 3", "Subject 4", "Cuerpo 4", "Account Name Subject",
-]
-
-EMAIL_COLUMNS = [
-    "client_id", "client_name",
-    "Contact Id", "Contact First name", "Contact Last name", "Contact email",
-    "Contact country", "Contact company", "Contact industry",
-    "Contact company size", "Email account", "Sequence", "Sequence step",
-    "Subject", "Template", "Contacted", "Do not contact", "Delivered",
-    "Delivery date", "Opened", "Opens", "Replied", "Interested",
-    "Not interested", "Not now", "OptedOut", "Bounced", "AutoReplied",
-    "Forwarded", "OutOfOffice", "Active", "Paused", "Clicked", "Unsorted",
-    "Subject 1", "Cuerpo 1", "Subject 2", "Cuerpo 2", "Subject 3", "Cuerpo 3",
-    "Subject 4", "Cuerpo 4", "Account Name Subject",
-]
+# PEOPLE_COLUMNS / EMAIL_COLUMNS viven en el registro de schemas (app.processing.schemas)
 
 REUNIONES_COLUMNS = [
     "company", "client", "celebration_date", "status", "kdm", "kdm_title",
@@ -51,6 +41,24 @@ REUNIONES_COLUMNS = [
     "prospection_source", "deal_status",
 ]
 
+REUNIONES_DATE_COLUMNS = {"celebration_date", "created_at", "updated_at"}
+
+# XLSX de reuniones ya generados, por fingerprint del payload (ver generate_reuniones_xlsx)
+_XLSX_CACHE: dict[str, bytes] = {}
+_XLSX_CACHE_SIZE = 2
+
+# Filas por chunk al reescribir los CSVs consolidados para el .tflx
+ENFORCE_CHUNK_ROWS = 100_000
+
+# Bloques de lectura al comprimir los reemplazos dentro del .tflx
+_COPY_BUFSIZE = 1024 * 1024
+
+# Seguimiento del run del flujo en Tableau Cloud
+FLOW_RUN_POLL_SECONDS = 30
+FLOW_RUN_TIMEOUT_SECONDS = 3600
+# Consultas seguidas sin estado ("unknown") tras las que se deja de seguir el run
+FLOW_RUN_MAX_UNKNOWN = 3
+
 # Rutas internas en el .tflx (UUID fijos del flujo)
 TFLX_DYNAMIC_PATHS = {
     "Data/2be547a9-184e-4873-ade9-5ef6eb6c497a/people_consolidated.csv": "people",
@@ -61,52 +69,180 @@ TFLX_DYNAMIC_PATHS = {
 
 # ── Funciones de generación ───────────────────────────────────────────────────
 
-def enforce_schema(src_csv: Path, columns: list[str]) -> bytes:
-    """Lee un CSV consolidado, reindexar a las columnas exactas, devuelve bytes."""
-    df = pd.read_csv(src_csv, low_memory=False)
-    df = df.reindex(columns=columns, fill_value="")
-    buf = io.StringIO()
-    df.to_csv(buf, index=False)
-    return buf.getvalue().encode("utf-8")
+def enforce_schema(src_csv: Path, schema: CsvSchema, dest: Path) -> Path:
+    """Reescribe un CSV consolidado con las columnas exactas del schema en `dest`.
+
+    Procesa en chunks (memoria acotada) y sólo parsea las columnas del schema;
+    las extra que traiga el consolidado se descartan sin leerlas. Lee como texto:
+    el consolidado ya tiene los tipos normalizados y acá sólo se reordena.
+    """
+    with open(dest, "w", encoding="utf-8", newline="") as out:
+        chunks = iter_reply_csv(src_csv, schema, chunksize=ENFORCE_CHUNK_ROWS,
+                                usecols=schema.columns, as_text=True)
+        for i, chunk in enumerate(chunks):
+            chunk = chunk.reindex(columns=schema.columns, fill_value="")
+            chunk.to_csv(out, index=False, header=(i == 0))
+    return dest
 
 
 def generate_reuniones_xlsx(meetings: list[dict]) -> bytes:
-    """Genera el XLSX de reuniones con hoja 'Datos' y 27 columnas exactas."""
-    df = pd.DataFrame(meetings, columns=REUNIONES_COLUMNS)
+    """Genera el XLSX de reuniones con hoja 'Datos' y 27 columnas exactas.
+
+    Cacheado por fingerprint del payload: en una misma corrida (bulk, Tableau,
+    send-today) el archivo se arma una sola vez y se reusan los bytes.
+    """
+    fingerprint = meetings_fingerprint(meetings)
+    cached = _XLSX_CACHE.get(fingerprint)
+    if cached is not None:
+        return cached
+    return _cache_xlsx(fingerprint, build_reuniones_xlsx(meetings))
+
+
+async def generate_reuniones_xlsx_async(meetings: list[dict]) -> bytes:
+    """Como `generate_reuniones_xlsx`, para el event loop: el fingerprint corre en
+    el pool de threads y el armado en el de procesos. El cache queda en este proceso."""
+    fingerprint = await executors.run_io(meetings_fingerprint, meetings)
+    cached = _XLSX_CACHE.get(fingerprint)
+    if cached is not None:
+        return cached
+    return _cache_xlsx(fingerprint, await executors.run_cpu(build_reuniones_xlsx, meetings))
+
 
-    # Tipos de fecha/datetime
-    df["celebration_date"] = pd.to_datetime(df["celebration_date"], errors="coerce")
-    df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce")
-    df["updated_at"] = pd.to_datetime(df["updated_at"], errors="coerce")
+def _cache_xlsx(fingerprint: str, data: bytes) -> bytes:
+    while len(_XLSX_CACHE) >= _XLSX_CACHE_SIZE:
+        _XLSX_CACHE.pop(next(iter(_XLSX_CACHE)))
+    _XLSX_CACHE[fingerprint] = data
+    return data
 
-    # Strings vacíos → NaN
-    df = df.replace("", None)
 
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="Datos", index=False)
-    return buf.getvalue()
+def meetings_fingerprint(meetings: list[dict]) -> str:
+    """Hash estable del payload de reuniones (sólo las columnas que van al XLSX)."""
+    h = hashlib.blake2b(digest_size=16)
+    for m in meetings:
+        row = [m.get(col) for col in REUNIONES_COLUMNS]
+        h.update(json.dumps(row, default=str, separators=(",", ":")).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def build_reuniones_xlsx(meetings: list[dict]) -> bytes:
+    """Arma el XLSX con el writer streaming (sin pandas ni modelo de celdas).
+
+    Mismo contenido que el `df.to_excel` original: fechas como datetime (sin
+    timezone; inválidas → vacío), strings vacíos → vacío.
+    """
+    rows = (
+        [
+            _xlsx_datetime(m.get(col)) if col in REUNIONES_DATE_COLUMNS else _xlsx_value(m.get(col))
+            for col in REUNIONES_COLUMNS
+        ]
+        for m in meetings
+    )
+    return xlsx_bytes("Datos", REUNIONES_COLUMNS, rows)
+
+
+def _xlsx_value(value):
+    if value == "":
+        return None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _xlsx_datetime(value) -> datetime | None:
+    """Parsea fechas ISO de Siete. Excel no soporta timezones: se conserva la hora local."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    return dt.replace(tzinfo=None)
+
 
+def update_tflx(tflx_path: Path, replacements: dict[str, Path]) -> None:
+    """Reemplaza los archivos dinámicos en el .tflx (ZIP) usando escritura atómica.
 
-def update_tflx(tflx_path: Path, replacements: dict[str, bytes]) -> None:
-    """Reemplaza los archivos dinámicos en el .tflx (ZIP) usando escritura atómica."""
+    `replacements` mapea la ruta interna del .tflx → archivo en disco con el
+    contenido nuevo. Las entradas que no cambian se copian como stream
+    comprimido crudo (sin descomprimir/recomprimir); los reemplazos se leen
+    del disco en bloques y pasan por el compresor. Tiempo y memoria dependen
+    sólo del tamaño de lo que cambia.
+    """
     tmp_path = tflx_path.with_suffix(".tflx.tmp")
     try:
         with zipfile.ZipFile(tflx_path, "r") as zin, \
              zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zout:
+            spans = _member_spans(zin)
             for item in zin.infolist():
-                if item.filename in replacements:
-                    zout.writestr(item, replacements[item.filename])
+                src = replacements.get(item.filename)
+                if src is not None:
+                    _write_from_disk(zout, item, Path(src))
                 else:
-                    zout.writestr(item, zin.read(item.filename))
+                    _copy_raw(zin, zout, item, spans[item.header_offset])
         os.replace(tmp_path, tflx_path)
     except Exception:
         tmp_path.unlink(missing_ok=True)
         raise
 
 
+def _member_spans(zin: zipfile.ZipFile) -> dict[int, int]:
+    """header_offset → bytes que ocupa la entrada en el ZIP de origen.
+
+    Cada entrada (local header + datos + data descriptor opcional) termina donde
+    empieza la siguiente o, la última, donde empieza el directorio central.
+    """
+    offsets = sorted({i.header_offset for i in zin.infolist()})
+    ends = offsets[1:] + [zin.start_dir]
+    return {start: end - start for start, end in zip(offsets, ends)}
+
+
+def _copy_raw(zin: zipfile.ZipFile, zout: zipfile.ZipFile, item: zipfile.ZipInfo, length: int) -> None:
+    """Copia una entrada tal cual (header local + stream comprimido) sin recomprimir.
+
+    Usa internos de `zipfile` (`fp`, `start_dir`, `filelist`, `NameToInfo`), no
+    API pública: verificado con CPython 3.11 por `scripts/check_tflx_copy.py`
+    (entradas stored, deflated y con data descriptor). Correrlo al subir de versión.
+    """
+    zinfo = copy.copy(item)
+    zout.fp.seek(zout.start_dir)
+    zinfo.header_offset = zout.fp.tell()
+    zin.fp.seek(item.header_offset)
+    remaining = length
+    while remaining:
+        buf = zin.fp.read(min(_COPY_BUFSIZE, remaining))
+        if not buf:
+            raise zipfile.BadZipFile(f"{item.filename}: entrada truncada en el .tflx")
+        zout.fp.write(buf)
+        remaining -= len(buf)
+    # Registrar la entrada para que close() la incluya en el directorio central
+    zout.start_dir = zout.fp.tell()
+    zout.filelist.append(zinfo)
+    zout.NameToInfo[zinfo.filename] = zinfo
+
+
+def _write_from_disk(zout: zipfile.ZipFile, item: zipfile.ZipInfo, src: Path) -> None:
+    """Escribe `src` como entrada `item.filename`, comprimiendo en streaming.
+
+    Conserva `date_time` y `compress_type` de la entrada original.
+    """
+    zinfo = zipfile.ZipInfo(item.filename, date_time=item.date_time)
+    zinfo.compress_type = item.compress_type
+    zinfo.external_attr = item.external_attr
+    zinfo.file_size = src.stat().st_size  # para decidir zip64 de antemano
+    with open(src, "rb") as fin, zout.open(zinfo, "w") as fout:
+        shutil.copyfileobj(fin, fout, _COPY_BUFSIZE)
+
+
 def publish_to_tableau(tflx_path: Path) -> dict:
-    """Publica el .tflx a Tableau Cloud vía TSC y dispara el run del flujo."""
+    """Publica el .tflx a Tableau Cloud vía TSC y dispara el run del flujo.
+
+    Bloqueante (TSC es síncrono): desde código async llamarlo en un worker
+    thread. Además del job_id devuelve el throughput del upload.
+    """
     if not all([TABLEAU_SERVER_URL, TABLEAU_PAT_NAME, TABLEAU_PAT_SECRET]):
         return {"published": False, "job_id": None, "error": "Tableau Cloud no configurado (faltan env vars)"}
 
@@ -120,22 +256,153 @@ def publish_to_tableau(tflx_path: Path) -> dict:
         auth = TSC.PersonalAccessTokenAuth(TABLEAU_PAT_NAME, TABLEAU_PAT_SECRET, TABLEAU_SITE_ID)
         with server.auth.sign_in(auth):
             # Publicar con overwrite
+            upload_bytes = tflx_path.stat().st_size
+            t0 = time.monotonic()
             flow_item = TSC.FlowItem(project_id=None)
             flow_item, _ = server.flows.publish(
                 flow_item,
                 str(tflx_path),
                 TSC.Server.PublishMode.Overwrite,
             )
+            upload_seconds = time.monotonic() - t0
             # Disparar el run
             job = server.flows.run(flow_item)
             job_id = job.id if hasattr(job, "id") else str(job)
-            return {"published": True, "job_id": job_id, "error": None}
+            return {
+                "published": True,
+                "job_id": job_id,
+                "error": None,
+                "upload": {
+                    "bytes": upload_bytes,
+                    "seconds": round(upload_seconds, 2),
+                    "mb_per_s": round(upload_bytes / 1024 / 1024 / upload_seconds, 2) if upload_seconds else None,
+                },
+            }
     except Exception as e:
         return {"published": False, "job_id": None, "error": str(e)}
 
 
+# finish_code de los jobs de Tableau (JobItem.FinishCode)
+_FINISH_CODES = {0: "success", 1: "failed", 2: "cancelled"}
+
+
+def get_flow_run_status(job_id: str) -> dict:
+    """Consulta el estado del run del flujo (job de Tableau). Bloqueante.
+
+    Consulta suelta (sign-in + sign-out); para seguir un run usar `watch_flow_run`,
+    que reusa la sesión.
+
+    Returns: {"state": running|success|failed|cancelled|unknown, "progress", "started_at", "completed_at", "error"}
+    """
+    session = _FlowRunSession()
+    try:
+        return session.status(job_id)
+    finally:
+        session.close()
+
+
+class _FlowRunSession:
+    """Sesión de TSC reusada durante un seguimiento: un sign-in por `watch_flow_run`,
+    no uno por consulta. Se re-autentica sólo si Tableau responde 401 (token vencido).
+
+    Bloqueante: los métodos corren en el pool de `executors.run_io`, de a uno por vez.
+    """
+
+    def __init__(self):
+        self._server = None
+
+    def status(self, job_id: str) -> dict:
+        try:
+            import tableauserverclient as TSC
+        except ImportError:
+            return {"state": "unknown", "error": "tableauserverclient no instalado"}
+
+        try:
+            try:
+                job = self._signed_in(TSC).jobs.get_by_id(job_id)
+            except (TSC.NotSignedInError, TSC.ServerResponseError) as e:
+                if isinstance(e, TSC.ServerResponseError) and not str(e.code).startswith("401"):
+                    raise
+                self._server = None
+                job = self._signed_in(TSC).jobs.get_by_id(job_id)
+        except Exception as e:
+            # ServerResponseError trae saltos de línea y tabs en el mensaje
+            return {"state": "unknown", "error": f"{type(e).__name__}: {' '.join(str(e).split())}"}
+
+        if job.completed_at is None:
+            state = "running"
+        else:
+            state = _FINISH_CODES.get(int(job.finish_code), "unknown")
+        return {
+            "state": state,
+            "progress": job.progress,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+            "error": None,
+        }
+
+    def _signed_in(self, TSC):
+        if self._server is None:
+            server = TSC.Server(TABLEAU_SERVER_URL, use_server_version=True)
+            server.auth.sign_in(TSC.PersonalAccessTokenAuth(TABLEAU_PAT_NAME, TABLEAU_PAT_SECRET, TABLEAU_SITE_ID))
+            self._server = server
+        return self._server
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.auth.sign_out()
+            except Exception as e:
+                print(f"[tableau] sign-out falló: {e}")
+            self._server = None
+
+
+async def watch_flow_run(
+    job_id: str,
+    on_status=None,
+    interval: float = FLOW_RUN_POLL_SECONDS,
+    timeout: float = FLOW_RUN_TIMEOUT_SECONDS,
+) -> dict:
+    """Sigue el run del flujo hasta que termina (o `timeout`), sin bloquear el loop.
+
+    Cada consulta a Tableau corre en un worker thread con una sola sesión TSC
+    para todo el seguimiento; `on_status(status)` se llama con cada estado
+    observado. Tras `FLOW_RUN_MAX_UNKNOWN` consultas seguidas en "unknown"
+    (job inexistente, PAT revocado, Tableau caído) deja de consultar y devuelve
+    ese estado con el último error. Devuelve el último estado.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    session = _FlowRunSession()
+    unknown_streak = 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            status = await executors.run_io(session.status, job_id)
+            metrics.TABLEAU_SECONDS.observe(
+                time.perf_counter() - t0, operation="flow_run_status",
+                outcome="error" if status.get("error") and status["state"] == "unknown" else "ok",
+            )
+            if on_status:
+                on_status(status)
+            if status["state"] not in ("running", "unknown"):
+                return status
+            unknown_streak = unknown_streak + 1 if status["state"] == "unknown" else 0
+            if unknown_streak >= FLOW_RUN_MAX_UNKNOWN:
+                print(f"[tableau] Run {job_id}: {unknown_streak} consultas sin estado, dejo de seguirlo ({status.get('error')})")
+                return {**status, "consecutive_unknown": unknown_streak}
+            if loop.time() >= deadline:
+                return {**status, "state": "timeout"}
+            await asyncio.sleep(interval)
+    finally:
+        await executors.run_io(session.close)
+
+
 # ── Orquestador principal ─────────────────────────────────────────────────────
 
+_tflx_lock = asyncio.Lock()
+
+
 async def run_tableau_export(
     consolidated: dict[str, Path],
     meetings: list[dict],
@@ -147,11 +414,14 @@ async def run_tableau_export(
       3. update_tflx
       4. publish_to_tableau
 
+    Los pasos son síncronos (pandas, zipfile, TSC) y corren en worker threads
+    para no bloquear el event loop.
+
     Args:
         consolidated: {"people": Path, "email_activity": Path} — salida del consolidador
         meetings: lista de dicts de fetch_all_meetings()
 
-    Returns: dict con status de cada paso
+    Returns: dict con status de cada paso (+ "tableau_job_id" y "upload" si se publicó)
     """
     result: dict = {
         "people_schema": None,
@@ -172,58 +442,91 @@ async def run_tableau_export(
         result["tableau_publish"] = "skipped: .tflx no encontrado"
         return result
 
-    replacements: dict[str, bytes] = {}
-
-    # Paso 1: schema enforcement en CSVs
-    people_path = consolidated.get("people")
-    if people_path and Path(people_path).exists():
-        try:
-            replacements[_key("people")] = enforce_schema(people_path, PEOPLE_COLUMNS)
-            result["people_schema"] = "ok"
-        except Exception as e:
-            result["people_schema"] = f"error: {e}"
+    # Pasos 1-4 bajo un lock: update_tflx reescribe TFLX_PATH (y su .tflx.tmp) in-place
+    async with _tflx_lock:
+        updated = await executors.run_io(_update_tflx_steps, tflx_path, consolidated, meetings, result)
+        if not updated:
+            return result
+
+        # Paso 4: publicar a Tableau Cloud
+        t0 = time.perf_counter()
+        pub = await executors.run_io(publish_to_tableau, tflx_path)
+    metrics.TABLEAU_SECONDS.observe(
+        time.perf_counter() - t0, operation="publish", outcome="ok" if pub["published"] else "error",
+    )
+    if pub["published"]:
+        result["tableau_publish"] = f"ok (job_id={pub['job_id']})"
+        result["tableau_job_id"] = pub["job_id"]
+        result["upload"] = pub.get("upload")
     else:
-        result["people_schema"] = "skipped: sin archivo de personas"
+        result["tableau_publish"] = f"error: {pub['error']}"
 
-    email_path = consolidated.get("email_activity")
-    if email_path and Path(email_path).exists():
-        try:
-            replacements[_key("email_activity")] = enforce_schema(email_path, EMAIL_COLUMNS)
-            result["email_schema"] = "ok"
-        except Exception as e:
-            result["email_schema"] = f"error: {e}"
-    else:
-        result["email_schema"] = "skipped: sin archivo de actividad"
+    return result
 
-    # Paso 2: generar reuniones xlsx
-    try:
-        replacements[_key("reuniones")] = generate_reuniones_xlsx(meetings)
-        result["reuniones_xlsx"] = f"ok ({len(meetings)} reuniones)"
-    except Exception as e:
-        result["reuniones_xlsx"] = f"error: {e}"
 
-    if not replacements:
-        result["tflx_update"] = "skipped: sin archivos para reemplazar"
-        result["tableau_publish"] = "skipped"
-        return result
+def _update_tflx_steps(
+    tflx_path: Path,
+    consolidated: dict[str, Path],
+    meetings: list[dict],
+    result: dict,
+) -> bool:
+    """Pasos 1-3 del export (síncronos). Anota cada paso en `result`.
 
-    # Paso 3: actualizar .tflx
-    try:
-        update_tflx(tflx_path, replacements)
-        result["tflx_update"] = "ok"
-    except Exception as e:
-        result["tflx_update"] = f"error: {e}"
-        result["tableau_publish"] = "skipped: fallo el update del .tflx"
-        return result
+    Devuelve True si el .tflx quedó actualizado y se puede publicar.
+    """
+    # Los reemplazos se escriben a disco junto al .tflx y update_tflx los
+    # comprime en streaming; el directorio se borra al terminar.
+    with tempfile.TemporaryDirectory(dir=tflx_path.parent, prefix=".tflx_staging_") as staging_dir:
+        staging = Path(staging_dir)
+        replacements: dict[str, Path] = {}
+
+        # Paso 1: schema enforcement en CSVs
+        people_path = consolidated.get("people")
+        if people_path and Path(people_path).exists():
+            try:
+                replacements[_key("people")] = enforce_schema(
+                    people_path, PEOPLE_SCHEMA, staging / "people_consolidated.csv")
+                result["people_schema"] = "ok"
+            except Exception as e:
+                result["people_schema"] = f"error: {e}"
+        else:
+            result["people_schema"] = "skipped: sin archivo de personas"
+
+        email_path = consolidated.get("email_activity")
+        if email_path and Path(email_path).exists():
+            try:
+                replacements[_key("email_activity")] = enforce_schema(
+                    email_path, EMAIL_SCHEMA, staging / "email_activity_consolidated.csv")
+                result["email_schema"] = "ok"
+            except Exception as e:
+                result["email_schema"] = f"error: {e}"
+        else:
+            result["email_schema"] = "skipped: sin archivo de actividad"
+
+        # Paso 2: generar reuniones xlsx
+        try:
+            xlsx_path = staging / "REUNIONES_GLOBAL.xlsx"
+            xlsx_path.write_bytes(generate_reuniones_xlsx(meetings))
+            replacements[_key("reuniones")] = xlsx_path
+            result["reuniones_xlsx"] = f"ok ({len(meetings)} reuniones)"
+        except Exception as e:
+            result["reuniones_xlsx"] = f"error: {e}"
 
-    # Paso 4: publicar a Tableau Cloud
-    pub = publish_to_tableau(tflx_path)
-    if pub["published"]:
-        result["tableau_publish"] = f"ok (job_id={pub['job_id']})"
-    else:
-        result["tableau_publish"] = f"error: {pub['error']}"
+        if not replacements:
+            result["tflx_update"] = "skipped: sin archivos para reemplazar"
+            result["tableau_publish"] = "skipped"
+            return False
 
-    return result
+        # Paso 3: actualizar .tflx
+        try:
+            update_tflx(tflx_path, replacements)
+            result["tflx_update"] = "ok"
+        except Exception as e:
+            result["tflx_update"] = f"error: {e}"
+            result["tableau_publish"] = "skipped: fallo el update del .tflx"
+            return False
+
+    return True
 
 
 def _key(name: str) -> str:
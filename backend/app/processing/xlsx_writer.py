@@ -0,0 +1,172 @@
+"""Writer XLSX mínimo, write-only y en streaming.
+
+Escribe una sola hoja fila a fila directo al ZIP, sin modelo de celdas en
+memoria (a diferencia de openpyxl, incluso en su modo write-only, que serializa
+cada celda como un elemento XML). Pensado para exports tabulares planos como
+REUNIONES_GLOBAL.xlsx: strings como inline strings, números, booleanos y
+datetimes (sin timezone) con formato de fecha.
+"""
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from typing import IO, Iterable
+from xml.sax.saxutils import escape
+
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Caracteres de control que XML 1.0 no admite
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Filas XML acumuladas antes de cada write al ZIP
+_ROWS_PER_WRITE = 1000
+
+# Estilos: 0 = default, 1 = datetime (numFmt 164), 2 = fecha (numFmt 14)
+_STYLE_DATETIME = 1
+_STYLE_DATE = 2
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd h:mm:ss"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_SHEET_FOOTER = '</sheetData></worksheet>'
+
+
+def write_xlsx(
+    fileobj: IO[bytes],
+    sheet_name: str,
+    header: list[str],
+    rows: Iterable[Iterable],
+) -> None:
+    """Escribe un XLSX de una hoja en `fileobj` consumiendo `rows` en streaming.
+
+    Tipos soportados por celda: None (vacía), str, int, float, bool,
+    datetime/date (naive). Cualquier otro valor se escribe como `str(value)`.
+    """
+    letters = [_column_letter(i) for i in range(len(header))]
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as out:
+            pending = [_SHEET_HEADER, _row_xml(1, header, letters)]
+            for n, row in enumerate(rows, 2):
+                pending.append(_row_xml(n, row, letters))
+                if len(pending) >= _ROWS_PER_WRITE:
+                    out.write("".join(pending).encode("utf-8"))
+                    pending.clear()
+            pending.append(_SHEET_FOOTER)
+            out.write("".join(pending).encode("utf-8"))
+
+
+def xlsx_bytes(sheet_name: str, header: list[str], rows: Iterable[Iterable]) -> bytes:
+    """Como `write_xlsx`, devolviendo los bytes del archivo."""
+    buf = io.BytesIO()
+    write_xlsx(buf, sheet_name, header, rows)
+    return buf.getvalue()
+
+
+def _row_xml(n: int, values: Iterable, letters: list[str]) -> str:
+    cells = []
+    for letter, value in zip(letters, values):
+        if value is None:
+            continue
+        ref = f"{letter}{n}"
+        if isinstance(value, bool):
+            cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            if value != value or value in (float("inf"), float("-inf")):  # NaN / inf → vacía
+                continue
+            cells.append(f'<c r="{ref}"><v>{value!r}</v></c>')
+        elif isinstance(value, datetime):
+            cells.append(f'<c r="{ref}" s="{_STYLE_DATETIME}"><v>{_excel_serial(value)!r}</v></c>')
+        elif isinstance(value, date):
+            serial = (value - _EXCEL_EPOCH.date()).days
+            cells.append(f'<c r="{ref}" s="{_STYLE_DATE}"><v>{serial}</v></c>')
+        else:
+            text = _ILLEGAL_XML_CHARS.sub("", str(value))
+            space = ' xml:space="preserve"' if text != text.strip() else ""
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>')
+    return f'<row r="{n}">{"".join(cells)}</row>'
+
+
+def _excel_serial(dt: datetime) -> float:
+    delta = dt.replace(tzinfo=None) - _EXCEL_EPOCH
+    return delta.days + (delta.seconds + delta.microseconds / 1_000_000) / 86400
+
+
+def _column_letter(index: int) -> str:
+    """0 → A, 25 → Z, 26 → AA."""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _workbook_xml(sheet_name: str) -> str:
+    name = escape(sheet_name, {'"': "&quot;"})
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
@@ -6,7 +6,6 @@ Reply.io se scrapea live cuando la UI lo pide.
 import os
 from typing import Iterable
 
-from app.scraper.reply_io import fetch_workspaces
 from app.siete_api import _is_excluded
 from app.utils.slug import slug
 
@@ -17,6 +16,7 @@ async def fetch_reply_workspaces_live() -> list[dict] | None:
     Estructura: [{"name": str, "team_id": int}]
     """
     from app.config import REPLY_IO_EMAIL, REPLY_IO_PASSWORD
+    from app.scraper.reply_io import fetch_workspaces
 
     headless = os.getenv("HEADLESS", "true").lower() != "false"
     workspaces = await fetch_workspaces(
@@ -0,0 +1,318 @@
+"""Retención de archivos en DOWNLOAD_DIR: manifest, políticas por clase y presupuesto de disco.
+
+El cleanup horario recorría todo DOWNLOAD_DIR (`rglob` + `stat` por archivo) y
+borraba por edad con una sola regla. Ahora:
+
+  - Manifest (`DOWNLOAD_DIR / "retention.sqlite"`): una fila por archivo con
+    clase, tamaño y mtime. El pipeline registra lo que produce (`register`) y
+    cada `RETENTION_RESCAN_HOURS` un recorrido con `os.scandir` (`scan`)
+    reconcilia el manifest con el disco (archivos escritos por otros caminos,
+    borrados a mano, etc.).
+  - Sweep horario (`sweep`): borra desde el manifest lo vencido según la
+    política de su clase y, si el total supera `RETENTION_DISK_BUDGET_MB`,
+    desaloja por prioridad de clase y del más viejo al más nuevo. Antes de
+    borrar re-statea sólo ese archivo: si cambió desde que se registró, se
+    actualiza la fila en vez de borrarlo.
+
+Clases (por ubicación y nombre, ver `classify`):
+
+    raw            CSVs de Reply.io por cliente ({client_id}/...)
+    consolidated   consolidated/*_consolidated_*.csv
+    compressed     copias .csv.gz / .csv.zst de los consolidados
+    delta          consolidated/*_delta_*.csv
+    reuniones      consolidated/reuniones_*.xlsx
+    index          sidecars .index.json (histórico de /api/client-stats)
+    job_events     job_events/{job_id}.jsonl
+    state          SQLite, .tflx y JSON de estado en la raíz: nunca se borran
+    other          el resto
+
+Los días por clase se pueden cambiar con `RETENTION_DAYS` ("raw=2,consolidated=30").
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import Iterable, Iterator
+
+from app import metrics
+from app.config import DOWNLOAD_DIR, RETENTION_DAYS, RETENTION_DISK_BUDGET_MB
+
+RETENTION_RESCAN_HOURS = 6
+# El presupuesto nunca desaloja archivos más nuevos que esto (la corrida en curso o recién terminada)
+BUDGET_MIN_AGE_HOURS = 12
+
+
+@dataclass(frozen=True)
+class Policy:
+    max_age_days: float | None  # None = sin vencimiento por edad
+    evict_priority: int | None  # orden de desalojo por presupuesto (menor primero); None = nunca
+
+
+POLICIES: dict[str, Policy] = {
+    "raw": Policy(2, 0),
+    "compressed": Policy(2, 1),
+    "delta": Policy(2, 2),
+    "job_events": Policy(7, 3),
+    "other": Policy(2, 4),
+    "reuniones": Policy(2, 5),
+    "consolidated": Policy(2, 6),
+    "index": Policy(400, None),
+    "state": Policy(None, None),
+}
+
+_STATE_SUFFIXES = {".tflx", ".sqlite", ".sqlite-wal", ".sqlite-shm"}
+_COMPRESSED_SUFFIXES = {".gz", ".zst"}
+
+_PATH = DOWNLOAD_DIR / "retention.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY, class TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_class_mtime ON artifacts (class, mtime);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_last_sweep: dict = {}
+
+
+def classify(rel: PurePosixPath) -> str:
+    """Clase de retención de un archivo, por su path relativo a DOWNLOAD_DIR."""
+    name = rel.name
+    if name.endswith(".index.json"):
+        return "index"
+    if rel.suffix in _STATE_SUFFIXES or (len(rel.parts) == 1 and rel.suffix == ".json"):
+        return "state"
+    top = rel.parts[0] if len(rel.parts) > 1 else ""
+    if top == "job_events":
+        return "job_events"
+    if top == "consolidated":
+        if rel.suffix in _COMPRESSED_SUFFIXES:
+            return "compressed"
+        if "_delta_" in name:
+            return "delta"
+        if name.startswith("reuniones_"):
+            return "reuniones"
+        if "_consolidated_" in name:
+            return "consolidated"
+        return "other"
+    return "raw" if top else "other"
+
+
+def policies() -> dict[str, Policy]:
+    """`POLICIES` con los días pisados por `RETENTION_DAYS` (parseado una vez, al importar)."""
+    return dict(_EFFECTIVE_POLICIES)
+
+
+def _parse_policies(spec: str) -> dict[str, Policy]:
+    """Aplica `spec` ("clase=días,...") sobre `POLICIES`; los valores inválidos se avisan y se ignoran."""
+    out = dict(POLICIES)
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        cls, _, days = item.partition("=")
+        cls = cls.strip()
+        if cls not in out or cls == "state":
+            print(f"[retention] WARN: clase desconocida o fija en RETENTION_DAYS: {cls!r}")
+            continue
+        try:
+            out[cls] = Policy(float(days), out[cls].evict_priority)
+        except ValueError:
+            print(f"[retention] WARN: días inválidos en RETENTION_DAYS para {cls}: {days!r}")
+    return out
+
+
+_EFFECTIVE_POLICIES = _parse_policies(RETENTION_DAYS)
+
+
+def register(paths: Iterable[Path | None]) -> int:
+    """Agrega (o actualiza) archivos producidos al manifest. Ignora los que no existen."""
+    rows = []
+    for path in paths:
+        if path is None:
+            continue
+        rel = _relative(Path(path))
+        if rel is None:
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        rows.append((rel.as_posix(), classify(rel), st.st_size, st.st_mtime))
+    if not rows:
+        return 0
+    try:
+        with _db() as conn:
+            conn.executemany("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?)", rows)
+    except sqlite3.Error as e:
+        print(f"[retention] No se pudieron registrar {len(rows)} archivos: {e}")
+        return 0
+    return len(rows)
+
+
+def scan() -> int:
+    """Recorre DOWNLOAD_DIR con `os.scandir` y reemplaza el manifest por lo que hay en disco."""
+    rows = []
+    stack = [DOWNLOAD_DIR]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        rel = PurePosixPath(Path(entry.path).relative_to(DOWNLOAD_DIR).as_posix())
+                        rows.append((rel.as_posix(), classify(rel), st.st_size, st.st_mtime))
+                except OSError:
+                    continue
+    with _db() as conn:
+        conn.execute("DELETE FROM artifacts")
+        conn.executemany("INSERT INTO artifacts VALUES (?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_scan', ?)", (str(time.time()),))
+    return len(rows)
+
+
+def sweep(now: float | None = None) -> dict:
+    """Borra lo vencido por clase y desaloja hasta entrar en el presupuesto.
+
+    Returns: {"scanned", "expired", "evicted", "freed_bytes", "total_bytes", "over_budget"}
+    """
+    now = now or time.time()
+    result = {"scanned": False, "expired": 0, "evicted": 0, "freed_bytes": 0,
+              "total_bytes": 0, "over_budget": False}
+    if _scan_due(now):
+        n = scan()
+        result["scanned"] = True
+        print(f"[retention] Manifest reconciliado con el disco: {n} archivos")
+
+    policy_by_class = policies()
+    with _db() as conn:
+        for cls, policy in policy_by_class.items():
+            if policy.max_age_days is None:
+                continue
+            cutoff = now - policy.max_age_days * 86400
+            rows = conn.execute(
+                "SELECT path FROM artifacts WHERE class = ? AND mtime < ?", (cls, cutoff),
+            ).fetchall()
+            for (rel,) in rows:
+                freed = _delete(conn, rel, cls, cutoff, reason="expired")
+                if freed is not None:
+                    result["expired"] += 1
+                    result["freed_bytes"] += freed
+
+        budget = RETENTION_DISK_BUDGET_MB * 1024 * 1024
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if budget and total > budget:
+            evictable = {c: p.evict_priority for c, p in policy_by_class.items() if p.evict_priority is not None}
+            cutoff = now - BUDGET_MIN_AGE_HOURS * 3600
+            candidates = conn.execute(
+                f"SELECT path, class, size FROM artifacts WHERE class IN ({','.join('?' * len(evictable))})"
+                " AND mtime < ? ORDER BY mtime",
+                (*evictable, cutoff),
+            ).fetchall()
+            candidates.sort(key=lambda row: evictable[row[1]])  # estable: por clase, luego más viejo
+            for rel, cls, size in candidates:
+                if total <= budget:
+                    break
+                freed = _delete(conn, rel, cls, cutoff, reason="budget")
+                if freed is not None:
+                    result["evicted"] += 1
+                    result["freed_bytes"] += freed
+                    total -= size
+            if total > budget:
+                result["over_budget"] = True
+                print(f"[retention] WARN: {total / 1024 / 1024:.0f} MB en disco supera el presupuesto"
+                      f" de {RETENTION_DISK_BUDGET_MB} MB sin más archivos desalojables")
+        result["total_bytes"] = total
+
+    _last_sweep.clear()
+    _last_sweep.update(result, at=datetime.now(timezone.utc).isoformat())
+    return result
+
+
+def stats() -> dict:
+    """Uso por clase según el manifest, políticas y resultado del último sweep."""
+    try:
+        with _db() as conn:
+            by_class = {
+                cls: {"files": n, "bytes": size, "oldest_mtime": _iso(oldest)}
+                for cls, n, size, oldest in conn.execute(
+                    "SELECT class, COUNT(*), SUM(size), MIN(mtime) FROM artifacts GROUP BY class"
+                )
+            }
+            last_scan = conn.execute("SELECT value FROM meta WHERE key = 'last_scan'").fetchone()
+    except sqlite3.Error as e:
+        print(f"[retention] Error leyendo {_PATH.name}: {e}")
+        return {"error": str(e)}
+    return {
+        "total_bytes": sum(c["bytes"] for c in by_class.values()),
+        "budget_mb": RETENTION_DISK_BUDGET_MB or None,
+        "by_class": by_class,
+        "policies": {c: {"max_age_days": p.max_age_days, "evict_priority": p.evict_priority}
+                     for c, p in policies().items()},
+        "last_scan": _iso(float(last_scan[0])) if last_scan else None,
+        "last_sweep": dict(_last_sweep) or None,
+    }
+
+
+# ── Internos ──────────────────────────────────────────────────────────────────
+
+@contextmanager
+def _db() -> Iterator[sqlite3.Connection]:
+    conn = sqlite3.connect(_PATH)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _relative(path: Path) -> PurePosixPath | None:
+    try:
+        return PurePosixPath(path.resolve().relative_to(DOWNLOAD_DIR.resolve()).as_posix())
+    except ValueError:
+        return None  # fuera de DOWNLOAD_DIR (ej. TFLX_PATH): no es nuestro
+
+
+def _delete(conn: sqlite3.Connection, rel: str, cls: str, cutoff: float, reason: str) -> int | None:
+    """Borra el archivo si sigue siendo más viejo que `cutoff`. Returns: bytes liberados o None."""
+    path = DOWNLOAD_DIR / rel
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        conn.execute("DELETE FROM artifacts WHERE path = ?", (rel,))
+        return None
+    if st.st_mtime >= cutoff:  # reescrito desde que se registró
+        conn.execute("UPDATE artifacts SET size = ?, mtime = ? WHERE path = ?", (st.st_size, st.st_mtime, rel))
+        return None
+    try:
+        path.unlink()
+    except OSError as e:
+        print(f"[retention] No se pudo borrar {rel}: {e}")
+        return None
+    conn.execute("DELETE FROM artifacts WHERE path = ?", (rel,))
+    metrics.RETENTION_DELETED.inc(artifact_class=cls, reason=reason)
+    metrics.RETENTION_FREED_BYTES.inc(st.st_size, artifact_class=cls, reason=reason)
+    return st.st_size
+
+
+def _scan_due(now: float) -> bool:
+    try:
+        with _db() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'last_scan'").fetchone()
+    except sqlite3.Error:
+        return True
+    return row is None or now - float(row[0]) > RETENTION_RESCAN_HOURS * 3600
+
+
+def _iso(ts: float | None) -> str | None:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
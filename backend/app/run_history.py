@@ -0,0 +1,291 @@
+"""Historial de corridas del pipeline bulk y del cron diario (SQLite).
+
+Reemplaza a `last_run_summary.json` y `last_cron_run.json`, que sólo guardaban
+la última corrida. En `DOWNLOAD_DIR / "run_history.sqlite"`:
+
+  - runs: una fila por corrida de `_run_bulk_pipeline` (manual, cron o local)
+    con estado, duración, conteos y el resumen completo (lo que devuelve
+    `/api/last-run`).
+  - run_clients: una fila por cliente y corrida: estado, error, segundos de
+    scrape, intentos, filas y bytes en los consolidados. Indexada por
+    (client_id, date) para las tendencias.
+  - cron_runs: el `CronRunReport` de cada corrida del cron.
+
+Best-effort como el resto de la persistencia: un error de SQLite se logea y no
+corta el pipeline. Las funciones son sincrónicas: desde código async llamarlas
+por `executors.run_io`. El schema se crea una vez por proceso (primer uso) y
+`init()` marca `interrupted` las corridas que un proceso anterior dejó `running`. Las filas de más de `HISTORY_RETENTION_DAYS` se borran al
+guardar una corrida nueva.
+"""
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterator
+
+from app.config import DOWNLOAD_DIR
+from app.utils.dates import today_peru
+
+HISTORY_RETENTION_DAYS = 400
+
+_PATH = DOWNLOAD_DIR / "run_history.sqlite"
+# Archivos que guardaban sólo la última corrida; se leen si el historial está vacío
+_LEGACY_RUN_SUMMARY = DOWNLOAD_DIR / "last_run_summary.json"
+_LEGACY_CRON_REPORT = DOWNLOAD_DIR / "last_cron_run.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY, trigger TEXT, date TEXT NOT NULL, started_at TEXT NOT NULL,
+    finished_at TEXT, duration_s REAL, status TEXT NOT NULL,
+    clients_total INTEGER, clients_ok INTEGER, clients_failed INTEGER,
+    error TEXT, summary TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_date ON runs (date);
+CREATE TABLE IF NOT EXISTS run_clients (
+    run_id TEXT NOT NULL, client_id TEXT NOT NULL, client_name TEXT, date TEXT NOT NULL,
+    status TEXT NOT NULL, error TEXT, scrape_seconds REAL, attempts INTEGER,
+    people_rows INTEGER, people_bytes INTEGER, email_rows INTEGER, email_bytes INTEGER,
+    PRIMARY KEY (run_id, client_id)
+);
+CREATE INDEX IF NOT EXISTS run_clients_client_date ON run_clients (client_id, date);
+CREATE INDEX IF NOT EXISTS run_clients_date ON run_clients (date);
+CREATE TABLE IF NOT EXISTS cron_runs (
+    started_at TEXT PRIMARY KEY, finished_at TEXT, error TEXT, report TEXT NOT NULL
+);
+"""
+
+
+_schema_ready = False
+
+
+def path():
+    return _PATH
+
+
+def init() -> None:
+    """Marca como `interrupted` las corridas que un proceso anterior dejó `running`."""
+    try:
+        with _db() as conn:
+            rows = conn.execute("SELECT id, summary FROM runs WHERE status = 'running'").fetchall()
+            for run_id, raw in rows:
+                summary = {**json.loads(raw or "{}"), "status": "interrupted"}
+                summary["error"] = summary.get("error") or "proceso reiniciado"
+                conn.execute(
+                    "UPDATE runs SET status = ?, error = ?, summary = ? WHERE id = ?",
+                    (summary["status"], summary["error"], json.dumps(summary, default=str), run_id),
+                )
+        if rows:
+            print(f"[run-history] {len(rows)} corrida(s) de un proceso anterior marcadas como interrupted")
+    except sqlite3.Error as e:
+        print(f"[run-history] No se pudo inicializar {_PATH.name}: {e}")
+
+
+def save_run(summary: dict) -> None:
+    """Upsert de una corrida a partir del run summary de `_run_bulk_pipeline`.
+
+    `summary` necesita "run_id", "date", "started_at" y "clients" (lista de
+    dicts con "client_id", "name", "status" y opcionalmente "error",
+    "scrape_seconds", "attempts", "people_rows", "people_bytes",
+    "email_rows", "email_bytes"). Se puede llamar varias veces durante la
+    corrida: cada llamada reemplaza la anterior.
+    """
+    run_id = summary["run_id"]
+    clients = summary.get("clients", [])
+    try:
+        with _db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id, summary.get("trigger"), summary["date"], summary["started_at"],
+                    summary.get("finished_at"), summary.get("duration_s"), summary.get("status", "running"),
+                    summary.get("total"), summary.get("ok_count"), summary.get("failed_count"),
+                    summary.get("error"), json.dumps(summary, default=str),
+                ),
+            )
+            conn.execute("DELETE FROM run_clients WHERE run_id = ?", (run_id,))
+            conn.executemany(
+                "INSERT INTO run_clients VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id, c.get("client_id") or c["name"], c["name"], summary["date"],
+                        c["status"], c.get("error"), c.get("scrape_seconds"), c.get("attempts"),
+                        c.get("people_rows"), c.get("people_bytes"), c.get("email_rows"), c.get("email_bytes"),
+                    )
+                    for c in clients
+                ],
+            )
+            if summary.get("finished_at"):
+                _prune(conn)
+    except sqlite3.Error as e:
+        print(f"[run-history] No se pudo guardar la corrida {run_id}: {e}")
+
+
+def save_cron_report(report: dict) -> None:
+    try:
+        with _db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cron_runs VALUES (?, ?, ?, ?)",
+                (report["started_at"], report.get("finished_at"), report.get("error"),
+                 json.dumps(report, ensure_ascii=False, default=str)),
+            )
+    except sqlite3.Error as e:
+        print(f"[run-history] No se pudo guardar el cron run {report.get('started_at')}: {e}")
+
+
+def last_run() -> dict | None:
+    """Resumen de la última corrida (formato de `/api/last-run`)."""
+    rows = _query("SELECT summary FROM runs ORDER BY started_at DESC LIMIT 1")
+    if rows:
+        return json.loads(rows[0][0])
+    return _read_legacy(_LEGACY_RUN_SUMMARY)
+
+
+def last_cron_run() -> dict | None:
+    rows = _query("SELECT report FROM cron_runs ORDER BY started_at DESC LIMIT 1")
+    if rows:
+        return json.loads(rows[0][0])
+    return _read_legacy(_LEGACY_CRON_REPORT)
+
+
+def list_runs(days: int = 30) -> list[dict]:
+    """Corridas de los últimos `days` días, de la más reciente a la más vieja (sin detalle por cliente)."""
+    rows = _query(
+        "SELECT id, trigger, date, started_at, finished_at, duration_s, status,"
+        " clients_total, clients_ok, clients_failed, error"
+        " FROM runs WHERE date >= ? ORDER BY started_at DESC",
+        (_since(days),),
+    )
+    keys = ("run_id", "trigger", "date", "started_at", "finished_at", "duration_s", "status",
+            "clients_total", "clients_ok", "clients_failed", "error")
+    return [dict(zip(keys, r)) for r in rows]
+
+
+def get_run(run_id: str) -> dict | None:
+    """Resumen completo de una corrida, con sus filas por cliente."""
+    rows = _query("SELECT summary FROM runs WHERE id = ?", (run_id,))
+    if not rows:
+        return None
+    run = json.loads(rows[0][0])
+    run["clients"] = _client_rows("WHERE run_id = ? ORDER BY client_name", (run_id,))
+    return run
+
+
+def client_trends(days: int = 30, client_id: str | None = None) -> list[dict]:
+    """Por cliente, en los últimos `days` días: corridas, tasa de éxito, p50/p95 del
+    tiempo de scrape, última cantidad de filas/bytes y último error."""
+    where = "WHERE date >= ?"
+    args: tuple = (_since(days),)
+    if client_id:
+        where += " AND client_id = ?"
+        args += (client_id,)
+    by_client: dict[str, list[dict]] = {}
+    order = " ORDER BY date, (SELECT started_at FROM runs WHERE runs.id = run_clients.run_id)"
+    for row in _client_rows(where + order, args):
+        by_client.setdefault(row["client_id"], []).append(row)
+
+    out = []
+    for cid, rows in sorted(by_client.items()):
+        ok = [r for r in rows if r["status"] == "ok"]
+        seconds = [r["scrape_seconds"] for r in rows if r["scrape_seconds"] is not None]
+        last_ok = ok[-1] if ok else {}
+        last_failed = next((r for r in reversed(rows) if r["status"] != "ok"), None)
+        out.append({
+            "client_id": cid,
+            "client_name": rows[-1]["client_name"],
+            "runs": len(rows),
+            "ok": len(ok),
+            "failed": len(rows) - len(ok),
+            "success_rate": round(len(ok) / len(rows), 3),
+            "last_status": rows[-1]["status"],
+            "scrape_p50_s": _percentile(seconds, 50),
+            "scrape_p95_s": _percentile(seconds, 95),
+            "scrape_max_s": max(seconds) if seconds else None,
+            "last_people_rows": last_ok.get("people_rows"),
+            "last_email_rows": last_ok.get("email_rows"),
+            "last_bytes": (last_ok.get("people_bytes") or 0) + (last_ok.get("email_bytes") or 0) if ok else None,
+            "last_error": last_failed["error"] if last_failed else None,
+            "last_error_date": last_failed["date"] if last_failed else None,
+        })
+    return out
+
+
+def daily_trends(days: int = 30) -> list[dict]:
+    """Por día: corridas, duración máxima, clientes OK/fallidos y filas totales (última corrida del día)."""
+    rows = _query(
+        "SELECT r.date, COUNT(DISTINCT r.id), MAX(r.duration_s),"
+        " (SELECT clients_ok FROM runs WHERE date = r.date ORDER BY started_at DESC LIMIT 1),"
+        " (SELECT clients_failed FROM runs WHERE date = r.date ORDER BY started_at DESC LIMIT 1),"
+        " (SELECT SUM(COALESCE(people_rows, 0) + COALESCE(email_rows, 0)) FROM run_clients"
+        "  WHERE run_id = (SELECT id FROM runs WHERE date = r.date ORDER BY started_at DESC LIMIT 1))"
+        " FROM runs r WHERE r.date >= ? GROUP BY r.date ORDER BY r.date",
+        (_since(days),),
+    )
+    keys = ("date", "runs", "max_duration_s", "clients_ok", "clients_failed", "rows")
+    return [dict(zip(keys, r)) for r in rows]
+
+
+def stats() -> dict:
+    rows = _query("SELECT (SELECT COUNT(*) FROM runs), (SELECT COUNT(*) FROM run_clients),"
+                  " (SELECT COUNT(*) FROM cron_runs), (SELECT MIN(date) FROM runs)")
+    runs, client_rows, cron_runs, oldest = rows[0] if rows else (0, 0, 0, None)
+    return {"runs": runs, "client_rows": client_rows, "cron_runs": cron_runs, "oldest_date": oldest}
+
+
+# ── Internos ──────────────────────────────────────────────────────────────────
+
+@contextmanager
+def _db() -> Iterator[sqlite3.Connection]:
+    global _schema_ready
+    conn = sqlite3.connect(_PATH)
+    try:
+        if not _schema_ready:
+            conn.executescript(_SCHEMA)
+            _schema_ready = True
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _query(sql: str, args: tuple = ()) -> list[tuple]:
+    try:
+        with _db() as conn:
+            return conn.execute(sql, args).fetchall()
+    except sqlite3.Error as e:
+        print(f"[run-history] Error leyendo {_PATH.name}: {e}")
+        return []
+
+
+def _client_rows(where: str, args: tuple) -> list[dict]:
+    keys = ("run_id", "client_id", "client_name", "date", "status", "error", "scrape_seconds",
+            "attempts", "people_rows", "people_bytes", "email_rows", "email_bytes")
+    return [dict(zip(keys, r)) for r in _query(f"SELECT {', '.join(keys)} FROM run_clients {where}", args)]
+
+
+def _prune(conn: sqlite3.Connection) -> None:
+    cutoff = _since(HISTORY_RETENTION_DAYS)
+    conn.execute("DELETE FROM run_clients WHERE date < ?", (cutoff,))
+    conn.execute("DELETE FROM runs WHERE date < ?", (cutoff,))
+    conn.execute("DELETE FROM cron_runs WHERE started_at < ?", (cutoff,))
+
+
+def _since(days: int) -> str:
+    return (today_peru() - timedelta(days=days)).isoformat()
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 1)
+
+
+def _read_legacy(path) -> dict | None:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"[run-history] Error leyendo {path.name}: {e}")
+        return None
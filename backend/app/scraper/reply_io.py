@@ -1,10 +1,14 @@
 """Playwright scraper for Reply.io - downloads People CSV + Email Activity CSV"""
 import asyncio
 import random
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from playwright.async_api import async_playwright
 
+from app import metrics
+
 # Required for running Chromium inside Docker (avoids /dev/shm crashes)
 CHROMIUM_ARGS = [
     "--disable-dev-shm-usage",
@@ -14,6 +18,27 @@ CHROMIUM_ARGS = [
 ]
 
 
+class SessionBusy(Exception):
+    """Hay un scrape con sesión abierta de Reply.io; `check_session` no corre."""
+
+
+# Scrapes en curso y lock del chequeo de sesión: el chequeo no arranca mientras
+# haya un scrape, y un scrape que arranca espera a que termine el chequeo.
+_active_scrapes = 0
+_session_check_lock = asyncio.Lock()
+
+
+@asynccontextmanager
+async def _scrape_session():
+    global _active_scrapes
+    async with _session_check_lock:
+        _active_scrapes += 1
+    try:
+        yield
+    finally:
+        _active_scrapes -= 1
+
+
 class WorkspaceUnavailable(Exception):
     """El workspace de Reply.io no es accesible para la sesión actual.
 
@@ -120,7 +145,7 @@ async def _switch_workspace(
 
 
 def _emit_workspace_alert(alert_context: dict | None, reason: str, emit) -> None:
-    """Best-effort: dispara alerta Slack si hay contexto. Nunca propaga errores."""
+    """Best-effort: encola alerta Slack si hay contexto. Nunca bloquea ni propaga errores."""
     if not alert_context:
         return
     try:
@@ -144,6 +169,7 @@ async def _retry(coro_fn, max_attempts=3, base_delay=5, emit=None, label="operac
         except Exception as e:
             last_error = e
             if attempt < max_attempts:
+                metrics.SCRAPE_RETRIES.inc(label=label)
                 delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 3)
                 msg = f"[retry] {label} falló (intento {attempt}/{max_attempts}): {e}. Reintentando en {delay:.0f}s..."
                 if emit:
@@ -300,6 +326,27 @@ async def fetch_workspaces(
         return []
 
 
+async def check_session(email: str, password: str, headless: bool = True) -> dict:
+    """Hace login en un Chromium aparte y verifica que la sesión quede dentro de la app.
+
+    Lo usa el probe de `/api/diagnostics` para detectar credenciales vencidas
+    antes del cron. Levanta `SessionBusy` si hay un scrape en curso (no se abre
+    una segunda sesión con la misma cuenta). Returns: {"logged_in": bool, "url": str}
+    """
+    if _active_scrapes or _session_check_lock.locked():
+        raise SessionBusy("scrape o chequeo de sesión en curso")
+    async with _session_check_lock, async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless, args=CHROMIUM_ARGS)
+        try:
+            page = await browser.new_page()
+            with metrics.SCRAPE_STEP_SECONDS.time(step="session_check"):
+                await _login_reply_io(page, email, password, emit=lambda msg: None)
+            url = page.url
+            return {"logged_in": not ("oauth" in url or "login" in url.lower()), "url": url}
+        finally:
+            await browser.close()
+
+
 # Reciclar las páginas cada N clientes para evitar acumulación de memoria en Chromium
 PAGE_RECYCLE_INTERVAL = 10
 
@@ -336,6 +383,7 @@ async def download_all_reports(
     Returns:
         {client_id: {"personas": Path, "correos": Path}} for successes,
         {client_id: {"error": str}} for failures.
+        Both also carry "seconds" (wall time spent on the client) and "attempts".
     """
 
     def emit(msg: str):
@@ -348,7 +396,7 @@ async def download_all_reports(
 
     results: dict[str, dict] = {}
 
-    async with async_playwright() as p:
+    async with _scrape_session(), async_playwright() as p:
         browser = await p.chromium.launch(headless=headless, args=CHROMIUM_ARGS)
         context = await browser.new_context(
             viewport={"width": 1920, "height": 1080},
@@ -357,12 +405,14 @@ async def download_all_reports(
         page = await context.new_page()
 
         # ── LOGIN ONCE ──
-        await _login_reply_io(page, email, password, emit)
+        with metrics.SCRAPE_STEP_SECONDS.time(step="login"):
+            await _login_reply_io(page, email, password, emit)
         emit(f"Sesión iniciada. Procesando {len(clients)} clientes...")
 
         async def recycle_pages(reason: str):
             """Cierra y recrea la página principal (mantiene cookies del context)."""
             nonlocal page
+            metrics.PAGE_RECYCLES.inc(reason=reason)
             emit(f"[recycle] Reciclando páginas ({reason})...")
             try:
                 await page.close()
@@ -393,19 +443,22 @@ async def download_all_reports(
                 await recycle_pages(f"cada {PAGE_RECYCLE_INTERVAL} clientes")
 
             # Reintentar el cliente entero hasta 2 veces si crashea la página
+            client_started = time.monotonic()
             client_attempts = 0
             max_client_attempts = 2
             while client_attempts < max_client_attempts:
                 client_attempts += 1
                 try:
                     emit_client(f"Cambiando a workspace {team_id}...")
-                    await _switch_workspace(page, team_id, emit_client, alert_context=alert_context)
+                    with metrics.SCRAPE_STEP_SECONDS.time(step="switch_workspace"):
+                        await _switch_workspace(page, team_id, emit_client, alert_context=alert_context)
 
                     emit_client("Disparando export de Personas...")
-                    people_direct = await _retry(
-                        lambda: _trigger_people_export(page, download_dir, emit_client, context=context),
-                        max_attempts=3, base_delay=5, emit=emit_client, label="trigger People export",
-                    )
+                    with metrics.SCRAPE_STEP_SECONDS.time(step="people_export"):
+                        people_direct = await _retry(
+                            lambda: _trigger_people_export(page, download_dir, emit_client, context=context),
+                            max_attempts=3, base_delay=5, emit=emit_client, label="trigger People export",
+                        )
 
                     # Crear page2 aquí — justo antes de necesitarlo.
                     # Si existe antes, Reply.io podría cerrarlo al abrir tabs extra en blanco
@@ -413,16 +466,18 @@ async def download_all_reports(
                     page2 = await context.new_page()
                     emit_client("Disparando export de Correos...")
                     try:
-                        await _retry(
-                            lambda: _trigger_email_export(page2, emit_client),
-                            max_attempts=3, base_delay=5, emit=emit_client, label="trigger Email export",
-                        )
+                        with metrics.SCRAPE_STEP_SECONDS.time(step="email_export"):
+                            await _retry(
+                                lambda: _trigger_email_export(page2, emit_client),
+                                max_attempts=3, base_delay=5, emit=emit_client, label="trigger Email export",
+                            )
 
                         need_people = people_direct is None
                         emit_client(f"Esperando descargas (people={need_people}, correos=True)...")
-                        people_notif, email_csv = await _poll_both_downloads(
-                            page, page2, download_dir, emit_client, need_people=need_people,
-                        )
+                        with metrics.SCRAPE_STEP_SECONDS.time(step="wait_downloads"):
+                            people_notif, email_csv = await _poll_both_downloads(
+                                page, page2, download_dir, emit_client, need_people=need_people,
+                            )
                     finally:
                         try:
                             await page2.close()
@@ -463,6 +518,13 @@ async def download_all_reports(
                     results[cid] = {"error": err_str}
                     break
 
+            client_seconds = time.monotonic() - client_started
+            result = results.setdefault(cid, {"error": "sin resultado"})
+            result.update(seconds=round(client_seconds, 1), attempts=client_attempts)
+            metrics.CLIENT_EXPORT_SECONDS.observe(
+                client_seconds, client_id=cid, outcome="error" if "error" in result else "ok",
+            )
+
         await browser.close()
 
     return results
@@ -495,7 +557,7 @@ async def download_reports(
 
     download_dir.mkdir(parents=True, exist_ok=True)
 
-    async with async_playwright() as p:
+    async with _scrape_session(), async_playwright() as p:
         browser = await p.chromium.launch(headless=headless, slow_mo=200 if not headless else 0, args=CHROMIUM_ARGS)
         context = await browser.new_context(
             viewport={"width": 1920, "height": 1080},
@@ -1,30 +1,243 @@
 """Cliente del API de Siete (apirest.wearesiete.com).
 
 Source of truth de clientes. Lecturas via GET, escrituras via PATCH.
+
+Todas las llamadas comparten un único `httpx.AsyncClient` con pool de
+conexiones keep-alive (y HTTP/2 si está instalado `h2`), abierto en el
+lifespan de FastAPI con `open_client()` y cerrado con `close_client()`.
+Fuera del lifespan (scripts) el cliente se crea on-demand en el primer uso.
+`client_stats()` expone cuántas requests reutilizaron una conexión abierta.
+
+El listado de clientes se cachea unos segundos (`CLIENTES_CACHE_TTL_SECONDS`):
+las vistas derivadas (activos con team_id, activos sin team_id) de un mismo
+request salen de un único fetch. Los PATCH invalidan el cache.
 """
+import asyncio
+import time
+from datetime import datetime, timezone
+
 import httpx
 
+from app import executors, metrics
 from app.config import SIETE_API_ENDPOINT, SIETE_API_KEY
+from app.utils.dates import parse_iso_utc
 from app.utils.slug import slug
 
 
 # Clientes a excluir del run diario (case-insensitive sobre el nombre exacto)
 EXCLUDED_CLIENT_NAMES = {"siete"}
 
+SIETE_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+SIETE_MEETINGS_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+# Páginas de reuniones pedidas en paralelo por fetch_all_meetings
+MEETINGS_FETCH_CONCURRENCY = 4
+# PATCH en lote (patch_team_ids): requests en paralelo y reintentos ante 5xx
+PATCH_CONCURRENCY = 8
+PATCH_RETRIES = 2
+PATCH_RETRY_BACKOFF_SECONDS = 0.5
+SIETE_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+# Reintentos del transport ante errores de conexión (ConnectError/ConnectTimeout)
+SIETE_CONNECT_RETRIES = 3
+
+# Cache del listado crudo de /core/clientes/ (ver `_fetch_all_clientes`)
+CLIENTES_CACHE_TTL_SECONDS = 60
+# Antigüedad máxima del payload servido como fallback si Siete falla
+CLIENTES_STALE_MAX_SECONDS = 3600
+
+_client: httpx.AsyncClient | None = None
+_client_lock = asyncio.Lock()
+
+_clientes_cache = {
+    "data": None,
+    "fetched_at": 0.0,    # 0 = vencido (nunca traído o invalidado)
+    "stale_at": 0.0,      # cuándo se trajo `data` (no se resetea al invalidar)
+    "generation": 0,      # se incrementa en cada invalidación
+    "hits": 0,
+    "fetches": 0,
+    "stale_served": 0,
+}
+_clientes_inflight: asyncio.Task | None = None
+
+_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "reused_connections": 0,
+    "http_versions": {},
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def _attach_trace(request: httpx.Request) -> None:
+    """Hook de request: marca si httpcore abrió una conexión TCP nueva para esta request."""
+    state = {"new_connection": False}
+
+    async def trace(event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.started":
+            state["new_connection"] = True
+
+    request.extensions["trace"] = trace
+    request.extensions["siete_conn"] = state
+
+
+async def _count_response(response: httpx.Response) -> None:
+    state = response.request.extensions.get("siete_conn") or {}
+    _stats["requests"] += 1
+    if state.get("new_connection"):
+        _stats["new_connections"] += 1
+    else:
+        _stats["reused_connections"] += 1
+    versions = _stats["http_versions"]
+    versions[response.http_version] = versions.get(response.http_version, 0) + 1
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = _http2_available()
+    if not http2:
+        print("[siete_api] h2 no instalado; usando HTTP/1.1 con keep-alive")
+    return httpx.AsyncClient(
+        base_url=SIETE_API_ENDPOINT,
+        headers={"x-api-key": SIETE_API_KEY or ""},
+        timeout=SIETE_TIMEOUT,
+        follow_redirects=True,
+        http2=http2,
+        transport=metrics.InstrumentedTransport(
+            httpx.AsyncHTTPTransport(http2=http2, limits=SIETE_LIMITS, retries=SIETE_CONNECT_RETRIES),
+            service="siete",
+        ),
+        event_hooks={"request": [_attach_trace], "response": [_count_response]},
+    )
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Abre el cliente compartido (idempotente). Llamar desde el lifespan de la app.
+
+    El cliente se arma en el pool de threads: el contexto SSL cuesta ~150 ms y
+    bloquearía el loop (y el primer `/api/health`) mientras tanto. Llamadas
+    concurrentes esperan al mismo armado.
+    """
+    global _client
+    async with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = await executors.run_io(_build_client)
+    return _client
+
 
-async def _fetch_all_clientes() -> list[dict]:
-    """Trae el listado crudo de clientes desde Siete API."""
+async def close_client() -> None:
+    """Cierra el cliente compartido y sus conexiones del pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _get_client() -> httpx.AsyncClient:
     if not SIETE_API_KEY:
         raise RuntimeError("Falta env var X-HEADER-SIETE-API")
+    if _client is None or _client.is_closed:
+        return await open_client()
+    return _client
+
+
+def client_stats() -> dict:
+    """Stats de reutilización de conexiones del cliente compartido."""
+    requests = _stats["requests"]
+    return {
+        "open": _client is not None and not _client.is_closed,
+        "http2_enabled": _http2_available(),
+        "requests": requests,
+        "new_connections": _stats["new_connections"],
+        "reused_connections": _stats["reused_connections"],
+        "reuse_ratio": round(_stats["reused_connections"] / requests, 3) if requests else None,
+        "http_versions": dict(_stats["http_versions"]),
+    }
+
+
+async def _fetch_all_clientes(
+    max_age: float = CLIENTES_CACHE_TTL_SECONDS,
+    allow_stale: bool = True,
+) -> list[dict]:
+    """Trae el listado crudo de clientes desde Siete API, con cache en memoria.
+
+    - Si el payload cacheado tiene menos de `max_age` segundos se devuelve sin
+      ir a la red (`max_age=0` fuerza un fetch, ej. para diagnóstico).
+    - Llamadas concurrentes comparten un único fetch en vuelo (single-flight).
+    - Si Siete falla y hay un payload de menos de `CLIENTES_STALE_MAX_SECONDS`,
+      se sirve ese (stale) y se avisa por log, salvo `allow_stale=False`.
+
+    La lista devuelta es compartida entre llamadores: no mutarla.
+    """
+    global _clientes_inflight
+    cached = _clientes_cache["data"]
+    if cached is not None and time.monotonic() - _clientes_cache["fetched_at"] < max_age:
+        _clientes_cache["hits"] += 1
+        return cached
+
+    if _clientes_inflight is None:
+        _clientes_inflight = asyncio.create_task(_refresh_clientes(_clientes_cache["generation"]))
+        _clientes_inflight.add_done_callback(_clear_inflight)
+    try:
+        # shield: si un llamador se cancela (ej. cliente SSE desconectado), el fetch sigue para el resto
+        return await asyncio.shield(_clientes_inflight)
+    except Exception as e:
+        age = time.monotonic() - _clientes_cache["stale_at"]
+        if cached is None or not allow_stale or age > CLIENTES_STALE_MAX_SECONDS:
+            raise
+        _clientes_cache["stale_served"] += 1
+        print(f"[siete_api] /core/clientes/ falló ({type(e).__name__}: {e}); sirviendo cache de hace {age:.0f}s")
+        return cached
+
+
+async def _refresh_clientes(generation: int) -> list[dict]:
+    client = await _get_client()
+    r = await client.get("/core/clientes/", params={"limit": 500})
+    r.raise_for_status()
+    data = r.json()
+    _clientes_cache["fetches"] += 1
+    # Si hubo un PATCH mientras estaba en vuelo, este payload puede ser previo al cambio: no cachearlo
+    if generation == _clientes_cache["generation"]:
+        _clientes_cache["data"] = data
+        _clientes_cache["fetched_at"] = _clientes_cache["stale_at"] = time.monotonic()
+    return data
+
+
+def _clear_inflight(task: asyncio.Task) -> None:
+    global _clientes_inflight
+    if _clientes_inflight is task:
+        _clientes_inflight = None
+    if not task.cancelled():
+        task.exception()  # marcar como recuperada aunque ningún llamador la espere
+
+
+def invalidate_clientes_cache() -> None:
+    """Marca el cache de clientes como vencido (llamar después de escribir en Siete).
+
+    El payload anterior se conserva sólo como fallback stale si Siete falla.
+    """
+    global _clientes_inflight
+    _clientes_cache["generation"] += 1
+    _clientes_cache["fetched_at"] = 0.0
+    _clientes_inflight = None
 
-    async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
-        r = await client.get(
-            f"{SIETE_API_ENDPOINT}/core/clientes/",
-            params={"limit": 500},
-            headers={"x-api-key": SIETE_API_KEY},
-        )
-        r.raise_for_status()
-        return r.json()
+
+def clientes_cache_stats() -> dict:
+    stale_at = _clientes_cache["stale_at"]
+    return {
+        "cached": _clientes_cache["data"] is not None,
+        "fresh": _clientes_cache["fetched_at"] > 0
+                 and time.monotonic() - _clientes_cache["fetched_at"] < CLIENTES_CACHE_TTL_SECONDS,
+        "age_s": round(time.monotonic() - stale_at, 1) if stale_at else None,
+        "ttl_s": CLIENTES_CACHE_TTL_SECONDS,
+        "hits": _clientes_cache["hits"],
+        "fetches": _clientes_cache["fetches"],
+        "stale_served": _clientes_cache["stale_served"],
+    }
 
 
 def _is_excluded(name: str) -> bool:
@@ -71,49 +284,168 @@ async def fetch_active_missing_team_id() -> list[dict]:
     ]
 
 
-async def fetch_all_meetings(page_size: int = 500) -> list[dict]:
-    """Trae todas las reuniones de /prospection/siete_service_meetings/ con paginación."""
-    if not SIETE_API_KEY:
-        raise RuntimeError("Falta env var X-HEADER-SIETE-API")
+async def fetch_all_meetings(
+    page_size: int = 500,
+    concurrency: int = MEETINGS_FETCH_CONCURRENCY,
+) -> list[dict]:
+    """Trae todas las reuniones de /prospection/siete_service_meetings/ con paginación.
 
-    records: list[dict] = []
-    offset = 0
-    async with httpx.AsyncClient(timeout=60, follow_redirects=True) as client:
+    Pide hasta `concurrency` páginas (offsets consecutivos) en paralelo. La
+    primera página corta o vacía marca el final: las requests a offsets
+    posteriores se cancelan o se descartan. Las páginas se reensamblan en orden
+    de offset, así que el resultado es idéntico al del paginado secuencial.
+    """
+    client = await _get_client()
+
+    async def get_page(offset: int) -> list[dict]:
+        r = await client.get(
+            "/prospection/siete_service_meetings/",
+            params={"limit": page_size, "offset": offset},
+            timeout=SIETE_MEETINGS_TIMEOUT,
+        )
+        r.raise_for_status()
+        return r.json()
+
+    pages: dict[int, list[dict]] = {}
+    in_flight: dict[asyncio.Task, int] = {}
+    next_offset = 0
+    last_offset: int | None = None   # offset de la primera página corta conocida
+    try:
         while True:
-            r = await client.get(
-                f"{SIETE_API_ENDPOINT}/prospection/siete_service_meetings/",
-                params={"limit": page_size, "offset": offset},
-                headers={"x-api-key": SIETE_API_KEY},
-            )
-            r.raise_for_status()
-            page = r.json()
-            if not page:
-                break
-            records.extend(page)
-            if len(page) < page_size:
+            while last_offset is None and len(in_flight) < max(concurrency, 1):
+                in_flight[asyncio.create_task(get_page(next_offset))] = next_offset
+                next_offset += page_size
+            if not in_flight:
                 break
-            offset += page_size
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                offset = in_flight.pop(task)
+                page = task.result()
+                pages[offset] = page
+                if len(page) < page_size and (last_offset is None or offset < last_offset):
+                    last_offset = offset
+            if last_offset is not None:
+                for task, offset in list(in_flight.items()):
+                    if offset > last_offset:
+                        task.cancel()
+                        del in_flight[task]
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+    records: list[dict] = []
+    for offset in sorted(pages):
+        if last_offset is not None and offset > last_offset:
+            break
+        records.extend(pages[offset])
     return records
 
 
+_OLDEST = datetime.min.replace(tzinfo=timezone.utc)
+
+
+async def fetch_meetings_updated_since(since: str, page_size: int = 500) -> list[dict] | None:
+    """Reuniones con `updated_at >= since`, pidiendo el listado ordenado por `-updated_at`.
+
+    Pagina hasta la primera página que llega a reuniones más viejas que `since`.
+    Los timestamps se comparan parseados a UTC (no como texto: `Z`, offsets y
+    microsegundos opcionales rompen el orden lexicográfico). Devuelve None si el
+    endpoint no respetó el orden pedido (no se puede saber dónde cortar): el
+    llamador debe caer a `fetch_all_meetings`.
+    """
+    cutoff = parse_iso_utc(since)
+    if cutoff is None:
+        raise ValueError(f"high-water mark inválido: {since!r}")
+    client = await _get_client()
+    records: list[dict] = []
+    offset = 0
+    previous: datetime | None = None
+    while True:
+        r = await client.get(
+            "/prospection/siete_service_meetings/",
+            params={"limit": page_size, "offset": offset, "ordering": "-updated_at"},
+            timeout=SIETE_MEETINGS_TIMEOUT,
+        )
+        r.raise_for_status()
+        page = r.json()
+        # Sin updated_at (o no parseable) cuenta como el más viejo posible
+        stamps = [parse_iso_utc(m.get("updated_at")) or _OLDEST for m in page]
+        if previous is not None:
+            stamps.insert(0, previous)
+        # La página entera tiene que venir en orden descendente para poder cortar
+        if any(a < b for a, b in zip(stamps, stamps[1:])):
+            return None
+        newer = [m for m in page if (parse_iso_utc(m.get("updated_at")) or _OLDEST) >= cutoff]
+        records.extend(newer)
+        if len(newer) < len(page) or len(page) < page_size:
+            return records
+        previous = stamps[-1]
+        offset += page_size
+
+
 async def patch_team_id(siete_id: int, team_id: int | None) -> dict:
     """Actualiza el team_id de un cliente en Siete API. Acepta None para desvincular.
 
     Retorna el registro actualizado. Levanta httpx.HTTPStatusError si Siete rechaza.
     """
-    if not SIETE_API_KEY:
-        raise RuntimeError("Falta env var X-HEADER-SIETE-API")
+    _validate_team_id(team_id)
+    try:
+        return await _patch_team_id(siete_id, team_id)
+    finally:
+        invalidate_clientes_cache()
+
+
+async def patch_team_ids(
+    items: list[tuple[int, int | None]],
+    concurrency: int = PATCH_CONCURRENCY,
+) -> list[dict]:
+    """PATCH de varios (siete_id, team_id) en paralelo, con concurrencia acotada.
+
+    Cada item se resuelve por separado: un error no corta el resto. El cache de
+    clientes se invalida una sola vez al final.
+
+    Returns: un dict por item, en el mismo orden:
+        {"siete_id", "team_id", "ok": True, "client": dict} o
+        {"siete_id", "team_id", "ok": False, "error": str}
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def one(siete_id: int, team_id: int | None) -> dict:
+        result = {"siete_id": siete_id, "team_id": team_id}
+        try:
+            _validate_team_id(team_id)
+            async with semaphore:
+                client = await _patch_team_id(siete_id, team_id)
+            return {**result, "ok": True, "client": client}
+        except Exception as e:
+            return {**result, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    try:
+        return await asyncio.gather(*(one(sid, tid) for sid, tid in items))
+    finally:
+        if items:
+            invalidate_clientes_cache()
+
+
+def _validate_team_id(team_id: int | None) -> None:
     if team_id is not None and (not isinstance(team_id, int) or team_id <= 0):
         raise ValueError(f"team_id inválido: {team_id!r}")
 
-    async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
-        r = await client.patch(
-            f"{SIETE_API_ENDPOINT}/core/clientes/{siete_id}/",
-            json={"team_id": team_id},  # serializa None como JSON null
-            headers={
-                "x-api-key": SIETE_API_KEY,
-                "Content-Type": "application/json",
-            },
-        )
-        r.raise_for_status()
-        return r.json()
+
+async def _patch_team_id(siete_id: int, team_id: int | None) -> dict:
+    """PATCH sin invalidar el cache; reintenta 5xx y errores de red (el PATCH es idempotente)."""
+    client = await _get_client()
+    for attempt in range(PATCH_RETRIES + 1):
+        try:
+            r = await client.patch(
+                f"/core/clientes/{siete_id}/",
+                json={"team_id": team_id},  # serializa None como JSON null
+            )
+        except httpx.TransportError:
+            if attempt == PATCH_RETRIES:
+                raise
+        else:
+            if r.status_code < 500 or attempt == PATCH_RETRIES:
+                r.raise_for_status()
+                return r.json()
+        await asyncio.sleep(PATCH_RETRY_BACKOFF_SECONDS * 2 ** attempt)
@@ -18,3 +18,24 @@ def today_peru() -> date:
 def today_peru_iso() -> str:
     """Fecha actual Perú en formato 'YYYY-MM-DD'."""
     return today_peru().isoformat()
+
+
+def parse_iso_utc(value: str | None) -> datetime | None:
+    """Parsea un timestamp ISO 8601 (acepta sufijo `Z`) a datetime UTC.
+
+    Sin offset se asume UTC. Devuelve None si viene vacío o no se puede parsear.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00").replace("z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def format_utc(value: datetime) -> str:
+    """Timestamp UTC de ancho fijo ('YYYY-MM-DDTHH:MM:SS.ffffff+00:00'): ordena igual como texto."""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
@@ -0,0 +1,84 @@
+"""Benchmark de `fetch_all_meetings`: paginado secuencial vs concurrente.
+
+Uso:
+    cd backend
+    python -m scripts.bench_meetings_pagination
+    python -m scripts.bench_meetings_pagination --meetings 12000 --latency 0.25 --concurrency 1 4 8
+
+Corre contra un stand-in local de `/prospection/siete_service_meetings/`
+(httpx.MockTransport con latencia artificial por request), no contra Siete.
+`--concurrency 1` equivale al paginado secuencial anterior. Verifica además
+que todas las variantes devuelvan exactamente las mismas reuniones y en el
+mismo orden.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "backend"))
+os.environ.setdefault("SIETE_API_KEY", "bench")
+
+import httpx  # noqa: E402
+
+from app import siete_api  # noqa: E402
+
+
+def _stand_in(total: int, latency: float) -> httpx.MockTransport:
+    meetings = [{"id": i, "cliente": f"Cliente {i % 37}", "fecha": "2026-01-01"} for i in range(total)]
+    stats = {"requests": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        stats["requests"] += 1
+        await asyncio.sleep(latency)
+        limit = int(request.url.params.get("limit", 500))
+        offset = int(request.url.params.get("offset", 0))
+        return httpx.Response(200, json=meetings[offset:offset + limit])
+
+    transport = httpx.MockTransport(handler)
+    transport.stats = stats
+    return transport
+
+
+async def _run(total: int, latency: float, page_size: int, concurrency: int) -> tuple[float, list[dict], int]:
+    transport = _stand_in(total, latency)
+    siete_api._client = httpx.AsyncClient(base_url="http://siete.local", transport=transport)
+    try:
+        t0 = time.perf_counter()
+        records = await siete_api.fetch_all_meetings(page_size=page_size, concurrency=concurrency)
+        elapsed = time.perf_counter() - t0
+    finally:
+        await siete_api.close_client()
+    return elapsed, records, transport.stats["requests"]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=6_200)
+    parser.add_argument("--latency", type=float, default=0.2, help="segundos por request")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    pages = args.meetings // args.page_size + 1
+    print(f"[bench] {args.meetings} reuniones, page_size={args.page_size} ({pages} páginas), "
+          f"latencia {args.latency * 1000:.0f} ms/request")
+
+    baseline = None
+    for concurrency in args.concurrency:
+        elapsed, records, requests = await _run(args.meetings, args.latency, args.page_size, concurrency)
+        if baseline is None:
+            baseline = (elapsed, records)
+        same = records == baseline[1]
+        print(f"[bench] concurrency={concurrency:<3} {elapsed:6.2f}s  requests={requests:<4} "
+              f"speedup={baseline[0] / elapsed:4.1f}x  registros={len(records)}  "
+              f"{'OK' if same else 'DIFIERE'}")
+        if not same:
+            raise SystemExit("[bench] el resultado difiere del paginado secuencial")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
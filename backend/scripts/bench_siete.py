@@ -0,0 +1,158 @@
+"""Benchmark end-to-end de las llamadas a Siete contra el stub local.
+
+Levanta `scripts/siete_stub.py` en un thread, apunta `app.siete_api` a él y
+mide varias veces cada escenario:
+
+  - fetch_active_clients (cold: cache de clientes invalidado en cada vuelta)
+  - fetch_active_clients (warm: servido desde el cache TTL)
+  - fetch_all_meetings (paginado concurrente)
+  - meetings_store.sync_meetings (full) y get_meetings (incremental)
+  - POST /api/reconciliation/save con N matches
+  - GET /api/diagnostics (app completa vía ASGI, sin lifespan/crons)
+
+Uso:
+    cd backend
+    python -m scripts.bench_siete
+    python -m scripts.bench_siete --latency-ms 120 --meetings 20000 --iterations 10 --json out.json
+
+Reporta min / mediana / p95 por escenario, errores (con `--error-rate`) y
+cuántas requests recibió el stub, para comparar antes/después de cambios del
+lado Siete. `DOWNLOAD_DIR` apunta a un directorio temporal (no toca reportes
+reales).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from scripts.siete_stub import StubConfig, start_in_thread  # noqa: E402
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _measure(name: str, fn, iterations: int, stub: StubConfig, before=None) -> dict:
+    timings = []
+    errors = 0
+    requests_before = stub.stats["requests"]
+    for _ in range(iterations):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        try:
+            await fn()
+        except Exception as e:
+            errors += 1
+            print(f"[bench] {name}: {type(e).__name__}: {str(e).splitlines()[0]}")
+            continue
+        timings.append(time.perf_counter() - t0)
+    if not timings:
+        print(f"[bench] {name:<42} todas las iteraciones fallaron")
+        return {"scenario": name, "iterations": iterations, "errors": errors}
+    result = {
+        "scenario": name,
+        "iterations": iterations,
+        "min_ms": round(min(timings) * 1000, 1),
+        "median_ms": round(statistics.median(timings) * 1000, 1),
+        "p95_ms": round(_percentile(timings, 95) * 1000, 1),
+        "stub_requests_per_iter": round((stub.stats["requests"] - requests_before) / iterations, 1),
+        "errors": errors,
+    }
+    print(f"[bench] {name:<42} min {result['min_ms']:>8.1f} ms  median {result['median_ms']:>8.1f} ms  "
+          f"p95 {result['p95_ms']:>8.1f} ms  requests/iter {result['stub_requests_per_iter']}  errores {errors}")
+    return result
+
+
+async def run(args: argparse.Namespace, stub: StubConfig) -> list[dict]:
+    import httpx
+    from app import meetings_store, siete_api
+    from app.main import app
+
+    await siete_api.open_client()
+    results = []
+    try:
+        results.append(await _measure(
+            "fetch_active_clients (cold)", siete_api.fetch_active_clients,
+            args.iterations, stub, before=siete_api.invalidate_clientes_cache,
+        ))
+        results.append(await _measure(
+            "fetch_active_clients (warm)", siete_api.fetch_active_clients, args.iterations, stub,
+        ))
+        results.append(await _measure(
+            "fetch_all_meetings", siete_api.fetch_all_meetings, args.iterations, stub,
+        ))
+        results.append(await _measure(
+            "meetings_store.sync_meetings (full)", lambda: meetings_store.sync_meetings(full=True), 1, stub,
+        ))
+        results.append(await _measure(
+            "meetings_store.get_meetings (incremental)", meetings_store.get_meetings, args.iterations, stub,
+        ))
+
+        pending = await siete_api.fetch_active_missing_team_id()
+        clientes = await siete_api._fetch_all_clientes()
+        targets = ([p["siete_id"] for p in pending] + [c["id"] for c in clientes])[:args.batch]
+        items = [{"siete_id": sid, "team_id": 900000 + sid} for sid in targets]
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as api:
+            async def save():
+                r = await api.post("/api/reconciliation/save", json=items)
+                r.raise_for_status()
+
+            async def diagnostics():
+                r = await api.get("/api/diagnostics")
+                r.raise_for_status()
+
+            results.append(await _measure(
+                f"POST /api/reconciliation/save ({len(items)} items)", save, args.iterations, stub,
+            ))
+            results.append(await _measure("GET /api/diagnostics", diagnostics, args.iterations, stub))
+    finally:
+        await siete_api.close_client()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=120)
+    parser.add_argument("--meetings", type=int, default=10_000)
+    parser.add_argument("--latency-ms", type=float, default=60.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=30, help="items por reconciliation_save")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", type=Path, help="guardar resultados en este archivo")
+    args = parser.parse_args()
+
+    stub = StubConfig(
+        clientes=args.clientes, meetings=args.meetings, latency_ms=args.latency_ms,
+        error_rate=args.error_rate, port=args.port,
+    )
+    # Config se lee al importar app.*: setear antes del primer import
+    os.environ["SIETE_API_ENDPOINT"] = f"http://{stub.host}:{stub.port}"
+    os.environ["SIETE_API_KEY"] = "stub"
+    os.environ["DOWNLOAD_DIR"] = tempfile.mkdtemp(prefix="bench_siete_")
+
+    start_in_thread(stub)
+    print(f"[bench] stub: {args.clientes} clientes, {args.meetings} reuniones, "
+          f"latencia {args.latency_ms} ms, errores {args.error_rate:.0%}")
+    results = asyncio.run(run(args, stub))
+    print(f"[bench] stub recibió {stub.stats['requests']} requests "
+          f"({stub.stats['errors_injected']} errores inyectados)")
+    if args.json:
+        args.json.write_text(json.dumps({"config": vars(args) | {"json": str(args.json)}, "results": results}, indent=2))
+        print(f"[bench] resultados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
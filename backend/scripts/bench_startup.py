@@ -0,0 +1,148 @@
+"""Benchmark de arranque en frío: import de `app.main` y tiempo hasta `/api/health`.
+
+Mide en procesos nuevos (sin caches de módulos):
+
+  - `python -X importtime -c "import app.main"`: total y los módulos de primer
+    nivel más caros (acumulado).
+  - que los módulos pesados (`LAZY_MODULES`: pandas, playwright, ...) NO se
+    importen al arrancar la app web; se cargan al primer uso.
+  - con `--serve`: uvicorn desde cero hasta que `/api/health` responde 200.
+
+Compara contra `scripts/startup_baseline.json` (el perfil completo de la
+corrida de referencia queda en `scripts/importtime_baseline.txt`) y sale con
+código 1 si se importa un módulo pesado o el import empeora más de
+`--tolerance` respecto del baseline.
+
+Uso:
+    cd backend
+    python -m scripts.bench_startup
+    python -m scripts.bench_startup --runs 10 --serve
+    python -m scripts.bench_startup --update-baseline     # regenerar baseline
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+BASELINE_JSON = BACKEND / "scripts" / "startup_baseline.json"
+BASELINE_PROFILE = BACKEND / "scripts" / "importtime_baseline.txt"
+
+# No deben cargarse al importar app.main (sólo en el pool de procesos o al primer uso)
+LAZY_MODULES = ("pandas", "numpy", "playwright", "openpyxl", "tableauserverclient", "gspread", "googleapiclient")
+TOP_MODULES = 12
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("SIETE_API_KEY", "bench")
+    env["DOWNLOAD_DIR"] = tempfile.mkdtemp(prefix="bench_startup_")
+    return env
+
+
+def _importtime() -> tuple[dict[str, tuple[int, int, int]], str]:
+    """Un import de app.main en un proceso nuevo. Returns: ({módulo: (self_us, cumulative_us, nivel)}, perfil)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND, env=_env(), capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    profile = [line for line in proc.stderr.splitlines() if line.startswith("import time:")]
+    for line in profile[1:]:  # la primera es el header
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        raw_name = line.rsplit("|", 1)[1]
+        level = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+        modules[name] = (int(self_us), int(cumulative_us), level)
+    return modules, "\n".join(profile) + "\n"
+
+
+def _serve_seconds(port: int) -> float:
+    """Segundos desde lanzar uvicorn hasta el primer 200 de /api/health."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < 30:
+            # urllib y no httpx: cada httpx.get arma un contexto SSL (~100 ms) y ensucia la medición
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=0.5) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - t0
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn terminó con código {proc.returncode}")
+            time.sleep(0.02)
+        raise RuntimeError("/api/health no respondió en 30s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--serve", action="store_true", help="medir también uvicorn → /api/health")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="empeoramiento tolerado vs baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    totals = []
+    modules, profile = {}, ""
+    for _ in range(args.runs):
+        modules, profile = _importtime()
+        totals.append(modules["app.main"][1] / 1000)
+    import_ms = round(statistics.median(totals), 1)
+    top = sorted(
+        ((name, round(cum / 1000, 1)) for name, (_, cum, level) in modules.items() if level == 1),
+        key=lambda item: -item[1],
+    )[:TOP_MODULES]
+    eager = sorted(m for m in LAZY_MODULES if m in modules)
+
+    print(f"[bench] import app.main: mediana {import_ms} ms (min {min(totals):.1f}, max {max(totals):.1f}, {args.runs} corridas)")
+    for name, ms in top:
+        print(f"[bench]   {name:<40} {ms:>8.1f} ms")
+    print(f"[bench] módulos pesados importados al arrancar: {', '.join(eager) or 'ninguno'}")
+
+    result = {"python": sys.version.split()[0], "import_ms": import_ms, "top_modules": dict(top),
+              "eager_heavy_modules": eager}
+    if args.serve:
+        serve = [_serve_seconds(_free_port()) for _ in range(max(1, args.runs // 2))]
+        result["health_ready_ms"] = round(statistics.median(serve) * 1000, 1)
+        print(f"[bench] uvicorn → /api/health 200: mediana {result['health_ready_ms']} ms")
+
+    if args.update_baseline:
+        BASELINE_JSON.write_text(json.dumps(result, indent=2) + "\n")
+        BASELINE_PROFILE.write_text(profile)
+        print(f"[bench] baseline actualizado en {BASELINE_JSON.name} y {BASELINE_PROFILE.name}")
+        return
+
+    failed = bool(eager)
+    if BASELINE_JSON.exists():
+        baseline = json.loads(BASELINE_JSON.read_text())
+        for key in ("import_ms", "health_ready_ms"):
+            if key in result and key in baseline:
+                ratio = result[key] / baseline[key]
+                print(f"[bench] {key}: {result[key]} ms vs baseline {baseline[key]} ms ({ratio - 1:+.0%})")
+                failed |= ratio > 1 + args.tolerance
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Round-trip de `update_tflx`: verifica la copia cruda de entradas (`_copy_raw`).
+
+`_copy_raw` escribe sobre internos de `zipfile` (`fp`, `start_dir`, `filelist`,
+`NameToInfo`) que no son API pública. Este chequeo arma dos .tflx de prueba con
+entradas stored y deflated: uno escrito con seek y otro en streaming (todas las
+entradas con data descriptor, flag 0x08). Copia cada uno con `update_tflx` (sin
+reemplazos y reemplazando una entrada) y verifica:
+
+  - `testzip()` sin errores y mismo contenido por entrada,
+  - mismos metadatos (CRC, tamaños, compress_type, date_time, flags) en las
+    entradas copiadas,
+  - bytes idénticos al origen en cada entrada copiada (header local + datos).
+
+Verificado con CPython 3.11. Correrlo al cambiar de versión de Python; sale con
+código 1 si algo no coincide.
+
+Uso:
+    cd backend
+    python -m scripts.check_tflx_copy
+"""
+import io
+import os
+import random
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "backend"))
+os.environ.setdefault("SIETE_API_KEY", "check")
+
+from app.processing.tableau_exporter import _member_spans, update_tflx  # noqa: E402
+
+REPLACED = "flow/data/replaced.csv"
+
+
+class _Unseekable(io.RawIOBase):
+    """Stream sin seek: `zipfile` escribe las entradas con data descriptor."""
+
+    def __init__(self, sink: io.BytesIO):
+        self._sink = sink
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        return self._sink.write(data)
+
+
+def _members() -> dict[str, tuple[bytes, int, tuple]]:
+    rnd = random.Random(42)
+    csv = "".join(f"{i},cliente {i % 17},{rnd.random():.6f}\n" for i in range(20_000)).encode()
+    return {
+        "flow/flow.json": (b'{"nodes": {}}' * 50, zipfile.ZIP_DEFLATED, (2024, 3, 1, 10, 20, 30)),
+        "flow/data/stored.bin": (bytes(rnd.getrandbits(8) for _ in range(4096)), zipfile.ZIP_STORED,
+                                 (2023, 12, 31, 23, 59, 58)),
+        "flow/data/big.csv": (csv, zipfile.ZIP_DEFLATED, (2024, 1, 15, 8, 0, 0)),
+        REPLACED: (b"viejo\n" * 100, zipfile.ZIP_DEFLATED, (2022, 6, 7, 8, 9, 10)),
+    }
+
+
+def _build(path: Path, streamed: bool) -> None:
+    """Escribe las entradas de prueba; con `streamed` todas llevan data descriptor."""
+    out = io.BytesIO()
+    with zipfile.ZipFile(_Unseekable(out) if streamed else out, "w") as zf:
+        for name, (data, compress_type, date_time) in _members().items():
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = compress_type
+            with zf.open(info, "w") as f:
+                f.write(data)
+    path.write_bytes(out.getvalue())
+
+
+def _raw_records(path: Path) -> dict[str, bytes]:
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        spans = _member_spans(zf)
+        out = {}
+        for info in zf.infolist():
+            f.seek(info.header_offset)
+            out[info.filename] = f.read(spans[info.header_offset])
+        return out
+
+
+def _meta(info: zipfile.ZipInfo) -> tuple:
+    return (info.CRC, info.compress_size, info.file_size, info.compress_type, info.date_time, info.flag_bits)
+
+
+def _check(source: Path, copy: Path, replacements: dict[str, bytes]) -> list[str]:
+    errors = []
+    with zipfile.ZipFile(source) as zsrc, zipfile.ZipFile(copy) as zcopy:
+        bad = zcopy.testzip()
+        if bad is not None:
+            errors.append(f"testzip: entrada corrupta {bad}")
+        if zsrc.namelist() != zcopy.namelist():
+            errors.append(f"entradas distintas: {zsrc.namelist()} vs {zcopy.namelist()}")
+        for info in zsrc.infolist():
+            name = info.filename
+            copied = zcopy.getinfo(name)
+            expected = replacements.get(name, zsrc.read(name))
+            if zcopy.read(name) != expected:
+                errors.append(f"{name}: contenido distinto")
+            if name in replacements:
+                if (copied.compress_type, copied.date_time) != (info.compress_type, info.date_time):
+                    errors.append(f"{name}: reemplazo sin compress_type/date_time originales")
+            elif _meta(copied) != _meta(info):
+                errors.append(f"{name}: metadatos distintos {_meta(info)} vs {_meta(copied)}")
+    src_raw, copy_raw = _raw_records(source), _raw_records(copy)
+    for name, raw in src_raw.items():
+        if name not in replacements and copy_raw.get(name) != raw:
+            errors.append(f"{name}: bytes de la entrada copiada distintos al origen")
+    return errors
+
+
+def main() -> None:
+    print(f"[check] Python {sys.version.split()[0]} ({sys.implementation.name})")
+    errors = []
+    new_content = b"nuevo,contenido\n" * 500
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "replaced.csv").write_bytes(new_content)
+        for label, streamed in (("con seek", False), ("streaming", True)):
+            source = tmp / f"source_{streamed}.tflx"
+            _build(source, streamed)
+            with zipfile.ZipFile(source) as zf:
+                descriptors = sum(1 for i in zf.infolist() if i.flag_bits & 0x08)
+                kinds = sorted({i.compress_type for i in zf.infolist()})
+            print(f"[check] .tflx {label}: {len(_members())} entradas, compress_type {kinds}, "
+                  f"{descriptors} con data descriptor")
+
+            plain = tmp / "plain.tflx"
+            plain.write_bytes(source.read_bytes())
+            update_tflx(plain, {})
+            errors += [f"{label}, sin reemplazos: {e}" for e in _check(source, plain, {})]
+
+            replaced = tmp / "replaced.tflx"
+            replaced.write_bytes(source.read_bytes())
+            update_tflx(replaced, {REPLACED: tmp / "replaced.csv"})
+            errors += [f"{label}, con reemplazo: {e}" for e in _check(source, replaced, {REPLACED: new_content})]
+
+    for e in errors:
+        print(f"[check] FALLO {e}")
+    print("[check] OK" if not errors else f"[check] {len(errors)} fallo(s)")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
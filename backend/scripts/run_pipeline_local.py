@@ -23,12 +23,14 @@ sys.path.insert(0, str(ROOT / "backend"))
 from dotenv import load_dotenv
 load_dotenv(ROOT / ".env")
 
+from app import executors  # noqa: E402
+from app.config import ensure_download_dir  # noqa: E402
 from app.main import _run_bulk_pipeline  # noqa: E402
-from app.siete_api import fetch_active_clients  # noqa: E402
+from app.siete_api import close_client, fetch_active_clients  # noqa: E402
 import app.processing.send_slack as slack_mod  # noqa: E402
 
 
-def _noop_consolidated(*args, **kwargs):
+async def _noop_consolidated(*args, **kwargs):
     print("[pipeline] (skip) send_consolidated_slack desactivado para test local")
 
 
@@ -40,6 +42,7 @@ main_mod.send_consolidated_slack = _noop_consolidated
 
 
 async def main() -> None:
+    ensure_download_dir()
     print("[pipeline] Fetching active clients from Siete API...")
     clients = await fetch_active_clients()
     print(f"[pipeline] Procesando {len(clients)} clientes activos")
@@ -65,6 +68,8 @@ async def main() -> None:
         print(f"\n[pipeline] FAILURES:")
         for f in failures:
             print(f"  - {f}")
+    await close_client()
+    executors.shutdown()
 
 
 if __name__ == "__main__":
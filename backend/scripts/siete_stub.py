@@ -0,0 +1,162 @@
+"""Stand-in local del API de Siete para pruebas y benchmarks.
+
+Implementa lo que usa `app.siete_api`:
+  - GET   /core/clientes/?limit=N
+  - PATCH /core/clientes/{id}/                 body {"team_id": int | null}
+  - GET   /prospection/siete_service_meetings/?limit&offset[&ordering=-updated_at]
+
+Dataset sintético y determinístico (semilla fija), con latencia y errores
+inyectables. Todas las requests exigen el header `x-api-key` (cualquier valor).
+
+Uso:
+    cd backend
+    python -m scripts.siete_stub --clientes 120 --meetings 15000 --latency-ms 80 --error-rate 0.02
+    SIETE_API_ENDPOINT=http://127.0.0.1:8765 SIETE_API_KEY=stub uvicorn app.main:app
+
+Desde código (ej. scripts/bench_siete.py): `start_in_thread(StubConfig(...))`.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class StubConfig:
+    clientes: int = 60
+    meetings: int = 6_000
+    latency_ms: float = 50.0        # latencia base por request
+    jitter_ms: float = 10.0         # +- uniforme sobre la latencia base
+    error_rate: float = 0.0         # probabilidad de responder `error_status`
+    error_status: int = 503
+    missing_team_id_ratio: float = 0.1
+    host: str = "127.0.0.1"
+    port: int = 8765
+    seed: int = 7
+    stats: dict = field(default_factory=lambda: {"requests": 0, "errors_injected": 0, "by_path": {}})
+
+
+def build_app(config: StubConfig) -> FastAPI:
+    rng = random.Random(config.seed)
+    statuses = ["Active"] * 8 + ["Inactive", "Paused"]
+    clientes = []
+    for i in range(1, config.clientes + 1):
+        has_team = rng.random() >= config.missing_team_id_ratio
+        clientes.append({
+            "id": i,
+            "cliente": f"Cliente {i:03d}",
+            "status": rng.choice(statuses),
+            "team_id": 400000 + i if has_team else None,
+        })
+    by_id = {c["id"]: c for c in clientes}
+
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    meetings = []
+    for i in range(1, config.meetings + 1):
+        created = base + timedelta(minutes=37 * i)
+        updated = created + timedelta(hours=rng.randint(0, 240))
+        meetings.append({
+            "id": i,
+            "company": f"Empresa {i}",
+            "client": f"Cliente {rng.randint(1, max(config.clientes, 1)):03d}",
+            "celebration_date": (created + timedelta(days=3)).isoformat(),
+            "status": rng.choice(["Agendada", "Realizada", "Cancelada"]),
+            "kdm": f"Persona {i}",
+            "score": rng.randint(1, 5),
+            "created_at": created.isoformat(),
+            "updated_at": updated.isoformat(),
+            "client_id": rng.randint(1, max(config.clientes, 1)),
+        })
+
+    app = FastAPI(title="Siete API stub")
+
+    @app.middleware("http")
+    async def latency_and_errors(request: Request, call_next):
+        stats = config.stats
+        stats["requests"] += 1
+        stats["by_path"][request.url.path] = stats["by_path"].get(request.url.path, 0) + 1
+        delay = config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(delay, 0) / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            stats["errors_injected"] += 1
+            return JSONResponse(status_code=config.error_status, content={"detail": "injected error"})
+        return await call_next(request)
+
+    def check_key(x_api_key: str | None):
+        if not x_api_key:
+            raise HTTPException(status_code=403, detail="missing x-api-key")
+
+    @app.get("/core/clientes/")
+    async def list_clientes(limit: int = 500, x_api_key: str | None = Header(default=None)):
+        check_key(x_api_key)
+        return clientes[:limit]
+
+    @app.patch("/core/clientes/{siete_id}/")
+    async def patch_cliente(siete_id: int, body: dict, x_api_key: str | None = Header(default=None)):
+        check_key(x_api_key)
+        cliente = by_id.get(siete_id)
+        if cliente is None:
+            raise HTTPException(status_code=404, detail="not found")
+        cliente["team_id"] = body.get("team_id")
+        return cliente
+
+    @app.get("/prospection/siete_service_meetings/")
+    async def list_meetings(limit: int = 500, offset: int = 0, ordering: str | None = None,
+                            x_api_key: str | None = Header(default=None)):
+        check_key(x_api_key)
+        rows = meetings
+        if ordering == "-updated_at":
+            rows = sorted(meetings, key=lambda m: m["updated_at"], reverse=True)
+        return rows[offset:offset + limit]
+
+    @app.get("/_stub/stats")
+    async def stub_stats():
+        return config.stats
+
+    return app
+
+
+def start_in_thread(config: StubConfig) -> uvicorn.Server:
+    """Levanta el stub en un thread daemon y espera a que acepte conexiones."""
+    server = uvicorn.Server(uvicorn.Config(
+        build_app(config), host=config.host, port=config.port, log_level="warning",
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("el stub de Siete no arrancó")
+        time.sleep(0.05)
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=StubConfig.clientes)
+    parser.add_argument("--meetings", type=int, default=StubConfig.meetings)
+    parser.add_argument("--latency-ms", type=float, default=StubConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=StubConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=StubConfig.error_rate)
+    parser.add_argument("--error-status", type=int, default=StubConfig.error_status)
+    parser.add_argument("--port", type=int, default=StubConfig.port)
+    args = parser.parse_args()
+    config = StubConfig(
+        clientes=args.clientes, meetings=args.meetings, latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms, error_rate=args.error_rate, error_status=args.error_status,
+        port=args.port,
+    )
+    print(f"[siete-stub] {config.clientes} clientes, {config.meetings} reuniones, "
+          f"latencia {config.latency_ms}±{config.jitter_ms} ms, errores {config.error_rate:.0%} "
+          f"→ http://{config.host}:{config.port}")
+    uvicorn.run(build_app(config), host=config.host, port=config.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -87,11 +87,15 @@ function HomePage() {
     }
 
     es.onerror = (e) => {
-      console.error('SSE error:', e)
-      if (running) {
-        setError('Conexion perdida con el servidor')
-        setRunning(false)
+      // CONNECTING: el navegador reintenta solo y manda Last-Event-ID, el
+      // backend retoma el job donde quedó
+      if (es.readyState === EventSource.CONNECTING) {
+        setLogs(prev => [...prev, 'Conexion perdida, reconectando...'])
+        return
       }
+      console.error('SSE error:', e)
+      setError('Conexion perdida con el servidor')
+      setRunning(false)
       es.close()
     }
   }
@@ -128,11 +132,15 @@ function HomePage() {
     }
 
     es.onerror = (e) => {
-      console.error('SSE error:', e)
-      if (running) {
-        setError('Conexion perdida con el servidor')
-        setRunning(false)
+      // CONNECTING: el navegador reintenta solo y manda Last-Event-ID, el
+      // backend retoma el job donde quedó
+      if (es.readyState === EventSource.CONNECTING) {
+        setLogs(prev => [...prev, 'Conexion perdida, reconectando...'])
+        return
       }
+      console.error('SSE error:', e)
+      setError('Conexion perdida con el servidor')
+      setRunning(false)
       es.close()
     }
   }
@@ -1,11 +1,29 @@
 import { useEffect, useState } from 'react'
 
 const API = '/api'
+const TREND_DAYS = 30
+
+function formatSeconds(s) {
+  if (s == null) return '—'
+  return s >= 60 ? `${Math.floor(s / 60)}m ${Math.round(s % 60)}s` : `${Math.round(s)}s`
+}
+
+function formatRows(n) {
+  return n == null ? '—' : n.toLocaleString('es-PE')
+}
 
 export default function DownloadLogsPage() {
   const [loading, setLoading] = useState(true)
   const [data, setData] = useState(null)
   const [error, setError] = useState(null)
+  const [trends, setTrends] = useState(null)
+
+  useEffect(() => {
+    fetch(`${API}/runs/trends?days=${TREND_DAYS}`)
+      .then(r => r.json())
+      .then(d => setTrends(d.clients ?? []))
+      .catch(() => setTrends([]))
+  }, [])
 
   useEffect(() => {
     fetch(`${API}/last-run`)
@@ -46,6 +64,8 @@ export default function DownloadLogsPage() {
               <tr>
                 <th style={styles.th}>Estado</th>
                 <th style={styles.th}>Cliente</th>
+                <th style={{ ...styles.th, textAlign: 'right' }}>Scrape</th>
+                <th style={{ ...styles.th, textAlign: 'right' }}>Filas</th>
                 <th style={{ ...styles.th, color: '#888' }}>Detalle / Error</th>
               </tr>
             </thead>
@@ -60,6 +80,12 @@ export default function DownloadLogsPage() {
                   <td style={{ ...styles.td, fontWeight: c.status === 'ok' ? 500 : 400 }}>
                     {c.name}
                   </td>
+                  <td style={{ ...styles.td, ...styles.num }}>{formatSeconds(c.scrape_seconds)}</td>
+                  <td style={{ ...styles.td, ...styles.num }}>
+                    {c.people_rows == null && c.email_rows == null
+                      ? '—'
+                      : formatRows((c.people_rows ?? 0) + (c.email_rows ?? 0))}
+                  </td>
                   <td style={{ ...styles.td, color: c.status === 'ok' ? '#888' : '#b91c1c', fontSize: 12 }}>
                     {c.status === 'ok' ? 'Descargado' : c.error}
                   </td>
@@ -68,7 +94,7 @@ export default function DownloadLogsPage() {
             </tbody>
             <tfoot>
               <tr>
-                <td colSpan={3} style={{ ...styles.td, fontWeight: 600, fontSize: 13, color: '#555' }}>
+                <td colSpan={5} style={{ ...styles.td, fontWeight: 600, fontSize: 13, color: '#555' }}>
                   {okClients.length} exitosos · {failedClients.length} fallidos · {data.total} total
                 </td>
               </tr>
@@ -76,6 +102,40 @@ export default function DownloadLogsPage() {
           </table>
         </div>
       )}
+
+      {trends?.length > 0 && (
+        <>
+          <h2 style={styles.sectionTitle}>Últimos {TREND_DAYS} días</h2>
+          <div style={styles.tableCard}>
+            <table style={styles.table}>
+              <thead>
+                <tr>
+                  <th style={styles.th}>Cliente</th>
+                  <th style={{ ...styles.th, textAlign: 'right' }}>Éxito</th>
+                  <th style={{ ...styles.th, textAlign: 'right' }}>Scrape p50</th>
+                  <th style={{ ...styles.th, textAlign: 'right' }}>Scrape p95</th>
+                  <th style={{ ...styles.th, color: '#888' }}>Último error</th>
+                </tr>
+              </thead>
+              <tbody>
+                {trends.map((t, i) => (
+                  <tr key={t.client_id} style={i % 2 === 0 ? styles.rowEven : styles.rowOdd}>
+                    <td style={styles.td}>{t.client_name}</td>
+                    <td style={{ ...styles.td, ...styles.num, color: t.success_rate < 1 ? '#b91c1c' : '#1a1a1a' }}>
+                      {t.ok}/{t.runs}
+                    </td>
+                    <td style={{ ...styles.td, ...styles.num }}>{formatSeconds(t.scrape_p50_s)}</td>
+                    <td style={{ ...styles.td, ...styles.num }}>{formatSeconds(t.scrape_p95_s)}</td>
+                    <td style={{ ...styles.td, color: '#b91c1c', fontSize: 12 }}>
+                      {t.last_error ? `${t.last_error_date}: ${t.last_error}` : ''}
+                    </td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </div>
+        </>
+      )}
     </div>
   )
 }
@@ -108,6 +168,17 @@ const styles = {
     color: '#888',
     margin: 0,
   },
+  sectionTitle: {
+    fontSize: 16,
+    fontWeight: 600,
+    color: '#1a1a1a',
+    margin: '32px 0 12px',
+  },
+  num: {
+    textAlign: 'right',
+    fontVariantNumeric: 'tabular-nums',
+    whiteSpace: 'nowrap',
+  },
   muted: {
     color: '#888',
     fontSize: 14,